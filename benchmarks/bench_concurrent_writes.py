@@ -0,0 +1,103 @@
+"""
+Concurrent write benchmark for the SQLite database profiles
+Run: python benchmarks/bench_concurrent_writes.py [--threads 8] [--ops 200]
+
+Each profile runs against its own throwaway database file. Worker threads
+simulate technicians: read a part, change its quantity and save it inside a
+transaction. Reports committed writes per second and "database is locked"
+failures for the default profile and the production (WAL) profile.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_profile(threads, ops, parts):
+    """Run the workload in this process (DB_PROFILE/SQLITE_PATH already set)"""
+    import random
+    import threading
+    import time
+
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventory_monitor.settings')
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db import connection, transaction, OperationalError
+    from inventory_app.models import SparePart
+
+    call_command('migrate', verbosity=0)
+    SparePart.objects.bulk_create(
+        [SparePart(part_name=f'Bench Part {i}', quantity=100, threshold=10) for i in range(parts)]
+    )
+    ids = list(SparePart.objects.values_list('id', flat=True))
+
+    results = {'ok': 0, 'locked': 0}
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        ok = locked = 0
+        for _ in range(ops):
+            try:
+                with transaction.atomic():
+                    part = SparePart.objects.get(pk=rng.choice(ids))
+                    part.quantity = max(0, part.quantity + rng.choice((-1, 1)))
+                    part.save()
+                ok += 1
+            except OperationalError as e:
+                if 'locked' not in str(e):
+                    raise
+                locked += 1
+        connection.close()
+        with lock:
+            results['ok'] += ok
+            results['locked'] += locked
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        journal_mode = cursor.fetchone()[0]
+
+    print(f"{os.environ['DB_PROFILE']:<12} journal={journal_mode:<8} "
+          f"writes={results['ok']:<6} locked={results['locked']:<6} "
+          f"elapsed={elapsed:6.2f}s throughput={results['ok'] / elapsed:8.1f} writes/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--ops', type=int, default=200, help='Writes per thread')
+    parser.add_argument('--parts', type=int, default=1000)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_profile(args.threads, args.ops, args.parts)
+        return
+
+    print(f'{args.threads} threads x {args.ops} writes over {args.parts} parts')
+    for profile in ('default', 'production'):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, DB_PROFILE=profile, SQLITE_PATH=os.path.join(tmp, 'bench.sqlite3'))
+            subprocess.run(
+                [sys.executable, __file__, '--child', '--threads', str(args.threads),
+                 '--ops', str(args.ops), '--parts', str(args.parts)],
+                env=env, check=True,
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Edit contention benchmark: last write wins vs version checks
+Run: python benchmarks/bench_contention.py [--threads 8] [--ops 100] [--hot 5]
+
+Each mode runs against its own throwaway database file with the production
+profile. Worker threads simulate technicians and admins editing the same few
+hot parts: read a part, think for --think-ms, then either take one unit of
+stock or change the threshold and write it back.
+
+"unconditional" writes every field that was read with a plain UPDATE, like
+saves did before parts had a version; "versioned" uses SparePart.save(),
+which only writes when the version is still the one read, and re-reads and
+retries on VersionConflict. Reports writes per second, conflicts retried and
+lost updates (units taken that the final quantities do not reflect).
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+START_QUANTITY = 1000000
+
+
+def run_mode(mode, threads, ops, hot, think):
+    """Run the workload in this process (DB_PROFILE/SQLITE_PATH already set)"""
+    import random
+    import threading
+    import time
+
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventory_monitor.settings')
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db import connection
+    from inventory_app.models import SparePart, VersionConflict, rebuild_rollups
+
+    call_command('migrate', verbosity=0)
+    SparePart.objects.bulk_create(
+        [SparePart(part_name=f'Hot Part {i}', quantity=START_QUANTITY, threshold=10) for i in range(hot)]
+    )
+    rebuild_rollups()
+    ids = list(SparePart.objects.values_list('id', flat=True))
+
+    results = {'writes': 0, 'taken': 0, 'conflicts': 0}
+    lock = threading.Lock()
+
+    def edit(part, rng):
+        """Apply one technician or admin edit to the instance, returns units taken"""
+        if rng.random() < 0.8:
+            part.quantity -= 1
+            return 1
+        part.threshold = rng.randint(5, 50)
+        return 0
+
+    def worker(seed):
+        rng = random.Random(seed)
+        writes = taken = conflicts = 0
+        for _ in range(ops):
+            pk = rng.choice(ids)
+            while True:
+                part = SparePart.objects.get(pk=pk)
+                time.sleep(think)
+                units = edit(part, rng)
+                if mode == 'unconditional':
+                    SparePart.objects.filter(pk=pk).update(
+                        quantity=part.quantity, threshold=part.threshold, supplier=part.supplier_id,
+                        fingerprint=None,
+                    )
+                    break
+                try:
+                    part.save()
+                    break
+                except VersionConflict:
+                    conflicts += 1
+            writes += 1
+            taken += units
+        connection.close()
+        with lock:
+            results['writes'] += writes
+            results['taken'] += taken
+            results['conflicts'] += conflicts
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    remaining = sum(SparePart.objects.values_list('quantity', flat=True))
+    lost = results['taken'] - (START_QUANTITY * hot - remaining)
+    print(f"{mode:<14} writes={results['writes']:<6} conflicts={results['conflicts']:<6} "
+          f"lost={lost:<6} elapsed={elapsed:6.2f}s throughput={results['writes'] / elapsed:8.1f} writes/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--ops', type=int, default=100, help='Edits per thread')
+    parser.add_argument('--hot', type=int, default=5, help='Number of parts all threads edit')
+    parser.add_argument('--think-ms', type=float, default=2.0, help='Time between reading and writing a part')
+    parser.add_argument('--child', choices=('unconditional', 'versioned'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_mode(args.child, args.threads, args.ops, args.hot, args.think_ms / 1000)
+        return
+
+    print(f'{args.threads} threads x {args.ops} edits over {args.hot} hot parts, {args.think_ms:g} ms think time')
+    for mode in ('unconditional', 'versioned'):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, DB_PROFILE='production', SQLITE_PATH=os.path.join(tmp, 'bench.sqlite3'))
+            subprocess.run(
+                [sys.executable, __file__, '--child', mode, '--threads', str(args.threads),
+                 '--ops', str(args.ops), '--hot', str(args.hot), '--think-ms', str(args.think_ms)],
+                env=env, check=True,
+            )
+
+
+if __name__ == '__main__':
+    main()
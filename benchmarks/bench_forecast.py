@@ -0,0 +1,55 @@
+"""
+Forecast recompute benchmark
+Run: python benchmarks/bench_forecast.py [--parts 1000000] [--movement-rate 0.5]
+
+Fills a throwaway database with generate_synthetic_data, including stock
+usage movements for a share of the parts and alert history for the rest,
+then times compute_forecasts end to end and reports how the parts were
+forecast.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--parts', type=int, default=200000)
+    parser.add_argument('--movement-rate', type=float, default=0.5)
+    parser.add_argument('--history-days', type=int, default=28)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['SQLITE_PATH'] = os.path.join(tmp.name, 'bench.sqlite3')
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventory_monitor.settings')
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    from inventory_app.forecasting import compute_forecasts
+    from inventory_app.models import StockMovement
+
+    call_command('migrate', verbosity=0)
+    started = time.perf_counter()
+    call_command('generate_synthetic_data', parts=args.parts, movement_rate=args.movement_rate,
+                 history_days=args.history_days, verbosity=0, stdout=open(os.devnull, 'w'))
+    print(f'generated {args.parts:,} parts and {StockMovement.objects.count():,} movements '
+          f'in {time.perf_counter() - started:.1f}s')
+
+    for run in range(args.repeat):
+        result = compute_forecasts()
+        print(f"run {run + 1}: {result['seconds']:.2f}s "
+              f"({result['from_movements']:,} movements, {result['from_observations']:,} observations, "
+              f"{result['running_out']:,} running out)")
+
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
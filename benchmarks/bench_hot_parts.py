@@ -0,0 +1,116 @@
+"""
+Hot part benchmark: single-row updates vs sharded counters
+Run: python benchmarks/bench_hot_parts.py [--threads 8] [--ops 200] [--hot 2]
+
+Each mode runs against its own throwaway database file with the production
+profile. Worker threads simulate technicians taking one unit of a few hot
+parts, the way sparepart_update_quantity does: "single-row" reads the part
+and saves it (version checked, retried on VersionConflict), "sharded" flags
+the parts hot and adds each change to a counter shard with
+counters.record_movement(). The sharded run then folds the counters.
+Reports changes per second, version conflicts, the fold time and whether
+the final quantities and rollups add up.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+START_QUANTITY = 1000000
+
+
+def run_mode(mode, threads, ops, hot):
+    """Run the workload in this process (DB_PROFILE/SQLITE_PATH already set)"""
+    import random
+    import threading
+    import time
+
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventory_monitor.settings')
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db import connection
+    from inventory_app.counters import fold_counters, record_movement
+    from inventory_app.models import SparePart, VersionConflict, rebuild_rollups
+
+    call_command('migrate', verbosity=0)
+    SparePart.objects.bulk_create([
+        SparePart(part_name=f'Hot Part {i}', quantity=START_QUANTITY, threshold=10, hot=mode == 'sharded')
+        for i in range(hot)
+    ])
+    rebuild_rollups()
+    ids = list(SparePart.objects.values_list('id', flat=True))
+
+    results = {'changes': 0, 'conflicts': 0}
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        conflicts = 0
+        for _ in range(ops):
+            pk = rng.choice(ids)
+            part = SparePart.objects.get(pk=pk)
+            if mode == 'sharded':
+                record_movement(part, 'use', 1)
+                continue
+            while True:
+                part.quantity -= 1
+                try:
+                    part.save()
+                    break
+                except VersionConflict:
+                    conflicts += 1
+                    part = SparePart.objects.get(pk=pk)
+        connection.close()
+        with lock:
+            results['changes'] += ops
+            results['conflicts'] += conflicts
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    fold_counters()
+    fold = time.perf_counter() - started
+
+    remaining = sum(SparePart.objects.values_list('quantity', flat=True))
+    consistent = remaining == START_QUANTITY * hot - results['changes'] and not rebuild_rollups(dry_run=True)
+    print(f"{mode:<11} changes={results['changes']:<6} conflicts={results['conflicts']:<6} "
+          f"elapsed={elapsed:6.2f}s throughput={results['changes'] / elapsed:8.1f} changes/s "
+          f"fold={fold * 1000:6.1f}ms consistent={consistent}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--ops', type=int, default=200, help='Changes per thread')
+    parser.add_argument('--hot', type=int, default=2, help='Number of hot parts all threads change')
+    parser.add_argument('--child', choices=('single-row', 'sharded'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_mode(args.child, args.threads, args.ops, args.hot)
+        return
+
+    print(f'{args.threads} threads x {args.ops} changes over {args.hot} hot parts')
+    for mode in ('single-row', 'sharded'):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, DB_PROFILE='production', SQLITE_PATH=os.path.join(tmp, 'bench.sqlite3'))
+            subprocess.run(
+                [sys.executable, __file__, '--child', mode, '--threads', str(args.threads),
+                 '--ops', str(args.ops), '--hot', str(args.hot)],
+                env=env, check=True,
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Incremental export benchmark: full CSV vs changes since a cursor
+Run: python benchmarks/bench_incremental_export.py [--parts 200000] [--changes 50]
+
+Fills a throwaway database with generate_synthetic_data in a subprocess,
+takes a cursor, then changes and deletes a few parts. Times the full
+export_csv download an hourly ERP sync used to make against the
+incremental download with ?since=<cursor> (and the same with JSON), and
+checks the incremental export holds exactly the changed and deleted parts.
+Run it with a few --parts sizes: the incremental time should stay flat.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--parts', type=int, default=200000)
+    parser.add_argument('--suppliers', type=int, default=500)
+    parser.add_argument('--changes', type=int, default=50, help='Parts changed after the cursor (a fifth deleted)')
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['SQLITE_PATH'] = os.path.join(tmp.name, 'bench.sqlite3')
+    manage = [sys.executable, os.path.join(BASE_DIR, 'manage.py')]
+    subprocess.run(manage + ['migrate', '--verbosity', '0'], check=True)
+    subprocess.run(manage + ['generate_synthetic_data', '--parts', str(args.parts),
+                             '--suppliers', str(args.suppliers), '--alert-rate', '0'],
+                   check=True, stdout=subprocess.DEVNULL)
+
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventory_monitor.settings')
+    import django
+    django.setup()
+
+    import csv
+    import io
+    import random
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from django.utils import timezone
+    from inventory_app.models import SparePart
+    from inventory_app.sync import encode_cursor
+
+    cursor = encode_cursor(timezone.now(), 0)
+    ids = random.Random(0).sample(list(SparePart.objects.values_list('id', flat=True)), args.changes)
+    deleted = set(ids[:args.changes // 5])
+    for part in SparePart.objects.filter(pk__in=ids[len(deleted):]):
+        part.quantity += 1
+        part.save()
+    SparePart.objects.filter(pk__in=deleted).delete()
+
+    client = Client(HTTP_HOST='localhost')
+    client.force_login(User.objects.create_superuser('bench', 'bench@example.com', 'bench'))
+
+    def download(path, params=None):
+        started = time.perf_counter()
+        response = client.get(path, params or {})
+        assert response.status_code == 200, response.status_code
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return body, time.perf_counter() - started
+
+    full, full_elapsed = download('/export/csv/')
+    changes, changes_elapsed = download('/export/csv/', {'since': cursor})
+    _, json_elapsed = download('/export/json/', {'since': cursor})
+
+    rows = list(csv.DictReader(io.StringIO(changes.decode())))
+    exact = (
+        {int(row['Id']) for row in rows if row['Deleted']} == deleted
+        and {int(row['Id']) for row in rows if not row['Deleted']} == set(ids) - deleted
+    )
+    print(f'{args.parts:,} parts, {args.changes} changed after the cursor ({len(deleted)} deleted)')
+    print(f'full csv         {full_elapsed * 1000:8.1f} ms {len(full) / 1e6:8.2f} MB')
+    print(f'incremental csv  {changes_elapsed * 1000:8.1f} ms {len(changes) / 1e6:8.3f} MB  exact={exact}')
+    print(f'incremental json {json_elapsed * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
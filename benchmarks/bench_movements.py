@@ -0,0 +1,79 @@
+"""
+Stock movement benchmark: form round trips vs one batch
+Run: python benchmarks/bench_movements.py [--parts 5000] [--scans 40]
+
+Fills a throwaway database with generate_synthetic_data, then replays a
+technician's shift of --scans quantity changes two ways through the Django
+test client: one sparepart_update_quantity POST per scan followed by the
+technician_dashboard render it redirects to, the same POSTs sent in the
+background by the technician table (row fragment and KPIs back), and a
+single /api/movements/ batch.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--parts', type=int, default=5000)
+    parser.add_argument('--scans', type=int, default=40)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['SQLITE_PATH'] = os.path.join(tmp.name, 'bench.sqlite3')
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventory_monitor.settings')
+    import django
+    django.setup()
+
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.test import Client
+    from inventory_app.models import SparePart, rebuild_rollups
+
+    call_command('migrate', verbosity=0)
+    call_command('generate_synthetic_data', parts=args.parts, alert_rate=0, verbosity=0, stdout=open(os.devnull, 'w'))
+    # Keep every part above its threshold so neither run sends alert emails
+    SparePart.objects.update(quantity=1000000, fingerprint=None)
+    rebuild_rollups()
+
+    user = User.objects.create_user('bench', password='bench')
+    client = Client(HTTP_HOST='localhost')
+    client.force_login(user)
+    part_ids = random.Random(42).sample(list(SparePart.objects.values_list('id', flat=True)), args.scans)
+
+    started = time.perf_counter()
+    for part_id in part_ids:
+        response = client.post(f'/spare/{part_id}/update_quantity/', {'action': 'use', 'quantity': 1}, follow=True)
+        assert response.status_code == 200
+    forms = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for part_id in part_ids:
+        response = client.post(f'/spare/{part_id}/update_quantity/', {'action': 'use', 'quantity': 1},
+                               HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        assert response.status_code == 200
+    background = time.perf_counter() - started
+
+    body = json.dumps({'movements': [{'part_id': pk, 'action': 'use', 'qty': 1} for pk in part_ids]})
+    started = time.perf_counter()
+    response = client.post('/api/movements/', body, content_type='application/json', HTTP_IDEMPOTENCY_KEY='bench-1')
+    batch = time.perf_counter() - started
+    assert response.status_code == 200, response.content
+
+    print(f'{args.scans} scans over {args.parts:,} parts')
+    print(f'form + dashboard: {forms:7.3f}s  ({forms / args.scans * 1000:8.2f} ms per scan)')
+    print(f'background post:  {background:7.3f}s  ({background / args.scans * 1000:8.2f} ms per scan)')
+    print(f'batch endpoint:   {batch:7.3f}s  ({batch / args.scans * 1000:8.2f} ms per scan)')
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
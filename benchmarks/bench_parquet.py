@@ -0,0 +1,83 @@
+"""
+Parquet vs CSV exchange benchmark
+Run: python benchmarks/bench_parquet.py [--parts 1000000]
+
+Fills a throwaway database with generate_synthetic_data in a subprocess,
+exports every part as CSV (like export_csv) and as Parquet (like
+export_parquet), then compares file sizes, how long pandas takes to load
+each file back with types, and how long run_import takes to re-import each
+file into an unchanged database. Needs pyarrow.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--parts', type=int, default=200000)
+    parser.add_argument('--suppliers', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=1, help='Import parser processes')
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['SQLITE_PATH'] = os.path.join(tmp.name, 'bench.sqlite3')
+    manage = [sys.executable, os.path.join(BASE_DIR, 'manage.py')]
+    subprocess.run(manage + ['migrate', '--verbosity', '0'], check=True)
+    subprocess.run(manage + ['generate_synthetic_data', '--parts', str(args.parts),
+                             '--suppliers', str(args.suppliers), '--alert-rate', '0'],
+                   check=True, stdout=subprocess.DEVNULL)
+
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventory_monitor.settings')
+    import django
+    django.setup()
+
+    import pandas as pd
+    from inventory_app.exporters import write_parts_csv, write_parts_parquet
+    from inventory_app.importer import run_import
+    from inventory_app.models import SparePart
+
+    csv_path = os.path.join(tmp.name, 'parts.csv')
+    parquet_path = os.path.join(tmp.name, 'parts.parquet')
+    with open(csv_path, 'w', newline='') as f:
+        parts = SparePart.objects.select_related('supplier').order_by('id').iterator(chunk_size=5000)
+        _, csv_export = timed(write_parts_csv, f, parts)
+    with open(parquet_path, 'wb') as f:
+        rows = SparePart.objects.order_by('id').values_list(
+            'part_name', 'quantity', 'threshold', 'supplier__name', 'updated_at',
+        ).iterator(chunk_size=5000)
+        _, parquet_export = timed(write_parts_parquet, f, rows)
+
+    csv_frame, csv_load = timed(pd.read_csv, csv_path, parse_dates=['Updated At'])
+    parquet_frame, parquet_load = timed(pd.read_parquet, parquet_path, engine='pyarrow')
+    assert len(csv_frame) == len(parquet_frame) == args.parts
+
+    csv_import, csv_import_time = timed(run_import, csv_path, '.csv', workers=args.workers)
+    parquet_import, parquet_import_time = timed(run_import, parquet_path, '.parquet', workers=args.workers)
+
+    csv_size, parquet_size = os.path.getsize(csv_path), os.path.getsize(parquet_path)
+    print(f'{args.parts:,} parts')
+    print(f'size:     csv {csv_size / 1e6:7.1f} MB   parquet {parquet_size / 1e6:7.1f} MB   '
+          f'({csv_size / parquet_size:.1f}x smaller)')
+    print(f'export:   csv {csv_export:7.2f} s    parquet {parquet_export:7.2f} s')
+    print(f'pandas:   csv {csv_load:7.2f} s    parquet {parquet_load:7.2f} s    '
+          f'({csv_load / parquet_load:.1f}x faster)')
+    print(f'import:   csv {csv_import_time:7.2f} s    parquet {parquet_import_time:7.2f} s    '
+          f"({csv_import['unchanged']:,} / {parquet_import['unchanged']:,} unchanged)")
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Purchase order ZIP benchmark
+Run: python benchmarks/bench_purchase_orders.py [--parts 200000] [--suppliers 500] [--workers 4]
+
+Fills a throwaway database with generate_synthetic_data, then times
+write_purchase_orders_zip (one CSV and PDF per supplier) in-process, as
+the download view renders, and with the worker pool export_purchase_orders
+uses, writing to a temporary file.
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--parts', type=int, default=200000)
+    parser.add_argument('--suppliers', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['SQLITE_PATH'] = os.path.join(tmp.name, 'bench.sqlite3')
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventory_monitor.settings')
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    from inventory_app.purchasing import write_purchase_orders_zip
+
+    call_command('migrate', verbosity=0)
+    call_command('generate_synthetic_data', parts=args.parts, suppliers=args.suppliers, alert_rate=0,
+                 verbosity=0, stdout=open(os.devnull, 'w'))
+
+    for workers in sorted({1, args.workers}):
+        with tempfile.TemporaryFile() as archive:
+            started = time.perf_counter()
+            totals = write_purchase_orders_zip(archive, workers=workers)
+            elapsed = time.perf_counter() - started
+            size = archive.tell()
+        print(f"workers={workers}: {totals['orders']:,} orders, {totals['lines']:,} lines "
+              f"in {elapsed:.2f}s, {size / 1e6:.1f} MB zip")
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'peak RSS {peak:.0f} MB')
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
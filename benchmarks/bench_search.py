@@ -0,0 +1,72 @@
+"""
+Search latency benchmark: FTS5 index vs icontains scans
+Run: python benchmarks/bench_search.py [--parts 1000000] [--repeat 20]
+
+Fills a throwaway database with generate_synthetic_data, then times the
+ranked search used by /api/parts/search/ and the admin changelist filter
+against the icontains query the admin used before, for a few typical
+search strings.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUERIES = ['hydr', 'sealed valve', 'apex', 'gear 00042', 'zzz-no-match']
+
+
+def timed(fn, repeat):
+    """Best wall time of fn() in milliseconds"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--parts', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['SQLITE_PATH'] = os.path.join(tmp.name, 'bench.sqlite3')
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventory_monitor.settings')
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db.models import Q
+    from inventory_app.models import SparePart
+    from inventory_app.search import filter_parts, search_parts
+
+    call_command('migrate', verbosity=0)
+    call_command('generate_synthetic_data', parts=args.parts, alert_rate=0, verbosity=0, stdout=open(os.devnull, 'w'))
+    print(f'{SparePart.objects.count():,} parts, best of {args.repeat}')
+    print(f"{'query':<16} {'matches':>9} {'fts top 20':>12} {'fts count':>11} {'icontains':>11}")
+
+    for query in QUERIES:
+        icontains = Q()
+        for term in query.split():
+            icontains &= Q(part_name__icontains=term) | Q(supplier__name__icontains=term)
+        scan = SparePart.objects.filter(icontains)
+
+        matches = filter_parts(SparePart.objects.all(), query).count()
+        top = timed(lambda: search_parts(query, 20), args.repeat)
+        count = timed(lambda: filter_parts(SparePart.objects.all(), query).count(), args.repeat)
+        # What the admin changelist did before: icontains over every row, first page
+        baseline = timed(lambda: list(scan.order_by('part_name')[:100]), args.repeat)
+        print(f'{query:<16} {matches:>9,} {top:>10.2f}ms {count:>9.2f}ms {baseline:>9.2f}ms')
+
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
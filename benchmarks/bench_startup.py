@@ -0,0 +1,90 @@
+"""
+Cold start import benchmark
+Run: python benchmarks/bench_startup.py [--repeat 5] [--max-ms 600]
+
+Starts fresh interpreters with -X importtime for the code paths that run on
+every worker boot or cron tick, and reports the total import time (best of
+--repeat). Exits with status 1 if a heavy library that only some exports
+and imports need is loaded, or if a path exceeds --max-ms.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SETUP = (
+    "import os, django; "
+    "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventory_monitor.settings'); "
+    "django.setup(); "
+)
+
+# What each path imports: the URLconf is loaded by the first request a web
+# worker serves, commands are loaded by manage.py before they run
+PATHS = {
+    'web worker (urls + views)': SETUP + "import inventory_monitor.urls",
+    'admin (admin autodiscover)': SETUP + "import django.contrib.admin; django.contrib.admin.autodiscover()",
+    'send_daily_stock_alert': SETUP + (
+        "from django.core.management import load_command_class; "
+        "load_command_class('inventory_app', 'send_daily_stock_alert')"
+    ),
+}
+
+# Only needed by the exports and imports that use them
+HEAVY_MODULES = ('pandas', 'numpy', 'reportlab', 'openpyxl', 'pyarrow')
+
+
+def measure(code):
+    """
+    Run code in a fresh interpreter with -X importtime.
+
+    Returns:
+        tuple: (total import time in ms, set of top-level modules imported)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True,
+    )
+    total_us = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        total_us += int(self_us)
+        modules.add(name.strip().split('.')[0])
+    return total_us / 1000, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-ms', type=float, default=600,
+                        help='Fail if any path takes longer than this to import (default: 600)')
+    args = parser.parse_args()
+
+    failures = []
+    for label, code in PATHS.items():
+        timings = []
+        for _ in range(args.repeat):
+            total_ms, modules = measure(code)
+            timings.append(total_ms)
+        best = min(timings)
+        heavy = sorted(set(HEAVY_MODULES) & modules)
+        print(f"{label:<30} {best:>8.1f}ms  heavy imports: {', '.join(heavy) or 'none'}")
+        if heavy:
+            failures.append(f'{label} imports {", ".join(heavy)}')
+        if best > args.max_ms:
+            failures.append(f'{label} takes {best:.0f}ms to import (budget {args.max_ms:.0f}ms)')
+
+    if failures:
+        print('\nCold start regressed:')
+        for failure in failures:
+            print(f'  - {failure}')
+        sys.exit(1)
+    print('\nCold start within budget')
+
+
+if __name__ == '__main__':
+    main()
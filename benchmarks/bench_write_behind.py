@@ -0,0 +1,139 @@
+"""
+Write-behind benchmark: synchronous stock changes vs the usage spool
+Run: python benchmarks/bench_write_behind.py [--threads 8] [--ops 200] [--parts 200]
+
+Each mode runs against its own throwaway database file with the production
+profile. Worker threads simulate a shift-change burst of technicians taking
+one unit of random parts. "synchronous" saves every change the way
+sparepart_update_quantity does without a spool (version checked, retried on
+VersionConflict); "write-behind" appends every change to a usage spool file
+while a flusher thread applies the spool every --interval seconds, then
+drains it. Reports changes per second, write transactions on the inventory
+database and whether the final quantities and rollups add up.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+START_QUANTITY = 1000000
+
+
+def run_mode(mode, threads, ops, parts, interval):
+    """Run the workload in this process (DB_PROFILE/SQLITE_PATH/USAGE_SPOOL_PATH already set)"""
+    import random
+    import threading
+    import time
+
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventory_monitor.settings')
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db import connection
+    from inventory_app import spool
+    from inventory_app.models import SparePart, VersionConflict, rebuild_rollups
+
+    call_command('migrate', verbosity=0)
+    SparePart.objects.bulk_create(
+        [SparePart(part_name=f'Bench Part {i}', quantity=START_QUANTITY, threshold=10) for i in range(parts)]
+    )
+    rebuild_rollups()
+    ids = list(SparePart.objects.values_list('id', flat=True))
+
+    results = {'transactions': 0, 'conflicts': 0}
+    lock = threading.Lock()
+
+    def count_transactions(execute, sql, params, many, context):
+        if sql.startswith('BEGIN'):
+            with lock:
+                results['transactions'] += 1
+        return execute(sql, params, many, context)
+
+    def worker(seed):
+        rng = random.Random(seed)
+        conflicts = 0
+        with connection.execute_wrapper(count_transactions):
+            for _ in range(ops):
+                pk = rng.choice(ids)
+                part = SparePart.objects.get(pk=pk)
+                if mode == 'write-behind':
+                    spool.append(pk, -1)
+                    continue
+                while True:
+                    part.quantity -= 1
+                    try:
+                        part.save()
+                        break
+                    except VersionConflict:
+                        conflicts += 1
+                        part = SparePart.objects.get(pk=pk)
+        connection.close()
+        with lock:
+            results['conflicts'] += conflicts
+
+    done = threading.Event()
+
+    def flusher():
+        with connection.execute_wrapper(count_transactions):
+            while not done.wait(interval):
+                spool.flush()
+            while spool.flush()[0]:
+                pass
+        connection.close()
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    background = threading.Thread(target=flusher) if mode == 'write-behind' else None
+    started = time.perf_counter()
+    if background:
+        background.start()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    burst = time.perf_counter() - started
+    done.set()
+    if background:
+        background.join()
+    elapsed = time.perf_counter() - started
+
+    changes = threads * ops
+    remaining = sum(SparePart.objects.values_list('quantity', flat=True))
+    consistent = remaining == START_QUANTITY * parts - changes and not rebuild_rollups(dry_run=True)
+    print(f"{mode:<13} changes={changes:<6} burst={burst:6.2f}s ({changes / burst:7.1f} changes/s) "
+          f"applied after {elapsed:6.2f}s  write transactions={results['transactions']:<6} "
+          f"({results['transactions'] / elapsed:7.1f}/s) conflicts={results['conflicts']:<5} consistent={consistent}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--ops', type=int, default=200, help='Changes per thread')
+    parser.add_argument('--parts', type=int, default=200)
+    parser.add_argument('--interval', type=float, default=1.0, help='Seconds between flushes')
+    parser.add_argument('--child', choices=('synchronous', 'write-behind'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_mode(args.child, args.threads, args.ops, args.parts, args.interval)
+        return
+
+    print(f'{args.threads} threads x {args.ops} changes over {args.parts} parts, flush every {args.interval:g}s')
+    for mode in ('synchronous', 'write-behind'):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(
+                os.environ, DB_PROFILE='production', SQLITE_PATH=os.path.join(tmp, 'bench.sqlite3'),
+                USAGE_SPOOL_PATH=os.path.join(tmp, 'spool.sqlite3') if mode == 'write-behind' else '',
+            )
+            subprocess.run(
+                [sys.executable, __file__, '--child', mode, '--threads', str(args.threads), '--ops', str(args.ops),
+                 '--parts', str(args.parts), '--interval', str(args.interval)],
+                env=env, check=True,
+            )
+
+
+if __name__ == '__main__':
+    main()
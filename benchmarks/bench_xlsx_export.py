@@ -0,0 +1,65 @@
+"""
+XLSX export benchmark
+Run: python benchmarks/bench_xlsx_export.py [--parts 1000000]
+
+Fills a throwaway database with generate_synthetic_data in a subprocess,
+then writes the all-parts workbook the way export_xlsx does (chunked
+values_list into a temporary file) and reports time, file size and how much
+the peak RSS of this process grew during the export. Run it with a few
+--parts sizes: the RSS growth should stay about the same.
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--parts', type=int, default=200000)
+    parser.add_argument('--suppliers', type=int, default=500)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['SQLITE_PATH'] = os.path.join(tmp.name, 'bench.sqlite3')
+    manage = [sys.executable, os.path.join(BASE_DIR, 'manage.py')]
+    subprocess.run(manage + ['migrate', '--verbosity', '0'], check=True)
+    subprocess.run(manage + ['generate_synthetic_data', '--parts', str(args.parts),
+                             '--suppliers', str(args.suppliers), '--alert-rate', '0'],
+                   check=True, stdout=subprocess.DEVNULL)
+
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventory_monitor.settings')
+    import django
+    django.setup()
+
+    from inventory_app.exporters import write_parts_xlsx
+    from inventory_app.models import SparePart
+
+    import openpyxl  # noqa: F401 (keep the import out of the measurement)
+    baseline = peak_rss_mb()
+    rows = SparePart.objects.order_by('part_name').values_list(
+        'part_name', 'quantity', 'threshold', 'supplier__name', 'updated_at',
+    ).iterator(chunk_size=5000)
+    with tempfile.TemporaryFile() as workbook:
+        started = time.perf_counter()
+        count = write_parts_xlsx(workbook, rows)
+        elapsed = time.perf_counter() - started
+        size = workbook.tell()
+
+    print(f'{count:,} rows in {elapsed:.1f}s ({count / elapsed:,.0f} rows/s), {size / 1e6:.1f} MB xlsx')
+    print(f'peak RSS {peak_rss_mb():.0f} MB, +{peak_rss_mb() - baseline:.0f} MB during export')
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -9,7 +9,7 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventory_monitor.settings')
 django.setup()
 
-from inventory_app.models import SparePart, AlertLog
+from inventory_app.models import SparePart, Supplier, AlertLog
 from inventory_app.services import AlertService
 
 def demo_alert_system():
@@ -23,7 +23,7 @@ def demo_alert_system():
         defaults={
             'quantity': 2,
             'threshold': 10,
-            'supplier': 'Test Supplier Corp'
+            'supplier': Supplier.objects.get_or_create(name='Test Supplier Corp')[0]
         }
     )
     
@@ -1,12 +1,43 @@
+from django import forms
 from django.contrib import admin
-from .models import SparePart, AlertLog
+from django.db.models import F
+from .models import (
+    SparePart, Supplier, AlertLog, ImportJob, InventorySummary, StockMovement, StockForecast, ReorderSuggestion,
+)
+from .forms import disable_hot_quantity
+from .search import filter_parts
+
+
+class SparePartAdminForm(forms.ModelForm):
+    class Meta:
+        model = SparePart
+        fields = '__all__'
+        widgets = {'version': forms.HiddenInput()}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.hot:
+            disable_hot_quantity(self)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        stored = SparePart.objects.filter(pk=self.instance.pk).values_list('version', flat=True)
+        if self.instance.pk and stored.first() != cleaned_data.get('version'):
+            raise forms.ValidationError(
+                'This part was changed by someone else since the page was opened. '
+                'Reload it and apply your changes again.'
+            )
+        return cleaned_data
 
 
 @admin.register(SparePart)
 class SparePartAdmin(admin.ModelAdmin):
-    list_display = ('part_name', 'quantity', 'threshold', 'supplier', 'updated_at', 'is_low')
-    list_filter = ('supplier', 'updated_at')
-    search_fields = ('part_name', 'supplier')
+    form = SparePartAdminForm
+    list_display = ('part_name', 'quantity', 'threshold', 'supplier', 'updated_at', 'is_low', 'hot')
+    list_filter = ('hot', 'supplier', 'updated_at')
+    list_select_related = ('supplier',)
+    search_fields = ('part_name', 'supplier__name')
+    autocomplete_fields = ('supplier',)
     ordering = ('part_name',)
     
     def is_low(self, obj):
@@ -14,6 +45,21 @@ class SparePartAdmin(admin.ModelAdmin):
     is_low.boolean = True
     is_low.short_description = 'Low Stock'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of icontains scans over every row
+        if not search_term.strip():
+            return queryset, False
+        return filter_parts(queryset, search_term), False
+
+
+@admin.register(Supplier)
+class SupplierAdmin(admin.ModelAdmin):
+    list_display = ('name', 'lead_time_days', 'part_count', 'total_quantity', 'low_stock_count', 'created_at')
+    list_editable = ('lead_time_days',)
+    search_fields = ('name',)
+    readonly_fields = ('part_count', 'total_quantity', 'low_stock_count', 'created_at')
+    ordering = ('name',)
+
 
 @admin.register(AlertLog)
 class AlertLogAdmin(admin.ModelAdmin):
@@ -37,3 +83,84 @@ class AlertLogAdmin(admin.ModelAdmin):
             'fields': ('alert_date', 'resolved_date')
         }),
     )
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('original_name', 'status', 'rows_processed', 'total_rows', 'created_count', 'updated_count', 'unchanged_count', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('original_name',)
+    readonly_fields = ('created_at', 'started_at', 'finished_at')
+    ordering = ('-created_at',)
+
+
+@admin.register(InventorySummary)
+class InventorySummaryAdmin(admin.ModelAdmin):
+    list_display = ('total_parts', 'total_quantity', 'low_stock_count')
+    readonly_fields = ('total_parts', 'total_quantity', 'low_stock_count')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ('part', 'delta', 'quantity_after', 'created_at')
+    list_filter = ('created_at',)
+    search_fields = ('part__part_name',)
+    raw_id_fields = ('part',)
+    ordering = ('-created_at',)
+
+
+@admin.register(StockForecast)
+class StockForecastAdmin(admin.ModelAdmin):
+    list_display = ('part', 'days_of_cover', 'stockout_date', 'smoothed_daily_usage', 'avg_daily_usage', 'method', 'computed_at')
+    list_filter = ('method',)
+    search_fields = ('part__part_name',)
+    list_select_related = ('part',)
+    ordering = ('days_of_cover',)
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(ReorderSuggestion)
+class ReorderSuggestionAdmin(admin.ModelAdmin):
+    list_display = ('part', 'current_threshold', 'suggested_threshold', 'threshold_change', 'stockout_risk',
+                    'stockout_risk_now', 'daily_usage', 'lead_time_days', 'computed_at')
+    list_filter = ('lead_time_days',)
+    search_fields = ('part__part_name',)
+    list_select_related = ('part',)
+    ordering = ('-stockout_probability',)
+    actions = ['apply_suggested_thresholds']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description='Change', ordering='suggested_threshold')
+    def threshold_change(self, obj):
+        return f"{obj.threshold_change:+d}"
+
+    @admin.display(description='Stock-out risk at threshold', ordering='stockout_probability')
+    def stockout_risk(self, obj):
+        return f"{obj.stockout_probability:.1%}"
+
+    @admin.display(description='Stock-out risk now', ordering='stockout_probability_now')
+    def stockout_risk_now(self, obj):
+        return f"{obj.stockout_probability_now:.1%}"
+
+    @admin.action(description='Apply suggested thresholds to the selected parts')
+    def apply_suggested_thresholds(self, request, queryset):
+        updated = 0
+        for suggestion in queryset.select_related('part'):
+            part = suggestion.part
+            if part.threshold != suggestion.suggested_threshold:
+                # save() keeps the fingerprint and rollups in step
+                part.threshold = suggestion.suggested_threshold
+                part.save()
+                updated += 1
+        queryset.update(current_threshold=F('suggested_threshold'))
+        self.message_user(request, f'Updated thresholds of {updated} part(s)')
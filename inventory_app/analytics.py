@@ -0,0 +1,152 @@
+"""
+Server-side inventory analytics for the admin dashboard
+
+Categories are counted with SQL conditional aggregation and every list is
+capped at a fixed size, so the insights payload stays a few KB no matter
+how many parts are in the inventory. For the unfiltered dashboard, KPIs and
+supplier statistics are read from the rollup tables (InventorySummary and
+Supplier) instead of being aggregated over every part.
+"""
+from django.db.models import Count, F, Q, Sum
+from .models import InventorySummary, Supplier
+
+# Number of parts/suppliers returned in each ranked list
+TOP_N = 10
+
+# Rows shown in the dashboard's detailed parts table
+TABLE_ROWS = 50
+
+# A part is critical when out of stock or below half of its threshold
+CRITICAL_Q = Q(quantity=0) | Q(threshold__gt=F('quantity') * 2)
+
+# A part is overstocked when it holds more than three times its threshold
+OVERSTOCKED_Q = Q(quantity__gt=F('threshold') * 3)
+
+# Same rule as SparePart.is_low() and the rollups
+LOW_STOCK_Q = Q(quantity__lte=F('threshold'))
+
+PART_FIELDS = ('part_name', 'quantity', 'threshold', 'supplier__name')
+
+
+def with_supplier_names(rows):
+    """
+    Replace the supplier ids of rows grouped by supplier with supplier names.
+
+    Grouping runs on the integer supplier_id; names are fetched afterwards
+    for the (bounded) rows actually returned. Parts without a supplier get ''.
+    """
+    rows = list(rows)
+    ids = {row['supplier'] for row in rows if row['supplier'] is not None}
+    names = dict(Supplier.objects.filter(pk__in=ids).values_list('id', 'name')) if ids else {}
+    for row in rows:
+        row['supplier'] = names.get(row['supplier'], '')
+    return rows
+
+
+def _part_rows(parts):
+    """Part dicts for the JSON payload, with the supplier as a name"""
+    return [
+        {'part_name': name, 'quantity': quantity, 'threshold': threshold, 'supplier': supplier or ''}
+        for name, quantity, threshold, supplier in parts.values_list(*PART_FIELDS)
+    ]
+
+
+def compute_insights(parts, top_n=TOP_N, table_rows=TABLE_ROWS, use_rollups=False):
+    """
+    Compute dashboard KPIs, insight categories and bounded top-N lists.
+
+    Args:
+        parts (QuerySet): SparePart queryset, already filtered
+        top_n (int): Length of each ranked list
+        table_rows (int): Rows returned for the detailed parts table
+        use_rollups (bool): Read KPIs and supplier stats from the rollup
+            tables; only valid when parts is the whole inventory
+
+    Returns:
+        dict: JSON-serializable insights payload
+    """
+    categories = {
+        'critical': Count('id', filter=CRITICAL_Q),
+        'overstocked': Count('id', filter=OVERSTOCKED_Q),
+    }
+    if use_rollups:
+        counts = parts.aggregate(**categories)
+        summary = InventorySummary.load()
+        counts.update(
+            total_parts=summary.total_parts,
+            low_stock=summary.low_stock_count,
+            total_quantity=summary.total_quantity,
+        )
+        supplier_stats = Supplier.objects.filter(part_count__gt=0).values(
+            'total_quantity', 'part_count', supplier=F('id'),
+        )
+        tiebreak = 'id'
+    else:
+        counts = parts.aggregate(
+            total_parts=Count('id'),
+            low_stock=Count('id', filter=LOW_STOCK_Q),
+            total_quantity=Sum('quantity'),
+            **categories,
+        )
+        supplier_stats = parts.filter(supplier__isnull=False).values('supplier').annotate(
+            total_quantity=Sum('quantity'),
+            part_count=Count('id'),
+        )
+        tiebreak = 'supplier_id'
+    total_parts = counts['total_parts']
+    low_stock_count = counts['low_stock']
+
+    suppliers_count = supplier_stats.count()
+    top_suppliers = with_supplier_names(supplier_stats.order_by('-total_quantity', tiebreak)[:top_n])
+    top_by_parts = supplier_stats.order_by('-part_count', tiebreak).first()
+    if top_by_parts:
+        top_by_parts = with_supplier_names([top_by_parts])[0]
+
+    # Suppliers delivering above the average total quantity per supplier
+    total_quantity = counts['total_quantity'] or 0
+    average_quantity = total_quantity / suppliers_count if suppliers_count else 0
+    above_average = supplier_stats.filter(total_quantity__gt=average_quantity)
+
+    shown_parts = sum(s['part_count'] for s in top_suppliers)
+    shown_quantity = sum(s['total_quantity'] or 0 for s in top_suppliers)
+
+    # Most urgent first: largest shortfall below threshold
+    urgent_parts = _part_rows(
+        parts.annotate(shortfall=F('threshold') - F('quantity'))
+        .order_by('-shortfall', 'part_name')[:max(top_n, table_rows)]
+    )
+
+    return {
+        'kpis': {
+            'total_parts': total_parts,
+            'low_stock': low_stock_count,
+            'well_stocked': total_parts - low_stock_count,
+            'suppliers_count': suppliers_count,
+            'health_percentage': round((total_parts - low_stock_count) / total_parts * 100 if total_parts > 0 else 0, 1),
+        },
+        'critical': {
+            'count': counts['critical'],
+            'top': _part_rows(parts.filter(CRITICAL_Q).order_by('quantity', 'part_name')[:top_n]),
+        },
+        'overstocked': {
+            'count': counts['overstocked'],
+        },
+        'suppliers': {
+            'top': top_suppliers,
+            'other': {
+                'supplier_count': max(0, suppliers_count - len(top_suppliers)),
+                'part_count': total_parts - shown_parts,
+                'total_quantity': total_quantity - shown_quantity,
+            },
+            'top_by_parts': top_by_parts,
+            'above_average': {
+                'count': above_average.count(),
+                'names': [row['supplier'] for row in with_supplier_names(above_average.order_by('-total_quantity')[:2])],
+            },
+        },
+        'stock_chart': urgent_parts[:top_n],
+        'table': {
+            'rows': urgent_parts[:table_rows],
+            'total': total_parts,
+        },
+    }
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate, pre_migrate
 
 
 class InventoryAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventory_app'
+
+    def ready(self):
+        from .search import ensure_search_index, prepare_migrate
+        pre_migrate.connect(prepare_migrate, sender=self)
+        post_migrate.connect(ensure_search_index, sender=self)
@@ -0,0 +1,135 @@
+"""
+Sharded stock counters for hot parts
+
+A few consumables are used by many technicians at once. Every use/restock
+of a normal part rewrites its row (version check, rollups, fingerprint), so
+concurrent changes to the same part queue up behind each other and retry on
+version conflicts. Parts flagged SparePart.hot instead add each change to
+one of HOT_PART_COUNTER_SLOTS CounterShard rows, a blind increment that
+never conflicts. Low stock alerts are evaluated on the current stock, the
+row quantity plus the pending counts, after every change.
+
+fold_counters() moves the pending counts into SparePart.quantity and the
+supplier and inventory rollups; it runs every minute from cron and before
+any write that needs the exact row (sets, movement batches). Until then the
+rollups, exports and the admin parts table show the quantity as of the last
+fold.
+
+record_movement() floors a use at the stock it reads, but does not lock the
+part, which would serialize changes on the row again. Concurrent uses can
+therefore take more than is left; the fold clamps the quantity at 0 and
+records the excess as a correcting stock movement.
+"""
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import CounterShard, SparePart, StockMovement
+
+
+def pending_quantities(part_ids):
+    """
+    Counts not yet folded into the parts' quantity.
+
+    Args:
+        part_ids (iterable): Part ids
+
+    Returns:
+        dict: part id -> pending delta, for parts with pending counts
+    """
+    rows = (
+        CounterShard.objects.filter(part_id__in=part_ids).exclude(delta=0)
+        .values('part_id').annotate(pending=Sum('delta')).values_list('part_id', 'pending')
+    )
+    return {part_id: pending for part_id, pending in rows if pending}
+
+
+def apply_pending(parts):
+    """
+    Add the pending counts to the quantity of the hot parts, for display.
+
+    The instances must not be saved afterwards.
+
+    Args:
+        parts (list): SparePart instances
+
+    Returns:
+        list: The same parts
+    """
+    hot = [part.pk for part in parts if part.hot]
+    if hot:
+        pending = pending_quantities(hot)
+        for part in parts:
+            # Concurrent uses can overshoot until the fold clamps them
+            part.quantity = max(part.quantity + pending.get(part.pk, 0), 0)
+    return parts
+
+
+def record_movement(part, action, qty):
+    """
+    Use or restock a hot part by adding the change to one of its counters.
+
+    Args:
+        part (SparePart): Hot part; its quantity is set to the current stock
+            after the change
+        action (str): 'use' or 'restock'
+        qty (int): Non-negative amount
+
+    Returns:
+        int: Current stock before the change
+    """
+    with transaction.atomic():
+        quantity, pending = (
+            SparePart.objects.filter(pk=part.pk).annotate(pending=Coalesce(Sum('counter_shards__delta'), 0))
+            .values_list('quantity', 'pending').get()
+        )
+        # Unlocked read (see the module docstring): a concurrent use may not be counted yet
+        before = max(quantity + pending, 0)
+        after = max(before - qty, 0) if action == 'use' else before + qty
+        if after != before:
+            CounterShard.add(part.pk, after - before)
+            StockMovement.objects.create(part_id=part.pk, delta=after - before, quantity_after=after)
+    part.quantity = after
+    return before
+
+
+def fold_counters(part_ids=None):
+    """
+    Move the pending counts into SparePart.quantity and the rollups.
+
+    Folding bumps the version and updated_at of the folded parts, so delta
+    sync picks up their new quantity. A quantity that concurrent uses drove
+    below 0 is stored as 0, with a stock movement for the difference.
+
+    Args:
+        part_ids (iterable): Parts to fold, None for every part with pending counts
+
+    Returns:
+        int: Number of parts folded
+    """
+    with transaction.atomic():
+        if part_ids is None:
+            part_ids = set(CounterShard.objects.exclude(delta=0).values_list('part_id', flat=True))
+        else:
+            part_ids = set(part_ids)
+        # Lock the parts before their counters, like save() does
+        locked = dict(SparePart.objects.select_for_update().filter(pk__in=part_ids).values_list('id', 'quantity'))
+        pending = CounterShard.take(part_ids)
+        if not pending:
+            return 0
+
+        now = timezone.now()
+        corrections = []
+        for pk, quantity in locked.items():
+            if pk not in pending:
+                continue
+            folded = quantity + pending[pk]
+            if folded < 0:
+                corrections.append(StockMovement(part_id=pk, delta=-folded, quantity_after=0, created_at=now))
+            # fingerprint=None: the stored hash no longer matches (see SparePart.fingerprint)
+            # The queryset update applies the rollup delta
+            SparePart.objects.filter(pk=pk).update(
+                quantity=max(folded, 0), fingerprint=None, version=F('version') + 1, updated_at=now,
+            )
+        StockMovement.objects.bulk_create(corrections)
+    return len(pending)
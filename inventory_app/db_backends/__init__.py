@@ -0,0 +1 @@
+# custom database backends
@@ -0,0 +1,33 @@
+"""
+SQLite backend with connection-time pragmas and configurable transaction mode
+
+Extra DATABASES OPTIONS understood by this backend:
+    pragmas (dict): PRAGMA name -> value, applied once per new connection
+    transaction_mode (str): 'DEFERRED', 'IMMEDIATE' or 'EXCLUSIVE'
+
+With IMMEDIATE transactions a writer takes the write lock at BEGIN, so
+busy_timeout can make it wait instead of failing with "database is locked"
+when it later tries to upgrade a read lock.
+"""
+from django.db.backends.sqlite3 import base
+
+CUSTOM_OPTIONS = ('pragmas', 'transaction_mode')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        for option in CUSTOM_OPTIONS:
+            kwargs.pop(option, None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict['OPTIONS'].get('pragmas', {}).items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        self.cursor().execute(f'BEGIN {mode}' if mode else 'BEGIN')
@@ -0,0 +1,84 @@
+"""
+In-process publish/subscribe bus for live dashboard updates
+
+Writers publish small change events (KPI deltas from RollupDelta, saved
+alert logs) once their transaction commits; every open dashboard stream
+(views.dashboard_events) holds a subscription with a bounded queue on its
+event loop. One write therefore costs one event per open dashboard instead
+of one polling query per dashboard.
+
+The bus only reaches streams served by the same process. With several
+server processes, each dashboard still sees the writes made by its own
+process, and the heartbeat-bounded streams reconnect and resync their KPI
+snapshot regularly.
+"""
+import asyncio
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+
+class Subscription:
+    """Queue of events for one stream, filled from any thread"""
+
+    def __init__(self, bus, loop, maxsize):
+        self.bus = bus
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def push(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # Event loop closed without unsubscribing
+            self.bus.unsubscribe(self)
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Slow client: drop the backlog and have it reload its snapshot
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(('resync', {}))
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class EventBus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def subscribe(self):
+        """Subscribe the running event loop; call unsubscribe() when done"""
+        subscription = Subscription(self, asyncio.get_running_loop(), settings.EVENTS_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    def publish(self, event, data):
+        """Deliver an event to every subscriber now"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.push((event, data))
+
+    def publish_on_commit(self, event, data):
+        """Deliver an event once the current transaction commits (now outside one)"""
+        if not self.has_subscribers:
+            return
+        transaction.on_commit(lambda: self.publish(event, data))
+
+
+bus = EventBus()
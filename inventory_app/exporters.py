@@ -0,0 +1,212 @@
+"""
+Spare parts export formats
+
+Every exporter writes to a file-like object (an HttpResponse works). Heavy
+libraries are imported inside the exporter that needs them, so web workers,
+cron commands and manage.py only load them when an export of that format
+actually runs.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.utils import timezone
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+PARQUET_CONTENT_TYPE = 'application/vnd.apache.parquet'
+
+
+def pdf_canvas(fileobj):
+    """New reportlab canvas writing to fileobj"""
+    from reportlab.pdfgen import canvas
+    return canvas.Canvas(fileobj)
+
+
+def write_parts_csv(fileobj, parts):
+    """All part columns, one row per part"""
+    writer = csv.writer(fileobj)
+    writer.writerow(['Part Name', 'Quantity', 'Threshold', 'Supplier', 'Updated At'])
+    for p in parts:
+        writer.writerow([p.part_name, p.quantity, p.threshold, p.supplier_name, p.updated_at])
+
+
+EXPORT_CHUNK_ROWS = 1000
+
+
+def iter_part_changes_csv(parts, deleted):
+    """
+    CSV of changed and deleted parts, yielded in chunks for a streaming response.
+
+    Changed parts come first with Deleted empty, then one row per deleted
+    part id with only Id and Deleted set.
+
+    Args:
+        parts (iterable): Changed SparePart instances
+        deleted (list): Ids of deleted parts
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['Id', 'Part Name', 'Quantity', 'Threshold', 'Supplier', 'Updated At', 'Deleted'])
+    for n, p in enumerate(parts, 1):
+        writer.writerow([p.pk, p.part_name, p.quantity, p.threshold, p.supplier_name, p.updated_at, ''])
+        if n % EXPORT_CHUNK_ROWS == 0:
+            yield _drain(buffer)
+    for pk in deleted:
+        writer.writerow([pk, '', '', '', '', '', 'true'])
+    yield _drain(buffer)
+
+
+def iter_part_changes_json(parts, deleted, cursor):
+    """
+    JSON document {"cursor", "deleted", "parts"} yielded in chunks for a streaming response.
+
+    Args:
+        parts (iterable): Changed SparePart instances
+        deleted (list): Ids of deleted parts
+        cursor (str): Cursor for the next export
+    """
+    buffer = io.StringIO()
+    buffer.write(f'{{"cursor": {json.dumps(cursor)}, "deleted": {json.dumps(deleted)}, "parts": [')
+    for n, p in enumerate(parts):
+        if n:
+            buffer.write(',')
+        buffer.write('\n' + json.dumps({
+            'id': p.pk,
+            'part_name': p.part_name,
+            'quantity': p.quantity,
+            'threshold': p.threshold,
+            'supplier': p.supplier_name,
+            'updated_at': p.updated_at.isoformat(),
+            'version': p.version,
+        }))
+        if (n + 1) % EXPORT_CHUNK_ROWS == 0:
+            yield _drain(buffer)
+    buffer.write('\n]}\n')
+    yield _drain(buffer)
+
+
+def _drain(buffer):
+    """Contents of a StringIO, which is emptied"""
+    text = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return text
+
+
+def write_low_stock_csv(fileobj, parts):
+    """Columns: Part Name, Quantity, Threshold, Supplier"""
+    writer = csv.writer(fileobj)
+    writer.writerow(['Part Name', 'Quantity', 'Threshold', 'Supplier'])
+    for p in parts:
+        writer.writerow([p.part_name, p.quantity, p.threshold, p.supplier_name])
+
+
+def write_parts_pdf(fileobj, parts):
+    """One line per part, paged"""
+    p = pdf_canvas(fileobj)
+    p.setFont('Helvetica', 12)
+    y = 800
+    p.drawString(40, y, 'Spare Parts Report')
+    y -= 30
+    for part in parts:
+        line = f"{part.part_name} - Qty: {part.quantity} - Threshold: {part.threshold} - Supplier: {part.supplier_name}"
+        p.drawString(40, y, line)
+        y -= 20
+        if y < 50:
+            p.showPage()
+            y = 800
+    p.save()
+
+
+def write_parts_xlsx(fileobj, rows, title='Spare Parts'):
+    """
+    Write parts as a typed XLSX sheet with openpyxl's write-only workbook.
+
+    Rows are streamed into the sheet, so memory does not grow with the row
+    count. Quantity and Threshold are numeric cells and rows at or below
+    their threshold are highlighted by a conditional format, so the
+    highlight follows edits made in Excel.
+
+    Args:
+        fileobj: Writable, seekable binary file (a zip archive is written)
+        rows: Iterable of (part_name, quantity, threshold, supplier_name, updated_at)
+        title (str): Sheet title
+
+    Returns:
+        int: number of rows written
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.formatting.rule import FormulaRule
+    from openpyxl.styles import Font, PatternFill
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title)
+    for column, width in zip('ABCDE', (40, 12, 12, 30, 20)):
+        sheet.column_dimensions[column].width = width
+    sheet.freeze_panes = 'A2'
+
+    bold = Font(bold=True)
+    header = []
+    for label in ('Part Name', 'Quantity', 'Threshold', 'Supplier', 'Updated At'):
+        cell = WriteOnlyCell(sheet, value=label)
+        cell.font = bold
+        header.append(cell)
+    sheet.append(header)
+
+    updated_cell = WriteOnlyCell(sheet)
+    updated_cell.number_format = 'yyyy-mm-dd hh:mm'
+    tz = timezone.get_current_timezone()
+    count = 0
+    for part_name, quantity, threshold, supplier_name, updated_at in rows:
+        # Excel has no time zones: write local wall-clock time
+        updated_cell.value = timezone.localtime(updated_at, tz).replace(tzinfo=None) if updated_at else None
+        sheet.append([part_name, quantity, threshold, supplier_name or '', updated_cell])
+        count += 1
+
+    if count:
+        sheet.conditional_formatting.add(
+            f'A2:E{count + 1}',
+            FormulaRule(formula=['$B2<=$C2'], fill=PatternFill('solid', fgColor='F8D7DA'), font=Font(color='842029')),
+        )
+    workbook.save(fileobj)
+    return count
+
+
+def write_parts_parquet(fileobj, rows, row_group_size=None):
+    """
+    Write parts as a zstd-compressed Parquet file, one row group at a time.
+
+    Columns use the CSV header names, so the file can be imported again,
+    and are typed: Quantity and Threshold are int64, Updated At a UTC
+    timestamp, Supplier is null for parts without one.
+
+    Args:
+        fileobj: Writable binary file
+        rows: Iterable of (part_name, quantity, threshold, supplier_name, updated_at)
+        row_group_size (int): Rows per row group (default PARQUET_ROW_GROUP_SIZE)
+
+    Returns:
+        int: number of rows written
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    row_group_size = row_group_size or settings.PARQUET_ROW_GROUP_SIZE
+    schema = pa.schema([
+        ('Part Name', pa.string()),
+        ('Quantity', pa.int64()),
+        ('Threshold', pa.int64()),
+        ('Supplier', pa.string()),
+        ('Updated At', pa.timestamp('us', tz='UTC')),
+    ])
+    rows = iter(rows)
+    count = 0
+    with pq.ParquetWriter(fileobj, schema, compression='zstd') as writer:
+        for chunk in iter(lambda: list(islice(rows, row_group_size)), []):
+            columns = [pa.array(values, type=field.type) for values, field in zip(zip(*chunk), schema)]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema), row_group_size=row_group_size)
+            count += len(chunk)
+    return count
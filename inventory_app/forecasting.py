@@ -0,0 +1,241 @@
+"""
+Stock-out forecasting with days of cover per part
+
+Usage over the last FORECAST_WINDOW_DAYS days is loaded into flat NumPy
+arrays (part row, age in days, units used) and reduced per part with
+bincount, so the whole inventory is forecast in one vectorized pass:
+
+- avg_daily_usage: moving average over the window
+- smoothed_daily_usage: exponentially smoothed daily usage, recent days
+  weighted by FORECAST_SMOOTHING
+- days_of_cover: quantity / smoothed_daily_usage
+
+Parts without stock movements in the window fall back to the quantity drops
+between successive observations: alert snapshots (AlertLog) and the part's
+current quantity at updated_at.
+
+Rows are read straight from the cursor and timestamps converted as whole
+arrays; per-row ORM conversion and date truncation dominated the runtime
+at a million parts.
+"""
+from datetime import timedelta
+from itertools import islice
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, TextField
+from django.db.models.functions import Cast
+from django.utils import timezone
+from .models import AlertLog, SparePart, StockForecast, StockMovement
+
+SECONDS_PER_DAY = 86400.0
+
+# Cap for days of cover so stock-out dates stay representable
+MAX_COVER_DAYS = 36500
+
+
+def fetch_columns(queryset, dtypes):
+    """
+    Run a values_list queryset and return its columns as arrays.
+
+    Datetime columns (dtype None) become epoch seconds. On SQLite they are
+    selected as text (see timestamp_column) and NumPy parses them in one call.
+
+    Args:
+        queryset: values_list queryset
+        dtypes (list): NumPy dtype per column, None for datetimes
+
+    Returns:
+        list: one array per column
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    columns = list(zip(*rows)) if rows else [()] * len(dtypes)
+
+    arrays = []
+    for values, dtype in zip(columns, dtypes):
+        if dtype is not None:
+            arrays.append(np.array(values, dtype=dtype))
+        elif values and isinstance(values[0], str):
+            arrays.append(np.array(values, dtype='datetime64[us]').astype(np.int64) / 1e6)
+        else:
+            arrays.append(np.array([value.timestamp() for value in values], dtype=np.float64))
+    return arrays
+
+
+def timestamp_column(name):
+    """
+    Expression selecting a datetime column for fetch_columns.
+
+    Django selects expressions after plain fields, so it goes last in
+    values_list to keep the column order.
+
+    SQLite stores UTC timestamps as text; casting keeps the driver from
+    converting every value to a datetime object first.
+    """
+    if connection.vendor == 'sqlite':
+        return Cast(name, output_field=TextField())
+    return F(name)
+
+
+def load_parts():
+    """
+    Load every part as arrays sorted by id.
+
+    Returns:
+        tuple: (ids, quantities, updated_at) where updated_at is epoch seconds
+    """
+    rows = SparePart.objects.order_by('id').values_list('id', 'quantity', timestamp_column('updated_at'))
+    return tuple(fetch_columns(rows, [np.int64, np.float64, None]))
+
+
+def movement_rates(ids, now, window_days, alpha):
+    """
+    Moving average and exponentially smoothed daily usage from StockMovement.
+
+    Each movement is bucketed by its age in whole days before now and
+    weighted by alpha * (1 - alpha) ** age, normalized so a constant daily
+    usage is returned unchanged.
+
+    Returns:
+        tuple: (average, smoothed, has_movements) arrays aligned with ids
+    """
+    movements = StockMovement.objects.filter(
+        created_at__gte=now - timedelta(days=window_days), delta__lt=0,
+    ).values_list('part_id', 'delta', timestamp_column('created_at')).order_by()
+    part_ids, delta, created = fetch_columns(movements, [np.int64, np.float64, None])
+    n = len(ids)
+    if not len(part_ids) or not n:
+        return np.zeros(n), np.zeros(n), np.zeros(n, dtype=bool)
+
+    # Parts deleted since the movement was recorded are dropped
+    index = np.minimum(np.searchsorted(ids, part_ids), n - 1)
+    known = ids[index] == part_ids
+    index, created, used = index[known], created[known], -delta[known]
+
+    age = np.clip((now.timestamp() - created) // SECONDS_PER_DAY, 0, window_days - 1)
+    weights = alpha * (1 - alpha) ** age / (1 - (1 - alpha) ** window_days)
+
+    average = np.bincount(index, weights=used, minlength=n) / window_days
+    smoothed = np.bincount(index, weights=used * weights, minlength=n)
+    has_movements = np.bincount(index, minlength=n) > 0
+    return average, smoothed, has_movements
+
+
+def observation_rates(ids, quantities, updated, since, mask):
+    """
+    Daily usage from successive quantity observations for the parts in mask.
+
+    Usage is the sum of quantity drops between consecutive observations
+    divided by the time they span (at least one day).
+
+    Returns:
+        tuple: (rates, observed) arrays aligned with ids
+    """
+    n = len(ids)
+    alerts = AlertLog.objects.filter(alert_date__gte=since).values_list(
+        'spare_part_id', 'quantity_at_alert', timestamp_column('alert_date'),
+    ).order_by()
+    alert_ids, alert_quantities, alert_times = fetch_columns(alerts, [np.int64, np.float64, None])
+
+    alert_index = np.minimum(np.searchsorted(ids, alert_ids), n - 1)
+    keep = (ids[alert_index] == alert_ids) & mask[alert_index]
+    # Current quantity at updated_at is the latest observation of every part
+    current = np.flatnonzero(mask)
+    rows_index = np.concatenate([alert_index[keep], current])
+    times = np.concatenate([alert_times[keep], updated[current]])
+    observed_quantity = np.concatenate([alert_quantities[keep], quantities[current]])
+
+    order = np.lexsort((times, rows_index))
+    rows_index, times, observed_quantity = rows_index[order], times[order], observed_quantity[order]
+
+    same_part = rows_index[1:] == rows_index[:-1]
+    drops = np.where(same_part, np.clip(observed_quantity[:-1] - observed_quantity[1:], 0, None), 0)
+    used = np.bincount(rows_index[1:], weights=drops, minlength=n)
+
+    first = np.full(n, np.inf)
+    last = np.full(n, -np.inf)
+    np.minimum.at(first, rows_index, times)
+    np.maximum.at(last, rows_index, times)
+    span_days = np.maximum((last - first) / SECONDS_PER_DAY, 1.0)
+
+    observed = used > 0
+    rates = np.where(observed, used / np.where(np.isfinite(span_days), span_days, 1.0), 0.0)
+    return rates, observed
+
+
+def compute_forecasts(window_days=None, alpha=None):
+    """
+    Recompute StockForecast for every part.
+
+    Args:
+        window_days (int): Days of history to use (default FORECAST_WINDOW_DAYS)
+        alpha (float): Smoothing factor in (0, 1] (default FORECAST_SMOOTHING)
+
+    Returns:
+        dict: parts, from_movements, from_observations, running_out and seconds
+    """
+    window_days = window_days or settings.FORECAST_WINDOW_DAYS
+    alpha = alpha or settings.FORECAST_SMOOTHING
+    started = time.perf_counter()
+    now = timezone.now()
+    today = timezone.localdate(now)
+
+    ids, quantities, updated = load_parts()
+    if not len(ids):
+        StockForecast.objects.all().delete()
+        return {'parts': 0, 'from_movements': 0, 'from_observations': 0, 'running_out': 0,
+                'seconds': time.perf_counter() - started}
+
+    average, smoothed, has_movements = movement_rates(ids, now, window_days, alpha)
+
+    fallback = ~has_movements
+    observed_rates, observed = observation_rates(
+        ids, quantities, updated, now - timedelta(days=window_days), fallback,
+    )
+    from_observations = fallback & observed
+    average = np.where(from_observations, observed_rates, average)
+    smoothed = np.where(from_observations, observed_rates, smoothed)
+
+    has_usage = smoothed > 0
+    cover = np.where(has_usage, np.maximum(quantities, 0) / np.where(has_usage, smoothed, 1), np.nan)
+    cover = np.minimum(cover, MAX_COVER_DAYS)
+    stockout = np.datetime64(today, 'D') + np.nan_to_num(np.floor(cover)).astype('timedelta64[D]')
+
+    method = np.where(has_movements, 'MOVEMENTS', np.where(from_observations, 'OBSERVATIONS', 'NONE'))
+    _write_forecasts(ids, average, smoothed, cover, stockout, has_usage, method, now)
+
+    return {
+        'parts': len(ids),
+        'from_movements': int(has_movements.sum()),
+        'from_observations': int(from_observations.sum()),
+        'running_out': int((cover <= settings.FORECAST_ALERT_DAYS).sum()),
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def _write_forecasts(ids, average, smoothed, cover, stockout, has_usage, method, now):
+    """Replace the forecast table in one transaction with executemany"""
+    computed_at = connection.ops.adapt_datetimefield_value(now)
+    cover_values = [value if usage else None for value, usage in zip(cover.tolist(), has_usage.tolist())]
+    stockout_values = [str(value) if usage else None for value, usage in zip(stockout.tolist(), has_usage.tolist())]
+    rows = zip(
+        ids.tolist(), average.tolist(), smoothed.tolist(), cover_values, stockout_values,
+        method.tolist(), [computed_at] * len(ids),
+    )
+
+    table = connection.ops.quote_name(StockForecast._meta.db_table)
+    sql = (
+        f'INSERT INTO {table} (part_id, avg_daily_usage, smoothed_daily_usage, days_of_cover, '
+        f'stockout_date, method, computed_at) VALUES (%s, %s, %s, %s, %s, %s, %s)'
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table}')
+        batch = list(islice(rows, 50000))
+        while batch:
+            cursor.executemany(sql, batch)
+            batch = list(islice(rows, 50000))
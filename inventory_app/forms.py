@@ -1,19 +1,60 @@
 from django import forms
-from .models import SparePart
+from django.conf import settings
+from .counters import pending_quantities
+from .models import SparePart, Supplier, normalize_supplier_name
 import os
 
 
+def disable_hot_quantity(form):
+    """
+    Make the quantity of a hot part read-only in a part form.
+
+    Its stock changes are counted outside the row (see counters.py), so a
+    quantity posted from an edit form would overwrite the changes counted
+    while the form was open.
+    """
+    part = form.instance
+    current = max(part.quantity + pending_quantities([part.pk]).get(part.pk, 0), 0)
+    form.fields['quantity'].disabled = True
+    form.fields['quantity'].help_text = (
+        f'Hot part: {current} in stock including recent changes. '
+        f'Use, restock or set it from the technician dashboard.'
+    )
+
+
 class SparePartForm(forms.ModelForm):
+    # Free-text supplier name, resolved to a Supplier (created if new)
+    supplier = forms.CharField(
+        max_length=200,
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Enter supplier name'}),
+    )
+
     class Meta:
         model = SparePart
-        fields = ['part_name', 'quantity', 'threshold', 'supplier']
+        fields = ['part_name', 'quantity', 'threshold', 'supplier', 'version']
         widgets = {
+            # Version the form was rendered from, saving fails if the part changed since
+            'version': forms.HiddenInput(),
             'part_name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Enter part name'}),
             'quantity': forms.NumberInput(attrs={'class': 'form-control', 'placeholder': '0', 'min': '0'}),
             'threshold': forms.NumberInput(attrs={'class': 'form-control', 'placeholder': '0', 'min': '0'}),
-            'supplier': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Enter supplier name'}),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.supplier_id:
+            self.initial['supplier'] = self.instance.supplier.name
+        if self.instance.hot:
+            disable_hot_quantity(self)
+
+    def clean_supplier(self):
+        name = normalize_supplier_name(self.cleaned_data.get('supplier', ''))
+        if not name:
+            return None
+        supplier, _ = Supplier.objects.get_or_create(name=name)
+        return supplier
+
 
 class LoginRoleForm(forms.Form):
     username = forms.CharField(
@@ -33,10 +74,10 @@ class ImportSparePartsForm(forms.Form):
     file = forms.FileField(
         widget=forms.FileInput(attrs={
             'class': 'form-control',
-            'accept': '.csv,.xlsx,.xls,.json',
-            'help_text': 'Upload CSV, Excel, or JSON file with spare parts data'
+            'accept': '.csv,.xlsx,.xls,.json,.ndjson,.jsonl,.parquet',
+            'help_text': 'Upload CSV, Excel, JSON, NDJSON or Parquet file with spare parts data'
         }),
-        help_text='Supported formats: CSV (.csv), Excel (.xlsx, .xls), JSON (.json)'
+        help_text='Supported formats: CSV (.csv), Excel (.xlsx, .xls), JSON (.json), NDJSON (.ndjson, .jsonl), Parquet (.parquet)'
     )
     
     def clean_file(self):
@@ -44,17 +85,16 @@ class ImportSparePartsForm(forms.Form):
         if file:
             # Get file extension
             name, ext = os.path.splitext(file.name.lower())
-            valid_extensions = ['.csv', '.xlsx', '.xls', '.json']
+            valid_extensions = ['.csv', '.xlsx', '.xls', '.json', '.ndjson', '.jsonl', '.parquet']
             
             if ext not in valid_extensions:
                 raise forms.ValidationError(
                     f'Invalid file format. Please upload one of these formats: {", ".join(valid_extensions)}'
                 )
             
-            # Check file size (max 10MB for Excel files)
-            max_size = 10 * 1024 * 1024 if ext in ['.xlsx', '.xls'] else 5 * 1024 * 1024
-            if file.size > max_size:
-                max_mb = 10 if ext in ['.xlsx', '.xls'] else 5
+            # Check file size (Excel is loaded whole, text and Parquet files are streamed)
+            max_mb = 10 if ext in ['.xlsx', '.xls'] else settings.IMPORT_MAX_TEXT_FILE_MB
+            if file.size > max_mb * 1024 * 1024:
                 raise forms.ValidationError(f'File size must be less than {max_mb}MB.')
         
         return file
@@ -0,0 +1,683 @@
+"""
+Spare parts import pipeline: file parsing, column mapping, row normalization
+and batched upserts. Used by the background import job runner.
+
+Large delimited and NDJSON files are split into byte ranges on line
+boundaries and parsed/normalized in a process pool; JSON documents are read
+incrementally and their records normalized in slices the same way. Parsed chunks are merged back in file order and upserted by a
+single writer, so SQLite only ever sees one writing connection.
+
+Parquet files are read one row group per task, and only the columns that
+map to part fields are decoded.
+"""
+import csv
+import json
+import logging
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+from itertools import chain, islice
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from . import spool
+from .counters import pending_quantities
+from .jsonstream import JSONStreamReader, NoRecordArray
+from .models import CounterShard, RollupDelta, SparePart, StockMovement, Supplier, normalize_supplier_name
+from .parallel import ordered_imap
+from .services import AlertService
+
+logger = logging.getLogger(__name__)
+
+# Normalize column names (case-insensitive matching with multiple variations)
+EXPECTED_COLUMNS = {
+    'part name': ['part name', 'partname', 'part', 'name', 'item', 'product'],
+    'quantity': ['quantity', 'qty', 'stock', 'amount', 'count'],
+    'threshold': ['threshold', 'min', 'minimum', 'reorder', 'reorder point', 'min stock'],
+    'supplier': ['supplier', 'vendor', 'manufacturer', 'source']
+}
+
+# Part name and quantity are essential, threshold and supplier are optional
+REQUIRED_COLUMNS = ['part name', 'quantity']
+
+DEFAULT_THRESHOLD = 10
+
+SUPPORTED_EXTENSIONS = ['.csv', '.xlsx', '.xls', '.xlsm', '.json', '.ndjson', '.jsonl', '.txt', '.parquet']
+
+# Newline-delimited JSON: one object per line
+NDJSON_EXTENSIONS = ['.ndjson', '.jsonl']
+
+PARQUET_EXTENSIONS = ['.parquet']
+
+JSON_FORMAT_ERROR = 'JSON format not recognized. Expected array of objects or object with "parts"/"data" array.'
+
+# Delimited text formats: extension -> (delimiter, fallback delimiter)
+DELIMITED_FORMATS = {
+    '.csv': (',', ';'),
+    '.txt': ('\t', '|'),
+}
+
+
+class ImportFormatError(Exception):
+    """Raised when an uploaded file cannot be interpreted as spare parts data"""
+
+
+def read_rows(path, ext):
+    """
+    Parse a whole Excel import file into a list of row dictionaries.
+    Text formats are streamed in chunks, see _plan_chunks().
+
+    Args:
+        path (str): Path of the uploaded file on disk
+        ext (str): Lower-case file extension including the dot
+
+    Returns:
+        list: One dict per data row, keyed by the file's column names
+    """
+    if ext in ['.xlsx', '.xls', '.xlsm']:
+        # Handle Excel files using pandas, imported here so only Excel imports load it
+        import pandas as pd
+        try:
+            df = pd.read_excel(path, engine='openpyxl' if ext in ['.xlsx', '.xlsm'] else 'xlrd')
+        except Exception:
+            # Try without specifying engine
+            df = pd.read_excel(path)
+        return df.to_dict('records')
+
+    raise ImportFormatError(
+        f'Unsupported file format: {ext}. Supported formats: CSV, Excel (.xlsx, .xls), JSON, NDJSON, TXT, Parquet'
+    )
+
+
+def iter_json_records(path):
+    """
+    Stream records from a JSON document without loading it whole.
+
+    Yields:
+        tuple: (record, bytes read so far)
+
+    Raises:
+        ImportFormatError: If there is no array of records
+        json.JSONDecodeError: If the document is malformed
+    """
+    with open(path, 'rb') as f:
+        reader = JSONStreamReader(f)
+        try:
+            for record in reader.iter_records():
+                yield record, reader.bytes_read()
+        except NoRecordArray:
+            raise ImportFormatError(JSON_FORMAT_ERROR)
+
+
+def map_columns(first_row):
+    """
+    Map expected fields to the file's actual column names.
+
+    Args:
+        first_row (dict): First parsed row of the file
+
+    Returns:
+        dict: Expected field name -> actual column name
+
+    Raises:
+        ImportFormatError: If a required column is missing
+    """
+    actual_columns = {str(col).lower().strip(): col for col in first_row.keys()}
+
+    column_mapping = {}
+    missing_columns = []
+    for field, variations in EXPECTED_COLUMNS.items():
+        for variation in variations:
+            if variation in actual_columns:
+                column_mapping[field] = actual_columns[variation]
+                break
+        else:
+            if field in REQUIRED_COLUMNS:
+                missing_columns.append(field)
+
+    if missing_columns:
+        available_cols = list(first_row.keys())
+        raise ImportFormatError(
+            f'Missing required columns: {", ".join(missing_columns)}. '
+            f'Available columns: {", ".join(str(col) for col in available_cols)}. '
+            f'Required: Part Name, Quantity. Optional: Threshold, Supplier.'
+        )
+    return column_mapping
+
+
+def normalize_row(row, column_mapping):
+    """
+    Clean one raw row into typed values.
+
+    Args:
+        row (dict): Raw row from the parsed file
+        column_mapping (dict): Result of map_columns()
+
+    Returns:
+        tuple or None: (part_name, quantity, threshold, supplier), or None for an empty row
+
+    Raises:
+        ValueError: If quantity/threshold are not valid non-negative numbers
+    """
+    part_name = str(row.get(column_mapping.get('part name', 'part name'), '')).strip()
+    quantity_raw = row.get(column_mapping.get('quantity', 'quantity'), 0)
+    threshold_raw = row.get(column_mapping.get('threshold', 'threshold'), DEFAULT_THRESHOLD)
+    supplier_raw = row.get(column_mapping.get('supplier', 'supplier'), '')
+
+    # Skip empty rows
+    if not part_name or part_name.lower() in ['', 'nan', 'none', 'null']:
+        return None
+
+    # Convert to integers, handling pandas NaN and various formats
+    try:
+        quantity = _to_int(quantity_raw, 0)
+        threshold = _to_int(threshold_raw, DEFAULT_THRESHOLD)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f'Invalid number format - {str(e)}')
+
+    if quantity < 0 or threshold < 0:
+        raise ValueError('Quantity and threshold must be non-negative')
+
+    supplier = normalize_supplier_name(str(supplier_raw)) if supplier_raw and not _is_missing(supplier_raw) else ''
+    if supplier.lower() in ['nan', 'none', 'null']:
+        supplier = ''
+
+    return part_name, quantity, threshold, supplier
+
+
+def _is_missing(value):
+    """
+    pd.isna() for a single cell without importing pandas.
+
+    Only Excel rows, which are read with pandas, can hold NaT or pd.NA, so
+    pandas is consulted only when it is already loaded.
+    """
+    if value is None:
+        return True
+    pandas = sys.modules.get('pandas')
+    if pandas is not None:
+        return bool(pandas.isna(value))
+    return isinstance(value, float) and math.isnan(value)
+
+
+def _to_int(value, default):
+    if value is None or value == '' or _is_missing(value):
+        return default
+    # Remove commas and convert
+    return int(float(str(value).replace(',', '').strip()))
+
+
+def upsert_batch(rows):
+    """
+    Create or update a batch of normalized rows, skipping unchanged ones.
+
+    Supplier names are resolved to ids once per batch, creating any new
+    suppliers. Existing parts are looked up by name in one narrow query that
+    returns their stored fingerprints. A row whose fingerprint matches is
+    counted as unchanged and not written; new parts are inserted with
+    bulk_create and changed parts written with bulk_update. A part name
+    repeated in the batch is applied in order, so the last row wins.
+
+    Args:
+        rows (list): (part_name, quantity, threshold, supplier) tuples
+
+    Returns:
+        tuple: (created_count, updated_count, unchanged_count, parts) where
+            parts are the SparePart instances created or changed by the batch
+    """
+    supplier_ids = Supplier.resolve_names(row[3] for row in rows)
+    suppliers = {name: Supplier(pk=pk, name=name) for name, pk in supplier_ids.items()}
+
+    names = {row[0] for row in rows}
+    # name -> [id, supplier_id, fingerprint]; lowest id wins when a name is duplicated
+    current = {}
+    # name -> (supplier_id, quantity, threshold) before this batch, for stock movements
+    stored = {}
+    hot = {}
+    existing = (
+        SparePart.objects.filter(part_name__in=names)
+        .order_by('-id')
+        .values_list('part_name', 'id', 'supplier_id', 'quantity', 'threshold', 'fingerprint', 'hot')
+    )
+    for part_name, part_id, supplier_id, quantity, threshold, fingerprint, is_hot in existing:
+        current[part_name] = [part_id, supplier_id, fingerprint]
+        stored[part_name] = (supplier_id, quantity, threshold)
+        if is_hot:
+            hot[part_id] = part_name
+    # The stock of a hot part includes counts not yet folded in: a row matching
+    # only the stored quantity still changes it, so it is never skipped
+    for part_id, extra in pending_quantities(list(hot)).items():
+        part_name = hot[part_id]
+        # Duplicated names: only the part the rows apply to
+        if current[part_name][0] == part_id:
+            current[part_name][2] = None
+            supplier_id, quantity, threshold = stored[part_name]
+            stored[part_name] = (supplier_id, quantity + extra, threshold)
+
+    now = timezone.now()
+    to_create = {}
+    to_update = {}
+    created_count = 0
+    updated_count = 0
+    unchanged_count = 0
+
+    for part_name, quantity, threshold, supplier_name in rows:
+        supplier = suppliers.get(supplier_name)
+        state = current.get(part_name)
+        if state is None and part_name not in to_create:
+            part = SparePart(part_name=part_name, quantity=quantity, threshold=threshold, supplier=supplier)
+            part.fingerprint = part.compute_fingerprint()
+            to_create[part_name] = part
+            created_count += 1
+            continue
+
+        if state is None:
+            # Repeated name for a part created earlier in this batch
+            part = to_create[part_name]
+            part.quantity, part.threshold = quantity, threshold
+            if supplier:
+                part.supplier = supplier
+            part.fingerprint = part.compute_fingerprint()
+            updated_count += 1
+            continue
+
+        part_id, stored_supplier_id, stored_fingerprint = state
+        part = SparePart(pk=part_id, part_name=part_name, quantity=quantity, threshold=threshold, updated_at=now)
+        # Only update supplier if provided
+        if supplier:
+            part.supplier = supplier
+        else:
+            part.supplier_id = stored_supplier_id
+        part.fingerprint = part.compute_fingerprint()
+        if part.fingerprint == stored_fingerprint:
+            unchanged_count += 1
+            continue
+
+        # Bumped in the UPDATE itself, open edit forms then see a stale version
+        part.version = F('version') + 1
+        to_update[part_name] = part
+        state[1:] = [part.supplier_id, part.fingerprint]
+        updated_count += 1
+
+    # bulk_create bypasses the rollups; bulk_update keeps them in step itself
+    delta = RollupDelta()
+    for part in to_create.values():
+        delta.add(part.supplier_id, part.quantity, part.threshold)
+
+    movements = [
+        StockMovement(part_id=part.pk, delta=part.quantity - stored[name][1], quantity_after=part.quantity, created_at=now)
+        for name, part in to_update.items()
+        if part.quantity != stored[name][1]
+    ]
+
+    with transaction.atomic():
+        created = SparePart.objects.bulk_create(to_create.values())
+        SparePart.objects.bulk_update(
+            to_update.values(), ['quantity', 'threshold', 'supplier', 'fingerprint', 'updated_at', 'version'],
+        )
+        StockMovement.objects.bulk_create(movements)
+        delta.apply()
+        # The imported quantity replaces the counts of hot parts not yet folded in
+        # and the spooled changes; unchanged rows are not written and keep both
+        written = [part.pk for part in to_update.values()]
+        CounterShard.take(written)
+        spool.discard(written)
+
+    return created_count, updated_count, unchanged_count, list(created) + list(to_update.values())
+
+
+def split_byte_ranges(path, start, chunk_bytes):
+    """
+    Split a file from `start` to EOF into byte ranges ending on newlines.
+
+    A newline byte never occurs inside a multi-byte UTF-8 sequence, so every
+    range can be decoded on its own. Quoted fields spanning lines must not
+    straddle a boundary; files below IMPORT_PARALLEL_MIN_BYTES are parsed as
+    a single range.
+
+    Returns:
+        list: (start, end) byte offsets
+    """
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, 'rb') as f:
+        while start < size:
+            end = min(start + chunk_bytes, size)
+            if end < size:
+                f.seek(end)
+                f.readline()  # Extend to the end of the current line
+                end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def read_delimited_header(path, ext):
+    """
+    Read the header line of a CSV/TXT file.
+
+    Returns:
+        tuple: (fieldnames, delimiter, data_start_offset)
+    """
+    delimiter, fallback = DELIMITED_FORMATS[ext]
+    with open(path, 'rb') as f:
+        header_line = f.readline()
+        data_start = f.tell()
+    header_text = _decode_bytes(header_line).lstrip('\ufeff')
+    if delimiter not in header_text and fallback in header_text:
+        delimiter = fallback
+    fieldnames = next(csv.reader([header_text], delimiter=delimiter), [])
+    return fieldnames, delimiter, data_start
+
+
+def parse_delimited_chunk(task):
+    """
+    Parse and normalize one byte range of a delimited file (runs in a worker process).
+
+    Args:
+        task (tuple): (path, start, end, fieldnames, delimiter, column_mapping)
+
+    Returns:
+        dict: Chunk result, see _normalize_records()
+    """
+    path, start, end, fieldnames, delimiter, column_mapping = task
+    with open(path, 'rb') as f:
+        f.seek(start)
+        text = _decode_bytes(f.read(end - start))
+    reader = csv.DictReader(StringIO(text), fieldnames=fieldnames, delimiter=delimiter)
+    result = _normalize_records(reader, column_mapping)
+    result['bytes_end'] = end
+    return result
+
+
+def parse_ndjson_chunk(task):
+    """
+    Parse and normalize one byte range of an NDJSON file (runs in a worker process).
+
+    Every line counts as a record so row numbers match line numbers; blank
+    lines are skipped and malformed lines are reported as row errors.
+
+    Args:
+        task (tuple): (path, start, end, column_mapping)
+    """
+    path, start, end, column_mapping = task
+    with open(path, 'rb') as f:
+        f.seek(start)
+        lines = _decode_bytes(f.read(end - start)).splitlines()
+
+    records = []
+    bad_lines = {}
+    for local_index, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            records.append({})
+            continue
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            records.append(None)
+            bad_lines[local_index] = f'Invalid JSON - {str(e)}'
+
+    result = _normalize_records(records, column_mapping, bad_lines)
+    result['bytes_end'] = end
+    return result
+
+
+def parse_parquet_chunk(task):
+    """
+    Read and normalize one Parquet row group (runs in a worker process).
+
+    Args:
+        task (tuple): (path, row_group, column_mapping)
+    """
+    import pyarrow.parquet as pq
+
+    path, row_group, column_mapping = task
+    table = pq.ParquetFile(path).read_row_group(row_group, columns=sorted(set(column_mapping.values())))
+    result = _normalize_records(table.to_pylist(), column_mapping)
+    result['bytes_end'] = None
+    return result
+
+
+def normalize_records_chunk(task):
+    """
+    Normalize a slice of already-parsed records (runs in a worker process).
+
+    Args:
+        task (tuple): (records, column_mapping, bytes_end) where bytes_end is
+            the file offset reached when the slice was read, or None
+    """
+    records, column_mapping, bytes_end = task
+    result = _normalize_records(records, column_mapping)
+    result['bytes_end'] = bytes_end
+    return result
+
+
+def _normalize_records(records, column_mapping, bad_records=None):
+    """
+    Normalize rows, keeping row indexes local to the chunk.
+
+    Args:
+        records (iterable): Row dicts
+        column_mapping (dict): Result of map_columns()
+        bad_records (dict): Optional local_index -> error for rows that failed to parse
+
+    Returns:
+        dict: record_count, rows [(local_index, normalized tuple)],
+            errors [(local_index, message)] and skipped count
+    """
+    rows = []
+    errors = []
+    skipped = 0
+    record_count = 0
+    for local_index, row in enumerate(records):
+        record_count += 1
+        if bad_records and local_index in bad_records:
+            errors.append((local_index, bad_records[local_index]))
+            continue
+        if not isinstance(row, dict):
+            errors.append((local_index, 'Error - expected an object'))
+            continue
+        try:
+            normalized = normalize_row(row, column_mapping)
+        except ValueError as e:
+            errors.append((local_index, str(e)))
+            continue
+        if normalized is None:
+            skipped += 1
+            continue
+        rows.append((local_index, normalized))
+    return {'record_count': record_count, 'rows': rows, 'errors': errors, 'skipped': skipped}
+
+
+def _decode_bytes(raw):
+    try:
+        return raw.decode('utf-8')
+    except UnicodeDecodeError:
+        return raw.decode('latin-1')
+
+
+def _plan_chunks(path, ext):
+    """
+    Work out how a file is split for parsing.
+
+    Returns:
+        tuple: (parse function, lazy task iterable, file size for byte-based
+            progress or None, total row count when known up front or None,
+            row number of the first record)
+    """
+    chunk_bytes = settings.IMPORT_CHUNK_BYTES
+    size = os.path.getsize(path)
+    # Aim for record slices roughly as large as a byte chunk of CSV (~50 bytes per row)
+    slice_rows = max(1000, chunk_bytes // 50)
+
+    if ext in DELIMITED_FORMATS:
+        fieldnames, delimiter, data_start = read_delimited_header(path, ext)
+        if not fieldnames:
+            return parse_delimited_chunk, [], None, 0, 2
+        column_mapping = map_columns({name: None for name in fieldnames})
+        tasks = (
+            (path, start, end, fieldnames, delimiter, column_mapping)
+            for start, end in _byte_ranges(path, data_start, size, chunk_bytes)
+        )
+        return parse_delimited_chunk, tasks, size, None, 2  # Row 1 is the header
+
+    if ext in NDJSON_EXTENSIONS:
+        first_record = _first_ndjson_record(path)
+        if first_record is None:
+            return parse_ndjson_chunk, [], None, 0, 1
+        column_mapping = map_columns(first_record)
+        tasks = (
+            (path, start, end, column_mapping)
+            for start, end in _byte_ranges(path, 0, size, chunk_bytes)
+        )
+        return parse_ndjson_chunk, tasks, size, None, 1
+
+    if ext == '.json':
+        records = iter_json_records(path)
+        first = next(records, None)
+        if first is None:
+            return normalize_records_chunk, [], None, 0, 2
+        if not isinstance(first[0], dict):
+            raise ImportFormatError(JSON_FORMAT_ERROR)
+        column_mapping = map_columns(first[0])
+        records = chain([first], records)
+        tasks = (
+            ([record for record, _ in pairs], column_mapping, pairs[-1][1])
+            for pairs in iter(lambda: list(islice(records, slice_rows)), [])
+        )
+        return normalize_records_chunk, tasks, size, None, 2
+
+    if ext in PARQUET_EXTENSIONS:
+        import pyarrow.parquet as pq
+        try:
+            metadata = pq.read_metadata(path)
+        except Exception as e:
+            raise ImportFormatError(f'Not a valid Parquet file: {e}')
+        if not metadata.num_rows:
+            return parse_parquet_chunk, [], None, 0, 1
+        column_mapping = map_columns({name: None for name in metadata.schema.names})
+        tasks = ((path, row_group, column_mapping) for row_group in range(metadata.num_row_groups))
+        return parse_parquet_chunk, tasks, None, metadata.num_rows, 1
+
+    data_rows = read_rows(path, ext)
+    if not data_rows:
+        return normalize_records_chunk, [], None, 0, 2
+    column_mapping = map_columns(data_rows[0])
+    tasks = [
+        (data_rows[start:start + slice_rows], column_mapping, None)
+        for start in range(0, len(data_rows), slice_rows)
+    ]
+    return normalize_records_chunk, tasks, None, len(data_rows), 2
+
+
+def _byte_ranges(path, start, size, chunk_bytes):
+    """Whole-file range for small files, newline-aligned chunks above IMPORT_PARALLEL_MIN_BYTES"""
+    if size < settings.IMPORT_PARALLEL_MIN_BYTES:
+        return [(start, size)] if start < size else []
+    return split_byte_ranges(path, start, chunk_bytes)
+
+
+def _first_ndjson_record(path):
+    with open(path, 'rb') as f:
+        for line in f:
+            line = _decode_bytes(line).strip()
+            if line:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    raise ImportFormatError('The first line of the NDJSON file is not valid JSON.')
+                if not isinstance(record, dict):
+                    raise ImportFormatError('NDJSON lines must be JSON objects.')
+                return record
+    return None
+
+
+def run_import(path, ext, batch_size=1000, progress=None, workers=None, max_errors=100):
+    """
+    Import a spare parts file in batches.
+
+    Args:
+        path (str): Path of the file on disk
+        ext (str): Lower-case file extension including the dot
+        batch_size (int): Rows per upsert transaction
+        progress (callable): Optional callback receiving the result dict after each batch
+        workers (int): Parser processes, defaults to settings.IMPORT_PARSE_WORKERS
+        max_errors (int): Row error messages kept in errors, error_count counts them all
+
+    Returns:
+        dict: total_rows, rows_processed, created, updated, unchanged, skipped,
+            errors (the first max_errors messages) and error_count
+
+    Raises:
+        ImportFormatError: If the file cannot be parsed or lacks required columns
+    """
+    result = {
+        'total_rows': None,
+        'rows_processed': 0,
+        'created': 0,
+        'updated': 0,
+        'unchanged': 0,
+        'skipped': 0,
+        'errors': [],
+        'error_count': 0,
+    }
+    parse_fn, tasks, size, result['total_rows'], first_row_number = _plan_chunks(path, ext)
+
+    workers = workers or settings.IMPORT_PARSE_WORKERS
+    parallel = size is None or size >= settings.IMPORT_PARALLEL_MIN_BYTES
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 and parallel else None
+    chunks = ordered_imap(pool, parse_fn, tasks, workers * 2) if pool else map(parse_fn, tasks)
+
+    batch = []
+    record_offset = 0
+    try:
+        for chunk in chunks:
+            # A malformed file can have an error on every row, only the first ones are kept
+            for local_index, message in chunk['errors'][:max_errors - len(result['errors'])]:
+                row_number = record_offset + local_index + first_row_number
+                result['errors'].append(f'Row {row_number}: {message}')
+            result['error_count'] += len(chunk['errors'])
+            result['skipped'] += chunk['skipped']
+            record_offset += chunk['record_count']
+
+            for local_index, normalized in chunk['rows']:
+                batch.append(normalized)
+                if len(batch) >= batch_size:
+                    _write_batch(batch, result)
+                    batch = []
+
+            result['rows_processed'] = record_offset
+            if size and chunk['bytes_end']:
+                # Estimate the row total from the share of bytes parsed so far
+                result['total_rows'] = max(record_offset, int(record_offset * size / chunk['bytes_end']))
+            if progress:
+                progress(result)
+
+        if batch:
+            _write_batch(batch, result)
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+
+    result['total_rows'] = record_offset
+    result['rows_processed'] = record_offset
+    if progress:
+        progress(result)
+    return result
+
+
+def _write_batch(batch, result):
+    """Upsert one batch and evaluate low stock alerts for the parts it changed"""
+    created, updated, unchanged, parts = upsert_batch(batch)
+    result['created'] += created
+    result['updated'] += updated
+    result['unchanged'] += unchanged
+    for part in parts:
+        try:
+            AlertService.check_and_send_alert(part)
+        except Exception as e:
+            logger.error(f'Alert check failed for {part.part_name}: {str(e)}')
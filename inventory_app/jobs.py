@@ -0,0 +1,214 @@
+"""
+Background job runner for spare parts imports
+
+Jobs are rows in the ImportJob table. The run_import_worker management
+command claims queued jobs and runs them in a process pool; run_import_job
+is the entry point executed inside each worker process.
+"""
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Row errors kept on the job; the total count is always reported
+MAX_STORED_ERRORS = 100
+
+
+def init_worker():
+    """
+    Process pool initializer.
+
+    Sets up Django when the pool uses the spawn start method (Windows) and
+    drops any database connection inherited from the parent on fork.
+    """
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventory_monitor.settings')
+        django.setup()
+
+    from django.db import connections
+    for conn in connections.all():
+        conn.close()
+
+
+def enqueue_import(uploaded_file, user=None):
+    """
+    Save an uploaded file to the import directory and queue a job for it.
+
+    Args:
+        uploaded_file (UploadedFile): File from request.FILES
+        user (User): User who uploaded the file
+
+    Returns:
+        ImportJob: The queued job
+    """
+    import uuid
+    from django.conf import settings
+    from .models import ImportJob
+
+    upload_dir = settings.IMPORT_UPLOAD_DIR
+    os.makedirs(upload_dir, exist_ok=True)
+    name, ext = os.path.splitext(uploaded_file.name.lower())
+    file_path = os.path.join(upload_dir, f'{uuid.uuid4().hex}{ext}')
+
+    with open(file_path, 'wb') as destination:
+        for chunk in uploaded_file.chunks():
+            destination.write(chunk)
+
+    return ImportJob.objects.create(
+        file_path=file_path,
+        original_name=uploaded_file.name,
+        created_by=user if user and user.is_authenticated else None,
+    )
+
+
+def claim_jobs(limit):
+    """
+    Atomically move up to `limit` queued jobs to RUNNING.
+
+    The conditional update makes it safe to run several worker commands
+    against the same database.
+
+    Returns:
+        list: Ids of the claimed jobs
+    """
+    from django.utils import timezone
+    from .models import ImportJob
+
+    claimed = []
+    if limit <= 0:
+        return claimed
+    candidates = ImportJob.objects.filter(status='QUEUED').order_by('created_at').values_list('id', flat=True)[:limit]
+    for job_id in list(candidates):
+        now = timezone.now()
+        claim = ImportJob.objects.filter(pk=job_id, status='QUEUED')
+        if claim.update(status='RUNNING', started_at=now, heartbeat_at=now):
+            claimed.append(job_id)
+    return claimed
+
+
+def fail_stale_jobs():
+    """
+    Fail RUNNING jobs whose worker stopped reporting progress.
+
+    A job is stale when its heartbeat is older than IMPORT_JOB_STALE_SECONDS,
+    which happens when the worker command or its process died mid-import.
+    Stale jobs are failed rather than requeued, so a file that kills the
+    worker is not retried forever; the user can upload it again.
+
+    Returns:
+        list: Ids of the failed jobs
+    """
+    from datetime import timedelta
+    from django.conf import settings
+    from django.db.models import Q
+    from django.utils import timezone
+    from .models import ImportJob
+
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.IMPORT_JOB_STALE_SECONDS)
+    # Jobs claimed before heartbeats were recorded only have started_at
+    is_stale = Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    stale = list(ImportJob.objects.filter(is_stale, status='RUNNING').values_list('id', 'file_path'))
+    failed = []
+    for job_id, file_path in stale:
+        # Conditional on the heartbeat, in case the job reported progress meanwhile
+        if ImportJob.objects.filter(is_stale, pk=job_id, status='RUNNING').update(
+            status='FAILED', finished_at=now,
+            error_message='The import worker stopped while processing this file, please upload it again',
+        ):
+            failed.append(job_id)
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
+    return failed
+
+
+def run_import_job(job_id):
+    """
+    Process one claimed import job, recording progress on the job row.
+
+    Args:
+        job_id (int): Primary key of a RUNNING ImportJob
+
+    Returns:
+        str: Final job status
+    """
+    from django.conf import settings
+    from django.db import connection
+    from django.utils import timezone
+    from .importer import ImportFormatError, run_import
+    from .models import ImportJob
+
+    job = ImportJob.objects.get(pk=job_id)
+    name, ext = os.path.splitext(job.file_path.lower())
+
+    def report(result):
+        ImportJob.objects.filter(pk=job_id).update(
+            total_rows=result['total_rows'],
+            rows_processed=result['rows_processed'],
+            created_count=result['created'],
+            updated_count=result['updated'],
+            unchanged_count=result['unchanged'],
+            skipped_count=result['skipped'],
+            errors=json.dumps(result['errors'] + _overflow(result)),
+            error_count=result['error_count'],
+            heartbeat_at=timezone.now(),
+        )
+
+    try:
+        result = run_import(
+            job.file_path, ext, batch_size=settings.IMPORT_BATCH_SIZE, progress=report, max_errors=MAX_STORED_ERRORS,
+        )
+        report(result)
+        status, error_message = 'COMPLETED', ''
+    except ImportFormatError as e:
+        status, error_message = 'FAILED', str(e)
+    except json.JSONDecodeError as e:
+        status, error_message = 'FAILED', f'Invalid JSON format: {str(e)}'
+    except Exception as e:
+        logger.exception(f'Import job {job_id} failed')
+        status, error_message = 'FAILED', f'Error processing file: {str(e)}'
+    finally:
+        try:
+            os.remove(job.file_path)
+        except OSError:
+            pass
+
+    ImportJob.objects.filter(pk=job_id).update(
+        status=status, error_message=error_message, finished_at=timezone.now(),
+    )
+    connection.close()
+    logger.info(f'Import job {job_id} finished with status {status}')
+    return status
+
+
+def _overflow(result):
+    if result['error_count'] > len(result['errors']):
+        return [f"... and {result['error_count'] - len(result['errors'])} more."]
+    return []
+
+
+def job_progress(job):
+    """JSON-serializable progress snapshot for an ImportJob"""
+    errors = json.loads(job.errors) if job.errors else []
+    return {
+        'id': job.pk,
+        'file': job.original_name,
+        'status': job.status,
+        'finished': job.is_finished(),
+        'total_rows': job.total_rows,
+        'rows_processed': job.rows_processed,
+        'created': job.created_count,
+        'updated': job.updated_count,
+        'unchanged': job.unchanged_count,
+        'skipped': job.skipped_count,
+        'throughput': job.throughput(),
+        'error_count': job.error_count,
+        'errors': errors,
+        'error_message': job.error_message,
+    }
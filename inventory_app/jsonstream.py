@@ -0,0 +1,145 @@
+"""
+Incremental JSON reader for spare parts imports
+
+Streams the objects of a top-level array, or of the "parts"/"data" array of
+a top-level object, one at a time. Only the current element is held in
+memory, so large exports import with bounded memory.
+"""
+import codecs
+import json
+
+WHITESPACE = ' \t\n\r'
+
+# Keys of a wrapper object whose array holds the rows; the first one found wins
+RECORD_KEYS = ('parts', 'data')
+
+# Longest single value (one record) read into the buffer, in characters
+MAX_VALUE_CHARS = 16 * 1024 * 1024
+
+# A value cut off by the buffer end fails (or, for a number like '1.' or
+# '1e', stops) within this many characters of it: 'fals', '\\u00'
+TRUNCATED_TAIL = 8
+
+
+class NoRecordArray(Exception):
+    """The document is valid JSON but has no array of records to import"""
+
+
+class JSONStreamReader:
+    """
+    Pull-style reader over a binary file holding one JSON document.
+
+    Values are decoded with json.JSONDecoder.raw_decode from a sliding text
+    buffer that is refilled as needed.
+    """
+
+    def __init__(self, binary_file, chunk_size=64 * 1024):
+        self.raw = binary_file
+        self.text = codecs.getreader('utf-8')(binary_file)
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def bytes_read(self):
+        """Bytes consumed from the underlying file so far (for progress)"""
+        return self.raw.tell()
+
+    def iter_records(self):
+        """
+        Yield each element of the record array.
+
+        Raises:
+            json.JSONDecodeError: If the document is malformed
+            NoRecordArray: If there is no root array or "parts"/"data" array
+        """
+        first = self._peek()
+        if first == '[':
+            yield from self._iter_array()
+            return
+        if first != '{':
+            raise NoRecordArray()
+
+        self.pos += 1
+        while True:
+            char = self._peek()
+            if char == '}':
+                raise NoRecordArray()
+            key = self._decode_value()
+            self._expect(':')
+            if key in RECORD_KEYS and self._peek() == '[':
+                yield from self._iter_array()
+                return
+            self._decode_value()  # Skip unrelated members
+            if self._peek() == ',':
+                self.pos += 1
+            else:
+                self._expect('}')
+                raise NoRecordArray()
+
+    def _iter_array(self):
+        self._expect('[')
+        if self._peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self._decode_value()
+            if self._peek() == ',':
+                self.pos += 1
+            else:
+                self._expect(']')
+                return
+
+    def _fill(self, size=None):
+        """Drop consumed text and append the next chunk. Returns False at EOF."""
+        if self.eof:
+            return False
+        chunk = self.text.read(size or self.chunk_size)
+        if not chunk:
+            # Keep the buffer as is: callers may hold positions in it
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _fill_value(self):
+        """Extend the buffer for the value at pos, doubling it so a long value is not re-decoded per chunk"""
+        pending = len(self.buffer) - self.pos
+        if pending > MAX_VALUE_CHARS:
+            raise json.JSONDecodeError(f'Value longer than {MAX_VALUE_CHARS} characters', self.buffer, self.pos)
+        return self._fill(max(self.chunk_size, pending))
+
+    def _peek(self):
+        """Return the next non-whitespace character without consuming it ('' at EOF)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise json.JSONDecodeError(f'Expecting {char!r}', self.buffer, self.pos)
+        self.pos += 1
+
+    def _decode_value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as exc:
+                # Only a value cut off by the end of the buffer can decode with more text,
+                # anything else is malformed whatever follows
+                truncated = exc.pos >= len(self.buffer) - TRUNCATED_TAIL or exc.msg.startswith('Unterminated string')
+                if truncated and self._fill_value():
+                    continue
+                raise
+            # A number ending at or just before the buffer end may continue in the next chunk
+            if end >= len(self.buffer) - TRUNCATED_TAIL and not self.eof and self._fill_value():
+                continue
+            self.pos = end
+            return value
@@ -0,0 +1,32 @@
+"""
+Django management command to recompute stock-out forecasts for every part
+Run with: python manage.py compute_forecasts [--window 28] [--alpha 0.3]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from inventory_app.forecasting import compute_forecasts
+
+
+class Command(BaseCommand):
+    help = 'Recompute consumption rates and days of cover for all spare parts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window', type=int, default=None,
+                            help='Days of usage history to use (default: FORECAST_WINDOW_DAYS)')
+        parser.add_argument('--alpha', type=float, default=None,
+                            help='Exponential smoothing factor in (0, 1] (default: FORECAST_SMOOTHING)')
+
+    def handle(self, *args, **options):
+        if options['window'] is not None and options['window'] <= 0:
+            raise CommandError('--window must be > 0')
+        if options['alpha'] is not None and not 0 < options['alpha'] <= 1:
+            raise CommandError('--alpha must be in (0, 1]')
+
+        result = compute_forecasts(window_days=options['window'], alpha=options['alpha'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Forecast {result['parts']:,} parts in {result['seconds']:.1f}s: "
+                f"{result['from_movements']:,} from stock movements, "
+                f"{result['from_observations']:,} from quantity observations, "
+                f"{result['running_out']:,} running out soon"
+            )
+        )
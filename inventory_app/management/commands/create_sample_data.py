@@ -1,18 +1,17 @@
 from django.core.management.base import BaseCommand
-from inventory_app.models import SparePart
-import pandas as pd
+from inventory_app.models import SparePart, Supplier
 import os
 
 
 class Command(BaseCommand):
-    help = 'Import spare parts data from Excel file'
+    help = 'Import spare parts data from an Excel or Parquet file'
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--file',
             type=str,
             default='SpareParts_Inventory_500.xlsx',
-            help='Excel file to import (default: SpareParts_Inventory_500.xlsx)'
+            help='Excel or Parquet file to import (default: SpareParts_Inventory_500.xlsx)'
         )
 
     def handle(self, *args, **options):
@@ -26,12 +25,17 @@ class Command(BaseCommand):
             
         if not os.path.exists(file_path):
             self.stdout.write(
-                self.style.ERROR(f'Excel file not found: {options["file"]}')
+                self.style.ERROR(f'File not found: {options["file"]}')
             )
             return
 
+        if file_path.lower().endswith('.parquet'):
+            self.import_parquet(file_path)
+            return
+
         try:
-            # Read Excel file
+            # Read Excel file (pandas is only needed here, keep it off manage.py startup)
+            import pandas as pd
             df = pd.read_excel(file_path)
             
             self.stdout.write(f'Reading from: {file_path}')
@@ -55,6 +59,7 @@ class Command(BaseCommand):
             
             created_count = 0
             updated_count = 0
+            unchanged_count = 0
             
             for index, row in df.iterrows():
                 try:
@@ -87,6 +92,11 @@ class Command(BaseCommand):
                         except:
                             supplier = ''
                     
+                    if supplier:
+                        supplier, _ = Supplier.objects.get_or_create(name=supplier)
+                    else:
+                        supplier = None
+
                     # Create or update the spare part
                     part, created = SparePart.objects.get_or_create(
                         part_name=part_name,
@@ -108,6 +118,10 @@ class Command(BaseCommand):
                         part.threshold = threshold
                         if supplier:
                             part.supplier = supplier
+                        # Skip the write when nothing the import sets has changed
+                        if part.fingerprint == part.compute_fingerprint():
+                            unchanged_count += 1
+                            continue
                         part.save()
                         updated_count += 1
                         self.stdout.write(
@@ -121,7 +135,7 @@ class Command(BaseCommand):
                     continue
             
             self.stdout.write(
-                self.style.SUCCESS(f'\nImport complete! Created: {created_count}, Updated: {updated_count} parts.')
+                self.style.SUCCESS(f'\nImport complete! Created: {created_count}, Updated: {updated_count}, Unchanged: {unchanged_count} parts.')
             )
             
         except Exception as e:
@@ -130,4 +144,23 @@ class Command(BaseCommand):
             )
             self.stdout.write(
                 self.style.ERROR('Make sure pandas and openpyxl are installed: pip install pandas openpyxl')
-            )
\ No newline at end of file
+            )
+
+    def import_parquet(self, file_path):
+        """Import a Parquet file through the batched import pipeline, row group by row group"""
+        from inventory_app.importer import ImportFormatError, run_import
+
+        self.stdout.write(f'Reading from: {file_path}')
+        try:
+            result = run_import(file_path, '.parquet')
+        except ImportFormatError as e:
+            self.stdout.write(self.style.ERROR(str(e)))
+            return
+        for error in result['errors'][:20]:
+            self.stdout.write(self.style.ERROR(error))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nImport complete! Created: {result['created']}, Updated: {result['updated']}, "
+                f"Unchanged: {result['unchanged']}, Skipped: {result['skipped']}, Errors: {result['error_count']}."
+            )
+        )
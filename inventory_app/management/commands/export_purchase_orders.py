@@ -0,0 +1,31 @@
+"""
+Django management command to write the purchase orders ZIP to a file
+Run with: python manage.py export_purchase_orders [--output orders.zip] [--workers 4]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from inventory_app.purchasing import write_purchase_orders_zip
+
+
+class Command(BaseCommand):
+    help = 'Render one purchase order (CSV and PDF) per supplier with low stock parts into a ZIP file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=None,
+                            help='Archive path (default: purchase_orders_<date>.zip)')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Rendering processes (default: PURCHASE_ORDER_WORKERS)')
+
+    def handle(self, *args, **options):
+        if options['workers'] is not None and options['workers'] <= 0:
+            raise CommandError('--workers must be > 0')
+
+        path = options['output'] or f'purchase_orders_{timezone.localdate():%Y%m%d}.zip'
+        with open(path, 'wb') as archive:
+            totals = write_purchase_orders_zip(archive, workers=options['workers'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {totals['orders']:,} purchase orders ({totals['lines']:,} lines, "
+                f"{totals['units']:,} units) to {path}"
+            )
+        )
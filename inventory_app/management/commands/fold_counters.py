@@ -0,0 +1,14 @@
+"""
+Django management command to fold hot part counters into the parts table
+Run with: python manage.py fold_counters
+"""
+from django.core.management.base import BaseCommand
+from inventory_app.counters import fold_counters
+
+
+class Command(BaseCommand):
+    help = 'Move the pending stock counts of hot parts into their quantity and the rollups'
+
+    def handle(self, *args, **options):
+        folded = fold_counters()
+        self.stdout.write(self.style.SUCCESS(f'Folded the counters of {folded} part(s)'))
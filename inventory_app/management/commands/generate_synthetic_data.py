@@ -0,0 +1,224 @@
+"""
+Django management command to generate large volumes of synthetic inventory data
+Run with: python manage.py generate_synthetic_data --parts 1000000 --seed 42
+"""
+from datetime import timedelta
+from multiprocessing import Pool
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from inventory_app.models import SparePart, Supplier, AlertLog, StockMovement, part_fingerprint, rebuild_rollups
+
+
+PART_ADJECTIVES = [
+    'Hydraulic', 'Pneumatic', 'Heavy Duty', 'Sealed', 'Stainless', 'High Temp',
+    'Precision', 'Industrial', 'Compact', 'Reinforced', 'Threaded', 'Flanged',
+]
+PART_NOUNS = [
+    'Bearing', 'Filter', 'Gasket', 'Valve', 'Pump', 'Seal', 'Belt', 'Bolt',
+    'Coupling', 'Sensor', 'Relay', 'Fuse', 'Hose', 'Bushing', 'Spring', 'Gear',
+    'Motor', 'Nozzle', 'Shaft', 'Washer',
+]
+SUPPLIER_WORDS = [
+    'Apex', 'Summit', 'Delta', 'Quality', 'Global', 'Prime', 'Allied', 'United',
+    'Pioneer', 'Vertex', 'Atlas', 'Precision', 'Northern', 'Eastern', 'Titan',
+]
+SUPPLIER_SUFFIXES = ['Supplies', 'Corp', 'Industrial', 'Parts Ltd', 'Components', 'Trading Co']
+
+ALERT_STATUSES = ['SENT', 'RESOLVED', 'FAILED']
+
+
+def build_supplier_names(count, seed):
+    """Build a reproducible list of unique supplier names"""
+    rng = random.Random(seed)
+    names = []
+    seen = set()
+    while len(names) < count:
+        name = f"{rng.choice(SUPPLIER_WORDS)} {rng.choice(SUPPLIER_SUFFIXES)}"
+        if name in seen:
+            name = f"{name} {len(names) + 1}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def generate_chunk(spec):
+    """
+    Generate one chunk of part rows, alert history and stock usage.
+
+    Each chunk is seeded from (seed, chunk index) so output is identical
+    whether chunks are generated in-process or by a worker pool.
+
+    Args:
+        spec (tuple): (seed, chunk_index, start, count, suppliers, alert_rate,
+            movement_rate, history_days)
+
+    Returns:
+        tuple: (parts, alerts, movements) where parts is a list of
+            (part_name, quantity, threshold, supplier), alerts is a list of
+            (local_index, quantity, threshold, status, days_ago) and movements
+            is a list of (local_index, delta, quantity_after, days_ago)
+    """
+    seed, chunk_index, start, count, suppliers, alert_rate, movement_rate, history_days = spec
+    rng = random.Random(f'{seed}:{chunk_index}')
+    movement_rng = random.Random(f'{seed}:{chunk_index}:movements')
+    parts = []
+    alerts = []
+    movements = []
+
+    for offset in range(count):
+        number = start + offset + 1
+        part_name = (
+            f"{rng.choice(PART_ADJECTIVES)} {rng.choice(PART_NOUNS)} "
+            f"{rng.choice('ABCDEFGHJKLMNPRSTUVWXYZ')}{rng.choice('ABCDEFGHJKLMNPRSTUVWXYZ')}-{number:07d}"
+        )
+        threshold = rng.choice((5, 10, 10, 15, 20, 25, 50))
+        # Most parts are healthy, a tail is low or out of stock
+        roll = rng.random()
+        if roll < 0.05:
+            quantity = 0
+        elif roll < 0.20:
+            quantity = rng.randint(1, threshold)
+        else:
+            quantity = rng.randint(threshold + 1, threshold * 6)
+        supplier = rng.choice(suppliers) if suppliers and rng.random() > 0.02 else ''
+        parts.append((part_name, quantity, threshold, supplier))
+
+        if quantity <= threshold and rng.random() < alert_rate:
+            status = rng.choice(ALERT_STATUSES)
+            alerts.append((offset, quantity, threshold, status, rng.uniform(0, history_days)))
+
+        # Usage history walks back from the current quantity, newest first
+        if movement_rate and movement_rng.random() < movement_rate:
+            quantity_after = quantity
+            ages = sorted(movement_rng.uniform(0, history_days) for _ in range(movement_rng.randint(1, 12)))
+            for days_ago in ages:
+                delta = -movement_rng.randint(1, max(1, threshold // 4))
+                movements.append((offset, delta, quantity_after, days_ago))
+                quantity_after -= delta
+
+    return parts, alerts, movements
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic spare parts and alert history at production scale'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--parts', type=int, default=100000,
+                            help='Number of spare parts to generate (default: 100000)')
+        parser.add_argument('--suppliers', type=int, default=250,
+                            help='Number of distinct suppliers (default: 250)')
+        parser.add_argument('--alert-rate', type=float, default=0.5,
+                            help='Share of low stock parts that get alert history (default: 0.5)')
+        parser.add_argument('--movement-rate', type=float, default=0.0,
+                            help='Share of parts that get stock usage movements (default: 0, none)')
+        parser.add_argument('--history-days', type=int, default=90,
+                            help='How far back generated history goes (default: 90)')
+        parser.add_argument('--batch-size', type=int, default=20000,
+                            help='Rows per bulk_create batch (default: 20000)')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Random seed for reproducible output (default: 42)')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Worker processes for row generation (default: 1, no multiprocessing)')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete existing spare parts and alert logs first')
+
+    def handle(self, *args, **options):
+        total = options['parts']
+        batch_size = options['batch_size']
+        workers = options['workers']
+
+        if total < 0 or batch_size <= 0 or workers <= 0:
+            raise CommandError('--parts must be >= 0, --batch-size and --workers must be > 0')
+
+        if options['clear']:
+            with transaction.atomic():
+                AlertLog.objects.all().delete()
+                SparePart.objects.all().delete()
+            self.stdout.write(self.style.WARNING('Cleared existing spare parts and alert logs'))
+
+        suppliers = build_supplier_names(options['suppliers'], options['seed'])
+        supplier_ids = Supplier.resolve_names(suppliers)
+        specs = [
+            (options['seed'], index, start, min(batch_size, total - start), suppliers,
+             options['alert_rate'], options['movement_rate'], options['history_days'])
+            for index, start in enumerate(range(0, total, batch_size))
+        ]
+
+        started = timezone.now()
+        created_parts = 0
+        created_alerts = 0
+        created_movements = 0
+
+        if workers > 1:
+            with Pool(processes=workers) as pool:
+                # imap keeps chunk order so ids are assigned deterministically
+                for chunk in pool.imap(generate_chunk, specs):
+                    counts = self._write_chunk(*chunk, supplier_ids, started, batch_size)
+                    created_parts += counts[0]
+                    created_alerts += counts[1]
+                    created_movements += counts[2]
+                    self._report_progress(created_parts, total)
+        else:
+            for spec in specs:
+                counts = self._write_chunk(*generate_chunk(spec), supplier_ids, started, batch_size)
+                created_parts += counts[0]
+                created_alerts += counts[1]
+                created_movements += counts[2]
+                self._report_progress(created_parts, total)
+
+        # Bulk inserts bypass the incremental rollups, recompute them once
+        rebuild_rollups()
+
+        elapsed = (timezone.now() - started).total_seconds()
+        rate = created_parts / elapsed if elapsed else created_parts
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\nGenerated {created_parts} parts, {len(suppliers)} suppliers and '
+                f'{created_alerts} alert log entries and {created_movements} stock movements '
+                f'in {elapsed:.1f}s ({rate:,.0f} parts/s)'
+            )
+        )
+
+    def _write_chunk(self, parts, alerts, movements, supplier_ids, now, batch_size):
+        """Insert one generated chunk with its alert history and movements in a single transaction"""
+        with transaction.atomic():
+            objs = SparePart.objects.bulk_create(
+                [
+                    SparePart(part_name=name, quantity=qty, threshold=threshold,
+                              supplier_id=supplier_ids.get(supplier),
+                              fingerprint=part_fingerprint(qty, threshold, supplier_ids.get(supplier)))
+                    for name, qty, threshold, supplier in parts
+                ],
+                batch_size=batch_size,
+            )
+            alert_objs = []
+            for offset, qty, threshold, status, days_ago in alerts:
+                part = objs[offset]
+                alert_date = now - timedelta(days=days_ago)
+                alert_objs.append(AlertLog(
+                    spare_part_id=part.pk,
+                    part_name=part.part_name,
+                    quantity_at_alert=qty,
+                    threshold_at_alert=threshold,
+                    supplier=parts[offset][3],
+                    alert_date=alert_date,
+                    status=status,
+                    resolved_date=alert_date + timedelta(days=1) if status == 'RESOLVED' else None,
+                    error_message='SMTP timeout' if status == 'FAILED' else '',
+                ))
+            AlertLog.objects.bulk_create(alert_objs, batch_size=batch_size)
+            StockMovement.objects.bulk_create(
+                [
+                    StockMovement(part_id=objs[offset].pk, delta=delta, quantity_after=quantity_after,
+                                  created_at=now - timedelta(days=days_ago))
+                    for offset, delta, quantity_after, days_ago in movements
+                ],
+                batch_size=batch_size,
+            )
+        return len(objs), len(alert_objs), len(movements)
+
+    def _report_progress(self, done, total):
+        self.stdout.write(f'  {done:,}/{total:,} parts written')
@@ -0,0 +1,17 @@
+"""
+Django management command to delete expired stock movement idempotency keys
+Run with: python manage.py prune_idempotency_keys
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from inventory_app.movements import prune_idempotency_keys
+
+
+class Command(BaseCommand):
+    help = 'Delete movement batch idempotency keys older than IDEMPOTENCY_KEY_HOURS'
+
+    def handle(self, *args, **options):
+        deleted = prune_idempotency_keys()
+        self.stdout.write(
+            self.style.SUCCESS(f'Deleted {deleted} idempotency key(s) older than {settings.IDEMPOTENCY_KEY_HOURS} hours')
+        )
@@ -0,0 +1,17 @@
+"""
+Django management command to delete expired part deletion tombstones
+Run with: python manage.py prune_sync_log
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from inventory_app.sync import prune_deletions
+
+
+class Command(BaseCommand):
+    help = 'Delete part deletion tombstones older than SYNC_TOMBSTONE_DAYS'
+
+    def handle(self, *args, **options):
+        deleted = prune_deletions()
+        self.stdout.write(
+            self.style.SUCCESS(f'Deleted {deleted} tombstone(s) older than {settings.SYNC_TOMBSTONE_DAYS} days')
+        )
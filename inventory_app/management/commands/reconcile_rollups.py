@@ -0,0 +1,27 @@
+"""
+Django management command to verify and rebuild the supplier/inventory rollups
+Run with: python manage.py reconcile_rollups [--check]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from inventory_app.models import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute supplier and inventory rollups from the parts table and report drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report drift, exit with an error if any is found')
+
+    def handle(self, *args, **options):
+        drift = rebuild_rollups(dry_run=options['check'])
+
+        for label, field, stored, actual in drift:
+            self.stdout.write(f'  {label}: {field} stored={stored} actual={actual} ({actual - stored:+d})')
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Rollups are consistent with the parts table'))
+        elif options['check']:
+            raise CommandError(f'{len(drift)} rollup value(s) have drifted')
+        else:
+            self.stdout.write(self.style.WARNING(f'Rebuilt rollups, corrected {len(drift)} drifted value(s)'))
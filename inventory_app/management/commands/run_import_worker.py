@@ -0,0 +1,69 @@
+"""
+Django management command to process queued spare parts import jobs
+Run with: python manage.py run_import_worker --workers 2
+"""
+from concurrent.futures import ProcessPoolExecutor
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+from inventory_app.jobs import claim_jobs, fail_stale_jobs, init_worker, run_import_job
+from inventory_app.models import ImportJob
+
+
+class Command(BaseCommand):
+    help = 'Process queued spare parts import jobs in a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2,
+                            help='Number of jobs processed in parallel (default: 2)')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds between checks for new jobs (default: 2)')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue is empty instead of polling forever')
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        running = {}
+
+        self.stdout.write(f'Import worker started with {workers} process(es)')
+        # Worker processes must open their own connections
+        connections.close_all()
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+            try:
+                while True:
+                    for future in [f for f in running if f.done()]:
+                        job_id = running.pop(future)
+                        self._finish(job_id, future)
+
+                    # Jobs left RUNNING by a worker that died, this one's included
+                    for job_id in fail_stale_jobs():
+                        self.stdout.write(self.style.ERROR(f'Import job {job_id} failed: its worker stopped'))
+
+                    for job_id in claim_jobs(workers - len(running)):
+                        self.stdout.write(f'Starting import job {job_id}')
+                        running[pool.submit(run_import_job, job_id)] = job_id
+
+                    if options['once'] and not running and not ImportJob.objects.filter(status='QUEUED').exists():
+                        break
+                    time.sleep(options['poll_interval'])
+            except KeyboardInterrupt:
+                self.stdout.write(self.style.WARNING('Stopping import worker...'))
+
+        self.stdout.write(self.style.SUCCESS('Import worker stopped'))
+
+    def _finish(self, job_id, future):
+        try:
+            status = future.result()
+        except Exception as e:
+            # The worker process died before it could record the outcome
+            ImportJob.objects.filter(pk=job_id).update(
+                status='FAILED', error_message=f'Worker crashed: {str(e)}', finished_at=timezone.now(),
+            )
+            self.stdout.write(self.style.ERROR(f'Import job {job_id} crashed: {str(e)}'))
+            return
+
+        style = self.style.SUCCESS if status == 'COMPLETED' else self.style.ERROR
+        self.stdout.write(style(f'Import job {job_id} {status.lower()}'))
@@ -0,0 +1,30 @@
+"""
+Django management command to run the outbox consumers on recent part changes
+Run with: python manage.py run_outbox_consumers
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from inventory_app import outbox
+
+
+class Command(BaseCommand):
+    help = 'Hand the part changes recorded since the last run to each consumer in OUTBOX_CONSUMERS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds between runs (default: 5)')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit after one run instead of polling forever')
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                for name, processed in outbox.run_consumers().items():
+                    if processed:
+                        self.stdout.write(f'{name}: processed {processed} change(s)')
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Stopping outbox consumers...'))
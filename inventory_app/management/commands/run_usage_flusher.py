@@ -0,0 +1,40 @@
+"""
+Django management command to apply spooled technician stock changes
+Run with: python manage.py run_usage_flusher
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from inventory_app import spool
+
+
+class Command(BaseCommand):
+    help = 'Apply the stock changes spooled in USAGE_SPOOL_PATH to the inventory in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=settings.USAGE_SPOOL_FLUSH_SECONDS,
+                            help='Seconds between flushes (default: USAGE_SPOOL_FLUSH_SECONDS)')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the spool is empty instead of flushing forever')
+
+    def handle(self, *args, **options):
+        if not spool.enabled():
+            raise CommandError('USAGE_SPOOL_PATH is not set, stock changes are written directly')
+
+        # Changes left by a stopped flusher are applied by the first flushes
+        self.stdout.write(f'Usage flusher started on {settings.USAGE_SPOOL_PATH}')
+        try:
+            while True:
+                while True:
+                    changes, parts = spool.flush()
+                    if not changes:
+                        break
+                    self.stdout.write(f'Applied {changes} change(s) to {parts} part(s)')
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Stopping usage flusher...'))
+
+        self.stdout.write(self.style.SUCCESS('Usage flusher stopped'))
@@ -7,7 +7,7 @@ from django.core.mail import send_mail
 from django.conf import settings
 from django.utils import timezone
 from django.db.models import F
-from inventory_app.models import SparePart, DailyAlertLog
+from inventory_app.models import SparePart, DailyAlertLog, StockForecast
 from inventory_app.services import AlertService
 import json
 import logging
@@ -37,12 +37,31 @@ class Command(BaseCommand):
                 logger.info(f'Daily alert already sent for {today}')
                 return
             
-            # Get all low stock items (quantity < threshold)
+            # Get all low stock items (quantity <= threshold, like SparePart.is_low())
             low_stock_parts = SparePart.objects.filter(
-                quantity__lt=F('threshold')
-            ).order_by('part_name')
+                quantity__lte=F('threshold')
+            ).select_related('supplier').order_by('part_name')
             
             low_stock_count = low_stock_parts.count()
+
+            # Parts forecast to run out soon, from the latest compute_forecasts run
+            running_out = list(
+                StockForecast.objects.filter(days_of_cover__lte=settings.FORECAST_ALERT_DAYS)
+                .select_related('part__supplier').order_by('days_of_cover')[:20]
+            )
+            forecast_lines = []
+            if running_out:
+                forecast_lines = [
+                    '',
+                    f'Running out within {settings.FORECAST_ALERT_DAYS} days (at current usage):',
+                    '─────────────────────────────────────────────────────────',
+                ]
+                for forecast in running_out:
+                    forecast_lines.append(
+                        f'⏳ {forecast.part.part_name} — {forecast.days_of_cover:.1f} days of cover '
+                        f'(~{forecast.smoothed_daily_usage:.1f}/day, stock-out {forecast.stockout_date:%b %d})'
+                    )
+                forecast_lines.append('')
             
             # Get admin email addresses
             recipients = AlertService._get_admin_email_addresses()
@@ -71,7 +90,7 @@ class Command(BaseCommand):
                     '',
                     f'This is your daily inventory stock report for {current_date}.',
                     '',
-                    f'⚠️ ATTENTION REQUIRED: {low_stock_count} item{"s" if low_stock_count > 1 else ""} below minimum threshold',
+                    f'⚠️ ATTENTION REQUIRED: {low_stock_count} item{"s" if low_stock_count > 1 else ""} at or below minimum threshold',
                     '',
                     'Low Stock Items:',
                     '─────────────────────────────────────────────────────────',
@@ -81,12 +100,13 @@ class Command(BaseCommand):
                     message_lines.append(
                         f'📦 {part.part_name} — Quantity: {part.quantity} (Threshold: {part.threshold})'
                     )
-                    if part.supplier:
-                        message_lines.append(f'   Supplier: {part.supplier}')
+                    if part.supplier_id:
+                        message_lines.append(f'   Supplier: {part.supplier_name}')
                     message_lines.append('')
                 
+                message_lines.append('─────────────────────────────────────────────────────────')
+                message_lines.extend(forecast_lines)
                 message_lines.extend([
-                    '─────────────────────────────────────────────────────────',
                     '',
                     'Action Required:',
                     '• Review these items in your inventory dashboard',
@@ -109,14 +129,14 @@ This is your daily inventory stock report for {current_date}.
 
 ✅ All stock levels are healthy today ✅
 
-No items are currently below their minimum threshold levels.
+No items are currently at or below their minimum threshold levels.
 All spare parts inventory is adequately stocked.
 
 Current Status:
 • Total parts in inventory: {SparePart.objects.count()}
 • Low stock items: 0
 • Status: All systems normal
-
+{chr(10).join(forecast_lines)}
 ---
 This is an automated daily report from Spare Parts Inventory System.
 Sent to: {", ".join(recipients)}
@@ -0,0 +1,52 @@
+"""
+Django management command to simulate stock depletion and suggest thresholds
+Run with: python manage.py simulate_reorder_points [--scenarios 2000] [--workers 4]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from inventory_app.simulation import simulate_reorder_points
+
+
+class Command(BaseCommand):
+    help = 'Run Monte Carlo demand scenarios per part and suggest reorder thresholds'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', type=int, default=None,
+                            help='Demand scenarios per part (default: SIMULATION_SCENARIOS)')
+        parser.add_argument('--service-level', type=float, default=None,
+                            help='Target probability of no stock-out during the lead time '
+                                 '(default: SIMULATION_SERVICE_LEVEL)')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Worker processes (default: SIMULATION_WORKERS)')
+        parser.add_argument('--max-cells', type=int, default=None,
+                            help='Most parts x scenarios x days values per chunk (default: SIMULATION_MAX_CELLS)')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Random seed for reproducible output (default: 42)')
+
+    def handle(self, *args, **options):
+        if options['scenarios'] is not None and options['scenarios'] <= 0:
+            raise CommandError('--scenarios must be > 0')
+        if options['service_level'] is not None and not 0 < options['service_level'] < 1:
+            raise CommandError('--service-level must be between 0 and 1')
+        if options['workers'] is not None and options['workers'] <= 0:
+            raise CommandError('--workers must be > 0')
+        if options['max_cells'] is not None and options['max_cells'] <= 0:
+            raise CommandError('--max-cells must be > 0')
+
+        result = simulate_reorder_points(
+            scenarios=options['scenarios'],
+            service_level=options['service_level'],
+            workers=options['workers'],
+            seed=options['seed'],
+            max_cells=options['max_cells'],
+        )
+        if not result['parts']:
+            self.stdout.write(self.style.WARNING('No parts with forecast usage, run compute_forecasts first'))
+            return
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Simulated {result['parts']:,} parts in {result['chunks']:,} chunks "
+                f"({result['seconds']:.1f}s): {result['raise_threshold']:,} thresholds too low, "
+                f"{result['lower_threshold']:,} higher than needed, "
+                f"{result['at_risk']:,} below the service level"
+            )
+        )
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:40
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def populate_fingerprints(apps, schema_editor):
+    SparePart = apps.get_model('inventory_app', 'SparePart')
+    batch = []
+    for part in SparePart.objects.only('quantity', 'threshold', 'supplier').iterator(chunk_size=5000):
+        digest = hashlib.blake2b(
+            f'{part.quantity}\x1f{part.threshold}\x1f{part.supplier}'.encode(), digest_size=8
+        ).digest()
+        part.fingerprint = int.from_bytes(digest, 'big', signed=True)
+        batch.append(part)
+        if len(batch) >= 5000:
+            SparePart.objects.bulk_update(batch, ['fingerprint'])
+            batch = []
+    if batch:
+        SparePart.objects.bulk_update(batch, ['fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0004_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='unchanged_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='sparepart',
+            name='fingerprint',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_fingerprints, migrations.RunPython.noop),
+    ]
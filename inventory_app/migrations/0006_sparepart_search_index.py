@@ -0,0 +1,72 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:05
+
+from django.db import migrations
+
+# FTS5 index over part_name and supplier. It keeps its own copy of both
+# columns (rowid = SparePart.id) and is maintained by triggers, so every
+# write path, including bulk_create/bulk_update and raw SQL, stays in sync.
+# The prefix index makes 2 and 3 character prefix queries cheap.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS inventory_app_sparepart_fts
+    USING fts5(part_name, supplier, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS inventory_app_sparepart_fts_insert
+    AFTER INSERT ON inventory_app_sparepart BEGIN
+        INSERT INTO inventory_app_sparepart_fts (rowid, part_name, supplier)
+        VALUES (new.id, new.part_name, new.supplier);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS inventory_app_sparepart_fts_update
+    AFTER UPDATE OF part_name, supplier ON inventory_app_sparepart BEGIN
+        UPDATE inventory_app_sparepart_fts
+        SET part_name = new.part_name, supplier = new.supplier
+        WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS inventory_app_sparepart_fts_delete
+    AFTER DELETE ON inventory_app_sparepart BEGIN
+        DELETE FROM inventory_app_sparepart_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    INSERT INTO inventory_app_sparepart_fts (rowid, part_name, supplier)
+    SELECT id, part_name, supplier FROM inventory_app_sparepart
+    """,
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS inventory_app_sparepart_fts_insert',
+    'DROP TRIGGER IF EXISTS inventory_app_sparepart_fts_update',
+    'DROP TRIGGER IF EXISTS inventory_app_sparepart_fts_delete',
+    'DROP TABLE IF EXISTS inventory_app_sparepart_fts',
+]
+
+
+def create_search_index(apps, schema_editor):
+    # Other databases fall back to icontains search (see inventory_app.search)
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0005_sparepart_fingerprint'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,169 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:40
+
+import hashlib
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# The search triggers read the supplier column, so they are dropped while the
+# column is replaced and recreated against supplier_id afterwards.
+SEARCH_TRIGGERS = ('inventory_app_sparepart_fts_insert', 'inventory_app_sparepart_fts_update')
+
+OLD_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS inventory_app_sparepart_fts_insert
+    AFTER INSERT ON inventory_app_sparepart BEGIN
+        INSERT INTO inventory_app_sparepart_fts (rowid, part_name, supplier)
+        VALUES (new.id, new.part_name, new.supplier);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS inventory_app_sparepart_fts_update
+    AFTER UPDATE OF part_name, supplier ON inventory_app_sparepart BEGIN
+        UPDATE inventory_app_sparepart_fts
+        SET part_name = new.part_name, supplier = new.supplier
+        WHERE rowid = old.id;
+    END
+    """,
+]
+
+SUPPLIER_NAME_SQL = "COALESCE((SELECT name FROM inventory_app_supplier WHERE id = new.supplier_id), '')"
+
+NEW_TRIGGERS_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS inventory_app_sparepart_fts_insert
+    AFTER INSERT ON inventory_app_sparepart BEGIN
+        INSERT INTO inventory_app_sparepart_fts (rowid, part_name, supplier)
+        VALUES (new.id, new.part_name, {SUPPLIER_NAME_SQL});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS inventory_app_sparepart_fts_update
+    AFTER UPDATE OF part_name, supplier_id ON inventory_app_sparepart BEGIN
+        UPDATE inventory_app_sparepart_fts
+        SET part_name = new.part_name, supplier = {SUPPLIER_NAME_SQL}
+        WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS inventory_app_supplier_fts_rename
+    AFTER UPDATE OF name ON inventory_app_supplier BEGIN
+        UPDATE inventory_app_sparepart_fts SET supplier = new.name
+        WHERE rowid IN (SELECT id FROM inventory_app_sparepart WHERE supplier_id = new.id);
+    END
+    """,
+]
+
+
+def _run_sqlite(schema_editor, statements):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_search_triggers(apps, schema_editor):
+    _run_sqlite(schema_editor, [f'DROP TRIGGER IF EXISTS {name}' for name in SEARCH_TRIGGERS])
+
+
+def restore_old_search_triggers(apps, schema_editor):
+    _run_sqlite(schema_editor, OLD_TRIGGERS_SQL)
+
+
+def create_search_triggers(apps, schema_editor):
+    _run_sqlite(schema_editor, NEW_TRIGGERS_SQL)
+
+
+def drop_new_search_triggers(apps, schema_editor):
+    _run_sqlite(schema_editor, [
+        f'DROP TRIGGER IF EXISTS {name}' for name in SEARCH_TRIGGERS + ('inventory_app_supplier_fts_rename',)
+    ])
+
+
+def _normalize_name(name):
+    # Same as models.normalize_supplier_name; migrations do not import app code
+    return ' '.join(name.split())
+
+
+def link_suppliers(apps, schema_editor):
+    """Create one Supplier per distinct normalized name and point parts at it"""
+    Supplier = apps.get_model('inventory_app', 'Supplier')
+    SparePart = apps.get_model('inventory_app', 'SparePart')
+    raw_names = (
+        SparePart.objects.exclude(supplier_name='').order_by().values_list('supplier_name', flat=True).distinct()
+    )
+    spellings = {}
+    for raw in raw_names:
+        spellings.setdefault(_normalize_name(raw), []).append(raw)
+    for name, raws in spellings.items():
+        if not name:
+            # Whitespace only: no supplier
+            continue
+        supplier = Supplier.objects.create(name=name)
+        count = SparePart.objects.filter(supplier_name__in=raws).update(supplier=supplier)
+        Supplier.objects.filter(pk=supplier.pk).update(part_count=count)
+
+    # Fingerprints now hash the supplier id instead of the name
+    SparePart = apps.get_model('inventory_app', 'SparePart')
+    batch = []
+    for part in SparePart.objects.only('quantity', 'threshold', 'supplier_id').iterator(chunk_size=5000):
+        supplier = part.supplier_id if part.supplier_id is not None else ''
+        digest = hashlib.blake2b(
+            f'{part.quantity}\x1f{part.threshold}\x1f{supplier}'.encode(), digest_size=8
+        ).digest()
+        part.fingerprint = int.from_bytes(digest, 'big', signed=True)
+        batch.append(part)
+        if len(batch) >= 5000:
+            SparePart.objects.bulk_update(batch, ['fingerprint'])
+            batch = []
+    if batch:
+        SparePart.objects.bulk_update(batch, ['fingerprint'])
+
+
+def unlink_suppliers(apps, schema_editor):
+    schema_editor.execute(
+        """
+        UPDATE inventory_app_sparepart SET supplier_name = COALESCE((
+            SELECT s.name FROM inventory_app_supplier s WHERE s.id = inventory_app_sparepart.supplier_id
+        ), ''), fingerprint = NULL
+        """
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0006_sparepart_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Supplier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('part_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RunPython(drop_search_triggers, restore_old_search_triggers),
+        migrations.RenameField(
+            model_name='sparepart',
+            old_name='supplier',
+            new_name='supplier_name',
+        ),
+        migrations.AddField(
+            model_name='sparepart',
+            name='supplier',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='parts', to='inventory_app.supplier'),
+        ),
+        migrations.RunPython(link_suppliers, unlink_suppliers),
+        migrations.RemoveField(
+            model_name='sparepart',
+            name='supplier_name',
+        ),
+        migrations.RunPython(create_search_triggers, drop_new_search_triggers),
+    ]
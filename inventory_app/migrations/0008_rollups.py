@@ -0,0 +1,63 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:10
+
+from django.db import migrations, models
+from django.db.models import Count, F, Q, Sum
+
+
+def populate_rollups(apps, schema_editor):
+    SparePart = apps.get_model('inventory_app', 'SparePart')
+    Supplier = apps.get_model('inventory_app', 'Supplier')
+    InventorySummary = apps.get_model('inventory_app', 'InventorySummary')
+
+    rows = SparePart.objects.order_by().values('supplier_id').annotate(
+        parts=Count('id'),
+        quantity_sum=Sum('quantity'),
+        low_stock=Count('id', filter=Q(quantity__lte=F('threshold'))),
+    )
+    totals = [0, 0, 0]
+    suppliers = []
+    for row in rows:
+        values = (row['parts'], row['quantity_sum'] or 0, row['low_stock'])
+        totals = [total + value for total, value in zip(totals, values)]
+        if row['supplier_id'] is not None:
+            suppliers.append(Supplier(
+                pk=row['supplier_id'], part_count=values[0], total_quantity=values[1], low_stock_count=values[2],
+            ))
+    Supplier.objects.bulk_update(suppliers, ['part_count', 'total_quantity', 'low_stock_count'], batch_size=1000)
+    InventorySummary.objects.create(
+        pk=1, total_parts=totals[0], total_quantity=totals[1], low_stock_count=totals[2],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0007_supplier'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventorySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_parts', models.IntegerField(default=0)),
+                ('total_quantity', models.BigIntegerField(default=0)),
+                ('low_stock_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Inventory Summary',
+                'verbose_name_plural': 'Inventory Summary',
+            },
+        ),
+        migrations.AddField(
+            model_name='supplier',
+            name='low_stock_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='supplier',
+            name='total_quantity',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
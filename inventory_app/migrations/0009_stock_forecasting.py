@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0008_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockForecast',
+            fields=[
+                ('part', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='forecast', serialize=False, to='inventory_app.sparepart')),
+                ('avg_daily_usage', models.FloatField(default=0)),
+                ('smoothed_daily_usage', models.FloatField(default=0)),
+                ('days_of_cover', models.FloatField(blank=True, db_index=True, null=True)),
+                ('stockout_date', models.DateField(blank=True, null=True)),
+                ('method', models.CharField(choices=[('MOVEMENTS', 'Stock movements'), ('OBSERVATIONS', 'Quantity observations'), ('NONE', 'No usage data')], default='NONE', max_length=20)),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Stock Forecast',
+                'verbose_name_plural': 'Stock Forecasts',
+                'ordering': ['days_of_cover'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.IntegerField()),
+                ('quantity_after', models.IntegerField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='inventory_app.sparepart')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at', 'part'], name='movement_created_part_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0009_stock_forecasting'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReorderSuggestion',
+            fields=[
+                ('part', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='reorder_suggestion', serialize=False, to='inventory_app.sparepart')),
+                ('current_threshold', models.IntegerField()),
+                ('suggested_threshold', models.IntegerField()),
+                ('lead_time_days', models.IntegerField()),
+                ('daily_usage', models.FloatField()),
+                ('stockout_probability', models.FloatField(db_index=True)),
+                ('stockout_probability_now', models.FloatField()),
+                ('scenarios', models.IntegerField()),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Reorder Suggestion',
+                'verbose_name_plural': 'Reorder Suggestions',
+                'ordering': ['-stockout_probability'],
+            },
+        ),
+        migrations.AddField(
+            model_name='supplier',
+            name='lead_time_days',
+            field=models.PositiveIntegerField(default=7),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:55
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0010_reorder_simulation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PartDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('part_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='sparepart',
+            index=models.Index(fields=['updated_at', 'id'], name='part_updated_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0012_movement_batches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sparepart',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-19 20:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0013_sparepart_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sparepart',
+            name='hot',
+            field=models.BooleanField(default=False, help_text='Frequently used part: stock changes are counted in shards and folded in every minute'),
+        ),
+        migrations.CreateModel(
+            name='CounterShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot', models.PositiveSmallIntegerField()),
+                ('delta', models.IntegerField(default=0)),
+                ('part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counter_shards', to='inventory_app.sparepart')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='countershard',
+            constraint=models.UniqueConstraint(fields=('part', 'slot'), name='unique_counter_shard'),
+        ),
+    ]
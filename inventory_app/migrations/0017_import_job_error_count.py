@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-19 22:25
+
+import json
+import re
+
+from django.db import migrations, models
+
+
+def count_stored_errors(apps, schema_editor):
+    """Count the errors of existing jobs from the stored list and its '... and N more.' line"""
+    ImportJob = apps.get_model('inventory_app', 'ImportJob')
+    for job in ImportJob.objects.exclude(errors='').only('errors'):
+        errors = json.loads(job.errors)
+        more = re.fullmatch(r'\.\.\. and (\d+) more\.', errors[-1]) if errors else None
+        count = len(errors) - 1 + int(more.group(1)) if more else len(errors)
+        ImportJob.objects.filter(pk=job.pk).update(error_count=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0016_part_change_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='error_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_stored_errors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.30 on 2026-10-19 23:35
+
+from django.db import migrations
+from django.db.models import Count, F, Q, Sum
+
+
+def _normalize_name(name):
+    # Same as models.normalize_supplier_name; migrations do not import app code
+    return ' '.join(name.split())
+
+
+def merge_duplicate_suppliers(apps, schema_editor):
+    """
+    Merge suppliers whose names only differ in whitespace.
+
+    0007 created one supplier per raw legacy name, so 'Acme ' and 'Acme'
+    became two suppliers. Parts move to the oldest one, which takes the
+    normalized name; suppliers named only whitespace are dropped.
+    """
+    Supplier = apps.get_model('inventory_app', 'Supplier')
+    SparePart = apps.get_model('inventory_app', 'SparePart')
+
+    spellings = {}
+    for pk, name in Supplier.objects.order_by('id').values_list('id', 'name'):
+        spellings.setdefault(_normalize_name(name), []).append((pk, name))
+
+    for name, suppliers in spellings.items():
+        ids = [pk for pk, _ in suppliers]
+        if not name:
+            # Parts without a supplier are only in InventorySummary, which does not change
+            SparePart.objects.filter(supplier_id__in=ids).update(supplier_id=None, fingerprint=None)
+            Supplier.objects.filter(pk__in=ids).delete()
+            continue
+        (keep, kept_name), duplicates = suppliers[0], ids[1:]
+        if duplicates:
+            # fingerprint=None: the stored hash covers the supplier id
+            SparePart.objects.filter(supplier_id__in=duplicates).update(supplier_id=keep, fingerprint=None)
+            Supplier.objects.filter(pk__in=duplicates).delete()
+            totals = SparePart.objects.filter(supplier_id=keep).aggregate(
+                parts=Count('id'),
+                stock=Sum('quantity'),
+                low=Count('id', filter=Q(quantity__lte=F('threshold'))),
+            )
+            Supplier.objects.filter(pk=keep).update(
+                part_count=totals['parts'], total_quantity=totals['stock'] or 0, low_stock_count=totals['low'],
+            )
+        if kept_name != name:
+            Supplier.objects.filter(pk=keep).update(name=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0018_import_job_heartbeat'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_suppliers, migrations.RunPython.noop),
+    ]
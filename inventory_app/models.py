@@ -1,21 +1,596 @@
-from django.db import models
+import hashlib
+import random
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
+from .events import bus
+
+
+def part_fingerprint(quantity, threshold, supplier_id):
+    """64-bit content hash of the fields a catalog import can change"""
+    supplier = supplier_id if supplier_id is not None else ''
+    digest = hashlib.blake2b(f'{quantity}\x1f{threshold}\x1f{supplier}'.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def normalize_supplier_name(name):
+    """Supplier name as stored: surrounding whitespace stripped and inner runs collapsed to one space"""
+    return ' '.join(name.split())
+
+
+class Supplier(models.Model):
+    """Supplier of spare parts, referenced by SparePart.supplier"""
+
+    name = models.CharField(max_length=200, unique=True)
+    # Rollups over the supplier's parts, maintained on every part write (see RollupDelta)
+    part_count = models.IntegerField(default=0)
+    total_quantity = models.BigIntegerField(default=0)
+    low_stock_count = models.IntegerField(default=0)
+    # Days from placing an order to receiving it, used by the reorder simulation
+    lead_time_days = models.PositiveIntegerField(default=7)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def resolve_names(cls, names):
+        """
+        Map supplier names to ids, creating the suppliers that do not exist.
+
+        Args:
+            names (iterable): Supplier names; blank names are ignored
+
+        Returns:
+            dict: name -> supplier id
+        """
+        names = {name for name in names if name}
+        if not names:
+            return {}
+        ids = dict(cls.objects.filter(name__in=names).values_list('name', 'id'))
+        missing = names - ids.keys()
+        if missing:
+            # ignore_conflicts: another import may create the same supplier concurrently
+            cls.objects.bulk_create([cls(name=name) for name in missing], ignore_conflicts=True)
+            ids.update(cls.objects.filter(name__in=missing).values_list('name', 'id'))
+        return ids
+
+
+class InventorySummary(models.Model):
+    """
+    Single-row rollup of the whole inventory.
+
+    Maintained together with the per-supplier rollups on Supplier by
+    RollupDelta, so dashboard KPIs are read instead of aggregated.
+    """
+
+    total_parts = models.IntegerField(default=0)
+    total_quantity = models.BigIntegerField(default=0)
+    low_stock_count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Inventory Summary'
+        verbose_name_plural = 'Inventory Summary'
+
+    def __str__(self):
+        return f"{self.total_parts} parts, {self.low_stock_count} low stock"
+
+    @classmethod
+    def load(cls):
+        summary, _ = cls.objects.get_or_create(pk=1)
+        return summary
+
+
+class RollupDelta:
+    """
+    Net change to the supplier and inventory rollups from a set of writes.
+
+    Every part contributes (1 part, its quantity, 1 if is_low()) to its
+    supplier's rollup and to the inventory summary. Writers subtract the
+    contribution of a part's old state, add that of its new state and
+    apply() the result in the same transaction as the write.
+    """
+
+    def __init__(self):
+        # supplier id (None for parts without one) -> [parts, quantity, low_stock]
+        self.suppliers = defaultdict(lambda: [0, 0, 0])
+
+    def add(self, supplier_id, quantity, threshold, sign=1):
+        """Add (sign=1) or remove (sign=-1) one part's contribution"""
+        self.add_totals(supplier_id, sign, sign * quantity, sign * int(quantity <= threshold))
+
+    def add_totals(self, supplier_id, parts, quantity, low_stock):
+        row = self.suppliers[supplier_id]
+        row[0] += parts
+        row[1] += quantity
+        row[2] += low_stock
+
+    def apply(self):
+        """Write the accumulated change with one UPDATE per rollup table"""
+        changed = {pk: row for pk, row in self.suppliers.items() if any(row)}
+        self.suppliers.clear()
+        if not changed:
+            return
+
+        parts, quantity, low_stock = (sum(row[i] for row in changed.values()) for i in range(3))
+        updated = InventorySummary.objects.filter(pk=1).update(
+            total_parts=F('total_parts') + parts,
+            total_quantity=F('total_quantity') + quantity,
+            low_stock_count=F('low_stock_count') + low_stock,
+        )
+        if not updated:
+            # Summary row missing (e.g. after a flush): recompute everything
+            rebuild_rollups()
+            return
+        bus.publish_on_commit('kpi', {'parts': parts, 'quantity': quantity, 'low_stock': low_stock})
+
+        rows = {pk: row for pk, row in changed.items() if pk is not None}
+        if rows:
+            def by_supplier(index):
+                whens = [When(pk=pk, then=Value(row[index])) for pk, row in rows.items() if row[index]]
+                return Case(*whens, default=Value(0)) if whens else Value(0)
+
+            Supplier.objects.filter(pk__in=rows).update(
+                part_count=F('part_count') + by_supplier(0),
+                total_quantity=F('total_quantity') + by_supplier(1),
+                low_stock_count=F('low_stock_count') + by_supplier(2),
+            )
+
+
+def rebuild_rollups(dry_run=False):
+    """
+    Recompute the supplier and inventory rollups from the parts table.
+
+    Args:
+        dry_run (bool): Only report drift, leave the stored rollups as they are
+
+    Returns:
+        list: (label, field, stored, actual) for every value that had drifted
+    """
+    with transaction.atomic():
+        actual = {
+            row['supplier_id']: (row['parts'], row['quantity_sum'] or 0, row['low_stock'])
+            for row in SparePart.objects.order_by().values('supplier_id').annotate(
+                parts=Count('id'),
+                quantity_sum=Sum('quantity'),
+                low_stock=Count('id', filter=Q(quantity__lte=F('threshold'))),
+            )
+        }
+        drift = []
+        fields = ('part_count', 'total_quantity', 'low_stock_count')
+
+        stale = []
+        for supplier in Supplier.objects.select_for_update().only('name', *fields):
+            values = actual.get(supplier.pk, (0, 0, 0))
+            changed = False
+            for field, value in zip(fields, values):
+                if getattr(supplier, field) != value:
+                    drift.append((supplier.name, field, getattr(supplier, field), value))
+                    setattr(supplier, field, value)
+                    changed = True
+            if changed:
+                stale.append(supplier)
+        if not dry_run:
+            Supplier.objects.bulk_update(stale, fields, batch_size=1000)
+
+        summary = InventorySummary.load()
+        totals = [sum(values[i] for values in actual.values()) for i in range(3)]
+        for field, value in zip(('total_parts', 'total_quantity', 'low_stock_count'), totals):
+            if getattr(summary, field) != value:
+                drift.append(('inventory', field, getattr(summary, field), value))
+                setattr(summary, field, value)
+        if not dry_run:
+            summary.save()
+            if drift:
+                bus.publish_on_commit('resync', {})
+    return drift
+
+
+# Set while SparePartQuerySet.delete() runs, which adjusts rollups in aggregate
+_bulk_delete = threading.local()
+
+# update() arguments that change a part's rollup contribution
+ROLLUP_KWARGS = {'supplier', 'supplier_id', 'quantity', 'threshold'}
+
+
+class SparePartQuerySet(models.QuerySet):
+    def delete(self):
+        """Delete the parts, subtract them from the rollups in one aggregate step and log tombstones"""
+        with transaction.atomic():
+            delta = RollupDelta()
+            rows = self.order_by().values('supplier_id').annotate(
+                parts=Count('id'),
+                quantity_sum=Sum('quantity'),
+                low_stock=Count('id', filter=Q(quantity__lte=F('threshold'))),
+            )
+            for row in rows:
+                delta.add_totals(row['supplier_id'], -row['parts'], -(row['quantity_sum'] or 0), -row['low_stock'])
+            ids = list(self.values_list('id', flat=True))
+            _bulk_delete.active = True
+            try:
+                result = super().delete()
+            finally:
+                _bulk_delete.active = False
+            delta.apply()
+            PartDeletion.objects.bulk_create([PartDeletion(part_id=pk) for pk in ids], batch_size=5000)
+            PartChange.record(PartChange.DELETED, ids)
+        return result
+
+    def update(self, **kwargs):
+        """
+        Update the parts, keep the rollups in step and record a PartChange for each.
+
+        bulk_update() goes through here too. When quantity, threshold or the
+        supplier are written, the parts' rollup fields are read before and
+        after the UPDATE and the difference is applied in the same transaction.
+        """
+        with transaction.atomic():
+            if ROLLUP_KWARGS & kwargs.keys():
+                before = {
+                    pk: tuple(state)
+                    for pk, *state in self.select_for_update().values_list('id', *SparePart.ROLLUP_FIELDS)
+                }
+                ids = list(before)
+            else:
+                before = None
+                ids = list(self.values_list('id', flat=True))
+            rows = super().update(**kwargs)
+            if before:
+                delta = RollupDelta()
+                for start in range(0, len(ids), 5000):
+                    after = SparePart.objects.filter(pk__in=ids[start:start + 5000]).values_list(
+                        'id', *SparePart.ROLLUP_FIELDS,
+                    )
+                    for pk, *state in after:
+                        if before[pk] != tuple(state):
+                            delta.add(*before[pk], sign=-1)
+                            delta.add(*state)
+                delta.apply()
+            PartChange.record(PartChange.UPDATED, ids)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Insert the parts and record a PartChange for each"""
+        with transaction.atomic():
+            objs = super().bulk_create(objs, *args, **kwargs)
+            # Parts skipped by ignore_conflicts come back without a pk
+            PartChange.record(PartChange.CREATED, [obj.pk for obj in objs if obj.pk is not None])
+        return objs
+
+
+class VersionConflict(Exception):
+    """The part was changed by another write since it was read (see SparePart.version)"""
+
+    def __init__(self, part, expected_version):
+        super().__init__(f'{part.part_name} was changed since version {expected_version} was read')
+        self.part = part
+        self.expected_version = expected_version
 
 
 class SparePart(models.Model):
-    part_name = models.CharField(max_length=200)
+    # Fields covered by the fingerprint
+    FINGERPRINT_FIELDS = ('quantity', 'threshold', 'supplier', 'supplier_id')
+    # Fields that feed the supplier and inventory rollups
+    ROLLUP_FIELDS = ('supplier_id', 'quantity', 'threshold')
+
+    part_name = models.CharField(max_length=200, db_index=True)
     quantity = models.IntegerField(default=0)
     threshold = models.IntegerField(default=0)
-    supplier = models.CharField(max_length=200, blank=True)
+    supplier = models.ForeignKey(Supplier, on_delete=models.SET_NULL, null=True, blank=True, related_name='parts')
     updated_at = models.DateTimeField(auto_now=True)
+    # Hash of (quantity, threshold, supplier_id) used by imports to skip unchanged rows.
+    # NULL means unknown: set it to None in queryset.update() calls that change those fields.
+    fingerprint = models.BigIntegerField(null=True, blank=True, editable=False)
+    # Bumped by every write. save() only updates the row if it still has the
+    # version that was read and raises VersionConflict otherwise; bulk writes
+    # set version=F('version') + 1.
+    version = models.PositiveIntegerField(default=0)
+    # Hot parts take use/restock on CounterShard rows, folded into quantity
+    # periodically; the current stock is quantity plus the pending deltas.
+    hot = models.BooleanField(
+        default=False, help_text='Frequently used part: stock changes are counted in shards and folded in every minute',
+    )
+
+    objects = SparePartQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Delta sync reads parts changed after an (updated_at, id) watermark
+            models.Index(fields=['updated_at', 'id'], name='part_updated_id_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored values so save() can write only the changed
+        # fields and compute rollup deltas
+        instance._loaded_values = dict(zip(field_names, values))
+        instance._loaded_state = tuple(instance.__dict__.get(f, models.DEFERRED) for f in cls.ROLLUP_FIELDS)
+        return instance
+
+    @property
+    def supplier_name(self):
+        return self.supplier.name if self.supplier_id else ''
 
     def is_low(self):
         return self.quantity <= self.threshold
 
+    def compute_fingerprint(self):
+        return part_fingerprint(self.quantity, self.threshold, self.supplier_id)
+
+    def _stored_state(self):
+        """(supplier_id, quantity, threshold) as stored in the database, None for a new row"""
+        state = getattr(self, '_loaded_state', None)
+        if state is not None and models.DEFERRED not in state:
+            return state
+        if self.pk is None:
+            return None
+        return SparePart.objects.filter(pk=self.pk).values_list(*self.ROLLUP_FIELDS).first()
+
+    def changed_fields(self):
+        """Names of the fields set to other values than were read, None if the row was not read"""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return None
+        changed = []
+        for field in self._meta.concrete_fields:
+            if field.primary_key:
+                continue
+            if field.attname in loaded:
+                if getattr(self, field.attname) != loaded[field.attname]:
+                    changed.append(field.name)
+            elif field.attname in self.__dict__:
+                # Deferred when read, assigned since
+                changed.append(field.name)
+        return changed
+
+    def save(self, *args, **kwargs):
+        self.fingerprint = self.compute_fingerprint()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(self.FINGERPRINT_FIELDS):
+            update_fields = set(update_fields) | {'fingerprint'}
+
+        self._expected_version = None
+        if not self._state.adding:
+            if update_fields is None:
+                # Leave fields this instance did not change to concurrent writers
+                update_fields = self.changed_fields()
+            if update_fields is not None:
+                update_fields = set(update_fields) | {'version', 'updated_at'}
+            self._expected_version = self.version
+            self.version += 1
+        if update_fields is not None:
+            kwargs['update_fields'] = update_fields
+
+        try:
+            self._save_with_rollups(*args, **kwargs)
+        except VersionConflict:
+            self.version = self._expected_version
+            raise
+        finally:
+            self._expected_version = None
+        self._loaded_values = {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields if field.attname in self.__dict__
+        }
+
+    def _save_with_rollups(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        kind = PartChange.CREATED if self._state.adding else PartChange.UPDATED
+        current = (self.supplier_id, self.quantity, self.threshold)
+        if update_fields is not None:
+            written = {'supplier_id' if name == 'supplier' else name for name in update_fields}
+            if not written & set(self.ROLLUP_FIELDS):
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                    PartChange.record(kind, [self.pk])
+                return
+
+        with transaction.atomic():
+            old = self._stored_state()
+            new = current
+            if update_fields is not None and old is not None:
+                # Fields left out of update_fields keep their stored values
+                new = tuple(c if f in written else o for f, c, o in zip(self.ROLLUP_FIELDS, current, old))
+            super().save(*args, **kwargs)
+            PartChange.record(kind, [self.pk])
+            if old != new:
+                delta = RollupDelta()
+                if old is not None:
+                    delta.add(*old, sign=-1)
+                delta.add(*new)
+                delta.apply()
+            pending = 0
+            was_hot = self.hot or getattr(self, '_loaded_values', {}).get('hot')
+            quantity_written = old is not None and (update_fields is None or 'quantity' in written)
+            if quantity_written and was_hot:
+                # A written quantity replaces the counts not yet folded in
+                pending = CounterShard.take([self.pk]).get(self.pk, 0)
+            if quantity_written:
+                # ... and the changes spooled but not yet applied (imported here: spool.py imports models)
+                from .spool import discard
+                discard([self.pk])
+            # Usage history for forecasting
+            if old is not None and old[1] + pending != new[1]:
+                StockMovement.objects.create(part=self, delta=new[1] - old[1] - pending, quantity_after=new[1])
+        self._loaded_state = new
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        expected = getattr(self, '_expected_version', None)
+        if expected is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        # UPDATE ... WHERE id = <pk> AND version = <version read>
+        if super()._do_update(base_qs.filter(version=expected), using, pk_val, values, update_fields, forced_update):
+            return True
+        if base_qs.filter(pk=pk_val).exists():
+            raise VersionConflict(self, expected)
+        return False
+
     def __str__(self):
         return f"{self.part_name} ({self.quantity})"
 
 
+@receiver(post_delete, sender=SparePart)
+def _subtract_deleted_part(sender, instance, **kwargs):
+    # Queryset deletes adjust the rollups and record tombstones themselves
+    if getattr(_bulk_delete, 'active', False):
+        return
+    state = getattr(instance, '_loaded_state', None)
+    if state is None or models.DEFERRED in state:
+        state = (instance.supplier_id, instance.quantity, instance.threshold)
+    delta = RollupDelta()
+    delta.add(*state, sign=-1)
+    delta.apply()
+    PartDeletion.objects.create(part_id=instance.pk)
+    PartChange.record(PartChange.DELETED, [instance.pk])
+
+
+class PartDeletion(models.Model):
+    """Tombstone for a deleted part, read by delta sync (see sync.py)"""
+
+    part_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.part_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+
+class PartChange(models.Model):
+    """
+    Outbox row for a SparePart write, inserted in the writing transaction.
+
+    save(), deletes and the queryset update/delete/bulk writes each add one
+    row per part; consumers in outbox.py process them in id order.
+    """
+
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    KIND_CHOICES = [(CREATED, 'Created'), (UPDATED, 'Updated'), (DELETED, 'Deleted')]
+
+    part_id = models.BigIntegerField()
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"#{self.pk} {self.part_id} {self.kind}"
+
+    @classmethod
+    def record(cls, kind, part_ids):
+        """Add a change of the given kind for each part id"""
+        cls.objects.bulk_create([cls(part_id=pk, kind=kind) for pk in part_ids], batch_size=5000)
+
+
+class ConsumerCheckpoint(models.Model):
+    """Last PartChange processed by an outbox consumer (see outbox.py)"""
+
+    name = models.CharField(max_length=100, unique=True)
+    last_change_id = models.BigIntegerField(default=0)
+    # Set while a runner holds the consumer, so overlapping runs skip it
+    locked_until = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_change_id}"
+
+
+class CounterShard(models.Model):
+    """
+    One of HOT_PART_COUNTER_SLOTS counters of stock changes to a hot part.
+
+    Concurrent use/restock of a hot part add to a random slot instead of
+    all updating the part's row; fold_counters() (counters.py) moves the
+    sums into SparePart.quantity.
+    """
+
+    part = models.ForeignKey(SparePart, on_delete=models.CASCADE, related_name='counter_shards')
+    slot = models.PositiveSmallIntegerField()
+    delta = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['part', 'slot'], name='unique_counter_shard'),
+        ]
+
+    def __str__(self):
+        return f"{self.part_id}[{self.slot}]: {self.delta:+d}"
+
+    @classmethod
+    def add(cls, part_id, delta):
+        """Add a stock change to a random slot of the part"""
+        slot = random.randrange(settings.HOT_PART_COUNTER_SLOTS)
+        shard = cls.objects.filter(part_id=part_id, slot=slot)
+        if not shard.update(delta=F('delta') + delta):
+            # First change counted in this slot
+            cls.objects.bulk_create([cls(part_id=part_id, slot=slot)], ignore_conflicts=True)
+            shard.update(delta=F('delta') + delta)
+
+    @classmethod
+    def take(cls, part_ids=None):
+        """
+        Reset the counters of the given parts to zero. Must run in a transaction.
+
+        Args:
+            part_ids (iterable): Parts to take the counts of, None for all parts
+
+        Returns:
+            dict: part id -> sum of the counts taken, for parts with a non-zero sum
+        """
+        shards = cls.objects.select_for_update().exclude(delta=0)
+        if part_ids is not None:
+            shards = shards.filter(part_id__in=part_ids)
+        rows = list(shards.values_list('id', 'part_id', 'delta'))
+        if not rows:
+            return {}
+        cls.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(delta=0)
+        pending = defaultdict(int)
+        for _, part_id, delta in rows:
+            pending[part_id] += delta
+        return {part_id: delta for part_id, delta in pending.items() if delta}
+
+
+class SpoolCheckpoint(models.Model):
+    """Id of the last usage spool change applied, per spool file (see spool.py)"""
+
+    spool_id = models.CharField(max_length=36, unique=True)
+    last_event_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.spool_id}: {self.last_event_id}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Response of an applied stock movement batch, keyed by the client's
+    Idempotency-Key so a retried request is answered without applying the
+    batch twice (see movements.py).
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(max_length=100)
+    # SHA-256 of the request body, a reused key with another body is rejected
+    request_hash = models.CharField(max_length=64)
+    response = models.TextField()  # JSON body returned for the batch
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.created_at:%Y-%m-%d %H:%M})"
+
+
 class AlertLog(models.Model):
     """Log of low stock email alerts sent to administrators"""
     
@@ -30,7 +605,7 @@ class AlertLog(models.Model):
     part_name = models.CharField(max_length=200)  # Store part name for historical record
     quantity_at_alert = models.IntegerField()
     threshold_at_alert = models.IntegerField()
-    supplier = models.CharField(max_length=200, blank=True)
+    supplier = models.CharField(max_length=200, blank=True)  # Supplier name at the time of the alert
     alert_date = models.DateTimeField(default=timezone.now)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
     email_sent_to = models.TextField(blank=True)  # JSON string of recipient emails
@@ -52,6 +627,19 @@ class AlertLog(models.Model):
         self.save()
 
 
+@receiver(post_save, sender=AlertLog)
+def _publish_alert(sender, instance, created, **kwargs):
+    bus.publish_on_commit('alert', {
+        'id': instance.pk,
+        'part_name': instance.part_name,
+        'status': instance.status,
+        'quantity': instance.quantity_at_alert,
+        'threshold': instance.threshold_at_alert,
+        'alert_date': instance.alert_date.isoformat(),
+        'created': created,
+    })
+
+
 class DailyAlertLog(models.Model):
     """Track daily automated email alerts to prevent duplicates"""
     
@@ -73,3 +661,126 @@ class DailyAlertLog(models.Model):
     
     def __str__(self):
         return f"Daily Alert: {self.alert_date} - {self.low_stock_count} low stock items"
+
+
+class ImportJob(models.Model):
+    """Background import of an uploaded spare parts file"""
+
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+
+    file_path = models.CharField(max_length=500)
+    original_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='QUEUED', db_index=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed by the worker running the job on every progress report
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    total_rows = models.IntegerField(null=True, blank=True)
+    rows_processed = models.IntegerField(default=0)
+    created_count = models.IntegerField(default=0)
+    updated_count = models.IntegerField(default=0)
+    unchanged_count = models.IntegerField(default=0)
+    skipped_count = models.IntegerField(default=0)
+    errors = models.TextField(blank=True)  # JSON list of row error messages, cut to MAX_STORED_ERRORS
+    error_count = models.IntegerField(default=0)  # All row errors, including those not stored
+    error_message = models.TextField(blank=True)  # Fatal error that stopped the job
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Import Job'
+        verbose_name_plural = 'Import Jobs'
+
+    def __str__(self):
+        return f"Import #{self.pk}: {self.original_name} - {self.status}"
+
+    def is_finished(self):
+        return self.status in ('COMPLETED', 'FAILED')
+
+    def throughput(self):
+        """Rows processed per second since the job started"""
+        if not self.started_at:
+            return 0.0
+        elapsed = ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+        return round(self.rows_processed / elapsed, 1) if elapsed > 0 else 0.0
+
+
+class StockMovement(models.Model):
+    """A change in a part's quantity; negative deltas are usage"""
+
+    part = models.ForeignKey(SparePart, on_delete=models.CASCADE, related_name='movements')
+    delta = models.IntegerField()
+    quantity_after = models.IntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'part'], name='movement_created_part_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.part_id}: {self.delta:+d} -> {self.quantity_after}"
+
+
+class StockForecast(models.Model):
+    """Consumption rate and days of cover per part, recomputed by compute_forecasts"""
+
+    METHOD_CHOICES = [
+        ('MOVEMENTS', 'Stock movements'),
+        ('OBSERVATIONS', 'Quantity observations'),
+        ('NONE', 'No usage data'),
+    ]
+
+    part = models.OneToOneField(SparePart, on_delete=models.CASCADE, primary_key=True, related_name='forecast')
+    avg_daily_usage = models.FloatField(default=0)
+    smoothed_daily_usage = models.FloatField(default=0)
+    # NULL when the part has no measurable usage
+    days_of_cover = models.FloatField(null=True, blank=True, db_index=True)
+    stockout_date = models.DateField(null=True, blank=True)
+    method = models.CharField(max_length=20, choices=METHOD_CHOICES, default='NONE')
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['days_of_cover']
+        verbose_name = 'Stock Forecast'
+        verbose_name_plural = 'Stock Forecasts'
+
+    def __str__(self):
+        cover = f"{self.days_of_cover:.1f} days" if self.days_of_cover is not None else 'no usage'
+        return f"{self.part_id}: {cover}"
+
+
+class ReorderSuggestion(models.Model):
+    """Simulated reorder point per part, recomputed by simulate_reorder_points"""
+
+    part = models.OneToOneField(SparePart, on_delete=models.CASCADE, primary_key=True, related_name='reorder_suggestion')
+    current_threshold = models.IntegerField()
+    suggested_threshold = models.IntegerField()
+    lead_time_days = models.IntegerField()
+    daily_usage = models.FloatField()
+    # Share of scenarios where lead-time demand exceeds the current threshold
+    stockout_probability = models.FloatField(db_index=True)
+    # Share of scenarios where the current quantity runs out within the lead time
+    stockout_probability_now = models.FloatField()
+    scenarios = models.IntegerField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-stockout_probability']
+        verbose_name = 'Reorder Suggestion'
+        verbose_name_plural = 'Reorder Suggestions'
+
+    def __str__(self):
+        return f"{self.part_id}: {self.current_threshold} -> {self.suggested_threshold}"
+
+    @property
+    def threshold_change(self):
+        return self.suggested_threshold - self.current_threshold
+
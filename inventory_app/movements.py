@@ -0,0 +1,239 @@
+"""
+Batched stock movements for scanner-driven clients
+
+A client posts a list of {part_id, action, qty} movements with an
+Idempotency-Key. The batch is applied in one transaction: the movements of
+each part are folded into one F() expression and the whole batch is written
+with a single UPDATE (CASE per part), so the rollups get one delta and the
+usage history one bulk insert. Low stock alerts are evaluated once for the
+parts touched, after the transaction commits.
+
+The response is stored under the key in the same transaction, so a retried
+request (e.g. after a dropped connection) gets the original response back
+instead of moving stock twice.
+"""
+from datetime import timedelta
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from .counters import fold_counters
+from .models import IdempotencyKey, SparePart, StockMovement
+from .services import AlertService
+
+ACTIONS = ('use', 'restock', 'set')
+
+
+class MovementError(ValueError):
+    """The batch is malformed or refers to unknown parts; nothing was applied"""
+
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a different request body"""
+
+
+def parse_movements(payload):
+    """
+    Validate a batch payload.
+
+    Args:
+        payload: Decoded JSON, {"movements": [{"part_id", "action", "qty"}, ...]}
+
+    Returns:
+        list: (part_id, action, qty) tuples in request order
+
+    Raises:
+        MovementError: if the payload is not a valid batch
+    """
+    items = payload.get('movements') if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items:
+        raise MovementError('movements must be a non-empty list')
+    if len(items) > settings.MOVEMENT_BATCH_MAX:
+        raise MovementError(f'At most {settings.MOVEMENT_BATCH_MAX} movements per batch')
+
+    movements = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise MovementError(f'Movement {index}: expected an object')
+        part_id, action, qty = item.get('part_id'), item.get('action'), item.get('qty')
+        if action not in ACTIONS:
+            raise MovementError(f'Movement {index}: action must be one of {", ".join(ACTIONS)}')
+        # bool is an int subclass, but true/false is never a valid id or quantity
+        if not isinstance(part_id, int) or isinstance(part_id, bool):
+            raise MovementError(f'Movement {index}: part_id must be an integer')
+        if not isinstance(qty, int) or isinstance(qty, bool) or qty < 0:
+            raise MovementError(f'Movement {index}: qty must be a non-negative integer')
+        movements.append((part_id, action, qty))
+    return movements
+
+
+def _chain(chain, action, qty):
+    """
+    Add a movement to the change of one part in the batch.
+
+    A run of use/restock is quantity -> max(quantity + add, floor) (floor
+    None: no floor), a set makes the result a constant (base).
+
+    Args:
+        chain (tuple): (base, add, floor), base None for the stored quantity
+
+    Returns:
+        tuple: The chain with the movement applied
+    """
+    base, add, floor = chain
+    if action == 'set':
+        return qty, 0, None
+    if base is not None:
+        return _next_quantity(base, action, qty), 0, None
+    if action == 'use':
+        return None, add - qty, max(floor - qty, 0) if floor is not None else 0
+    return None, add + qty, floor + qty if floor is not None else None
+
+
+def _quantity_expression(chain):
+    base, add, floor = chain
+    if base is not None:
+        return Value(base)
+    expression = F('quantity') + add if add else F('quantity')
+    return Greatest(expression, Value(floor)) if floor is not None else expression
+
+
+def _next_quantity(quantity, action, qty):
+    """Python twin of _chain()"""
+    if action == 'use':
+        return max(quantity - qty, 0)
+    if action == 'restock':
+        return quantity + qty
+    return qty
+
+
+def apply_movements(movements):
+    """
+    Apply a batch of movements in one transaction.
+
+    Must be called inside transaction.atomic(); alerts are evaluated once
+    the outermost transaction commits.
+
+    Args:
+        movements (list): Result of parse_movements()
+
+    Returns:
+        list: SparePart instances touched by the batch, with their new values
+
+    Raises:
+        MovementError: if a part does not exist
+    """
+    part_ids = {part_id for part_id, _, _ in movements}
+    # Hot parts: the batch works on the exact quantity, fold their pending counts in first
+    fold_counters(SparePart.objects.filter(pk__in=part_ids, hot=True).values_list('id', flat=True))
+    stored = {
+        pk: (supplier_id, quantity, threshold)
+        for pk, supplier_id, quantity, threshold in SparePart.objects.select_for_update()
+        .filter(pk__in=part_ids).values_list('id', *SparePart.ROLLUP_FIELDS)
+    }
+    missing = part_ids - stored.keys()
+    if missing:
+        raise MovementError(f'Unknown part ids: {", ".join(map(str, sorted(missing)))}')
+
+    now = timezone.now()
+    quantities = {pk: state[1] for pk, state in stored.items()}
+    chains = {}
+    history = []
+    for part_id, action, qty in movements:
+        chains[part_id] = _chain(chains.get(part_id, (None, 0, None)), action, qty)
+        before = quantities[part_id]
+        quantities[part_id] = _next_quantity(before, action, qty)
+        if quantities[part_id] != before:
+            history.append(StockMovement(
+                part_id=part_id, delta=quantities[part_id] - before,
+                quantity_after=quantities[part_id], created_at=now,
+            ))
+
+    # One UPDATE for the batch, so the queryset reads the rollup fields and
+    # records the changes once. fingerprint=None: the stored hash no longer
+    # matches (see SparePart.fingerprint)
+    SparePart.objects.filter(pk__in=part_ids).update(
+        quantity=Case(*[When(pk=pk, then=_quantity_expression(chain)) for pk, chain in chains.items()]),
+        fingerprint=None, updated_at=now, version=F('version') + 1,
+    )
+    StockMovement.objects.bulk_create(history)
+    # Sets replace the changes spooled for the part (imported here: spool.py imports this module)
+    from .spool import discard
+    discard({part_id for part_id, action, _ in movements if action == 'set'})
+
+    parts = list(SparePart.objects.select_related('supplier').filter(pk__in=part_ids).order_by('id'))
+    changed = [part for part in parts if part.quantity != stored[part.pk][1]]
+    transaction.on_commit(lambda: AlertService.check_and_send_alerts(changed))
+    return parts
+
+
+def request_hash(body):
+    return hashlib.sha256(body).hexdigest()
+
+
+def replay(user, key, body):
+    """
+    Stored response for an idempotency key, or None if the key is new.
+
+    Raises:
+        IdempotencyConflict: if the key was used with a different body
+    """
+    record = IdempotencyKey.objects.filter(user=user, key=key).first()
+    if record is None:
+        return None
+    if record.request_hash != request_hash(body):
+        raise IdempotencyConflict(key)
+    return json.loads(record.response)
+
+
+def run_batch(user, key, body, movements, render):
+    """
+    Apply a batch once per idempotency key.
+
+    Args:
+        user: Requesting user, keys are scoped per user
+        key (str): Client-chosen idempotency key
+        body (bytes): Raw request body, a reused key must send the same body
+        movements (list): Result of parse_movements()
+        render (callable): Builds the JSON-serializable response from the
+            parts returned by apply_movements()
+
+    Returns:
+        tuple: (response data, replayed)
+
+    Raises:
+        MovementError: if a part does not exist
+        IdempotencyConflict: if the key was used with a different body
+    """
+    response = replay(user, key, body)
+    if response is not None:
+        return response, True
+    try:
+        with transaction.atomic():
+            response = render(apply_movements(movements))
+            IdempotencyKey.objects.create(
+                user=user, key=key, request_hash=request_hash(body), response=json.dumps(response),
+            )
+    except IntegrityError:
+        # A concurrent request with the same key committed first
+        response = replay(user, key, body)
+        if response is None:
+            raise
+        return response, True
+    return response, False
+
+
+def prune_idempotency_keys():
+    """
+    Delete idempotency keys older than IDEMPOTENCY_KEY_HOURS.
+
+    Returns:
+        int: number of keys deleted
+    """
+    cutoff = timezone.now() - timedelta(hours=settings.IDEMPOTENCY_KEY_HOURS)
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,143 @@
+"""
+Outbox consumers for part changes
+
+Every SparePart write adds a PartChange row in the same transaction:
+save(), single and queryset deletes, queryset update() (and so
+bulk_update()) and bulk_create(). Admin edits, imports, movement batches,
+counter folds and ad hoc ORM updates are all covered without each write
+path having to call the code that reacts to them.
+
+A consumer subclasses Consumer and is listed in OUTBOX_CONSUMERS.
+run_outbox_consumers hands each consumer the changes after its
+ConsumerCheckpoint in id order, in batches of Consumer.batch_size, and
+advances the checkpoint after each batch it handled. Delivery is at least
+once: a batch that raised, or whose runner died before the checkpoint was
+stored, is handed over again on the next run, so handle() must be safe to
+repeat. A new consumer starts after the last change made before it first
+ran. Changes every configured consumer has processed are deleted.
+
+SQLite serializes writers, so change ids are assigned in commit order and a
+checkpoint never skips a change committed late.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .counters import apply_pending
+from .models import ConsumerCheckpoint, PartChange, SparePart
+from .services import AlertService
+
+logger = logging.getLogger(__name__)
+
+
+class Consumer:
+    """Base class for outbox consumers, subclasses set name and implement handle()"""
+
+    # Key of the consumer's checkpoint, keep it when renaming the class
+    name = None
+    batch_size = 1000
+
+    def handle(self, changes):
+        """
+        Process a batch of changes.
+
+        Args:
+            changes (list): PartChange rows in id order; a part may appear
+                more than once, deleted parts no longer exist
+        """
+        raise NotImplementedError
+
+
+class LowStockAlertConsumer(Consumer):
+    """Raises and resolves low stock alerts for parts changed by any write path"""
+
+    name = 'low_stock_alerts'
+
+    def handle(self, changes):
+        # Alerts of deleted parts are deleted with them
+        part_ids = {change.part_id for change in changes if change.kind != PartChange.DELETED}
+        parts = list(SparePart.objects.select_related('supplier').filter(pk__in=part_ids))
+        # Alerts already pending or sent are not raised again
+        AlertService.check_and_send_alerts(apply_pending(parts))
+
+
+def configured_consumers():
+    """Instances of the consumers listed in OUTBOX_CONSUMERS"""
+    return [import_string(path)() for path in settings.OUTBOX_CONSUMERS]
+
+
+def run_consumer(consumer):
+    """
+    Hand a consumer every change after its checkpoint.
+
+    Args:
+        consumer (Consumer): Consumer to run
+
+    Returns:
+        int: Number of changes processed, 0 if another runner holds the consumer
+    """
+    checkpoint, _ = ConsumerCheckpoint.objects.get_or_create(
+        name=consumer.name,
+        defaults={'last_change_id': PartChange.objects.aggregate(last=Max('id'))['last'] or 0},
+    )
+    lease = timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+    claimed = ConsumerCheckpoint.objects.filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=timezone.now()), pk=checkpoint.pk,
+    ).update(locked_until=timezone.now() + lease)
+    if not claimed:
+        return 0
+
+    processed = 0
+    try:
+        last_change_id = ConsumerCheckpoint.objects.values_list('last_change_id', flat=True).get(pk=checkpoint.pk)
+        while True:
+            changes = list(PartChange.objects.filter(id__gt=last_change_id).order_by('id')[:consumer.batch_size])
+            if not changes:
+                break
+            consumer.handle(changes)
+            last_change_id = changes[-1].id
+            ConsumerCheckpoint.objects.filter(pk=checkpoint.pk).update(
+                last_change_id=last_change_id, locked_until=timezone.now() + lease, updated_at=timezone.now(),
+            )
+            processed += len(changes)
+    except Exception:
+        logger.exception(f'Outbox consumer {consumer.name} failed after change {last_change_id}')
+    finally:
+        ConsumerCheckpoint.objects.filter(pk=checkpoint.pk).update(locked_until=None)
+    return processed
+
+
+def prune_changes(consumers):
+    """
+    Delete the changes every consumer has processed.
+
+    Args:
+        consumers (list): Consumer instances
+
+    Returns:
+        int: Number of changes deleted
+    """
+    # A consumer without a checkpoint starts after the latest change when it first runs
+    processed = (
+        ConsumerCheckpoint.objects.filter(name__in=[consumer.name for consumer in consumers])
+        .aggregate(last=Min('last_change_id'))['last']
+    )
+    qs = PartChange.objects.all() if processed is None else PartChange.objects.filter(id__lte=processed)
+    deleted, _ = qs.delete()
+    return deleted
+
+
+def run_consumers():
+    """
+    Run every configured consumer once, then prune the processed changes.
+
+    Returns:
+        dict: consumer name -> number of changes processed
+    """
+    consumers = configured_consumers()
+    results = {consumer.name: run_consumer(consumer) for consumer in consumers}
+    prune_changes(consumers)
+    return results
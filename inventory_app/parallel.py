@@ -0,0 +1,30 @@
+"""
+Process pool helpers shared by the import pipeline and purchase orders
+"""
+
+
+def ordered_imap(pool, fn, tasks, window):
+    """
+    Like pool.map but with at most `window` tasks in flight.
+
+    Results are yielded in task order, so memory stays bounded by the
+    window instead of growing with the input.
+
+    Args:
+        pool (Executor): Pool the tasks are submitted to
+        fn (callable): Picklable function applied to each task
+        tasks (iterable): Task arguments, consumed lazily
+        window (int): Most tasks submitted but not yet yielded
+    """
+    pending = []
+    tasks = iter(tasks)
+    for task in tasks:
+        pending.append(pool.submit(fn, task))
+        if len(pending) >= window:
+            break
+    while pending:
+        future = pending.pop(0)
+        for task in tasks:
+            pending.append(pool.submit(fn, task))
+            break
+        yield future.result()
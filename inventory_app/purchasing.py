@@ -0,0 +1,157 @@
+"""
+Purchase orders for low stock parts, one per supplier
+
+Low stock parts are read in a single query ordered by supplier and grouped
+as the rows stream in. Each group becomes a purchase order rendered as CSV
+and PDF, and the documents are written into a ZIP file as they come back.
+Only the orders in flight are held in memory. The admin download renders
+in the web process; the export_purchase_orders command renders with a pool
+of worker processes (rendering is pure Python and CPU-bound).
+
+Order quantities restock a part to its threshold plus a buffer of
+PURCHASE_ORDER_BUFFER x threshold (at least one unit).
+"""
+from concurrent.futures import ProcessPoolExecutor
+import csv
+from io import BytesIO, StringIO
+from itertools import groupby
+import math
+import zipfile
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from .exporters import pdf_canvas
+from .models import SparePart
+from .parallel import ordered_imap
+
+UNASSIGNED_SUPPLIER = 'Unassigned'
+
+
+def order_quantity(quantity, threshold, buffer_ratio):
+    """Units needed to bring a part back to its threshold plus the buffer"""
+    target = threshold + max(1, math.ceil(threshold * buffer_ratio))
+    return max(target - quantity, 0)
+
+
+def supplier_orders(buffer_ratio=None):
+    """
+    Yield one purchase order spec per supplier with low stock parts.
+
+    Args:
+        buffer_ratio (float): Share of the threshold ordered on top of it
+            (default PURCHASE_ORDER_BUFFER)
+
+    Yields:
+        tuple: (po_number, supplier_name, issued, lines) where lines is a list
+            of (part_name, quantity, threshold, order_quantity)
+    """
+    buffer_ratio = settings.PURCHASE_ORDER_BUFFER if buffer_ratio is None else buffer_ratio
+    issued = timezone.localdate()
+    rows = (
+        SparePart.objects.filter(quantity__lte=F('threshold'))
+        .order_by(F('supplier__name').asc(nulls_last=True), 'part_name')
+        .values_list('supplier_id', 'supplier__name', 'part_name', 'quantity', 'threshold')
+    )
+    for (supplier_id, supplier_name), group in groupby(rows.iterator(chunk_size=5000), key=lambda row: row[:2]):
+        lines = [
+            (part_name, quantity, threshold, order_quantity(quantity, threshold, buffer_ratio))
+            for _, _, part_name, quantity, threshold in group
+        ]
+        po_number = f'PO-{issued:%Y%m%d}-{supplier_id:05d}' if supplier_id else f'PO-{issued:%Y%m%d}-UNASSIGNED'
+        yield po_number, supplier_name or UNASSIGNED_SUPPLIER, issued, lines
+
+
+def render_purchase_order(spec):
+    """
+    Render one purchase order as CSV and PDF.
+
+    Runs in worker processes, so it only touches the spec it is given.
+
+    Returns:
+        tuple: (po_number, supplier_name, line count, units, csv bytes, pdf bytes)
+    """
+    po_number, supplier_name, issued, lines = spec
+    units = sum(line[3] for line in lines)
+
+    text = StringIO()
+    writer = csv.writer(text)
+    writer.writerow(['PO Number', 'Supplier', 'Issued', 'Part Name', 'On Hand', 'Threshold', 'Order Quantity'])
+    for part_name, quantity, threshold, order in lines:
+        writer.writerow([po_number, supplier_name, issued.isoformat(), part_name, quantity, threshold, order])
+
+    buffer = BytesIO()
+    p = pdf_canvas(buffer)
+    p.setTitle(po_number)
+
+    def header(y):
+        p.setFont('Helvetica-Bold', 14)
+        p.drawString(40, y, f'Purchase Order {po_number}')
+        p.setFont('Helvetica', 11)
+        p.drawString(40, y - 20, f'Supplier: {supplier_name}')
+        p.drawString(40, y - 36, f'Issued: {issued:%B %d, %Y}')
+        p.setFont('Helvetica-Bold', 10)
+        y -= 66
+        p.drawString(40, y, 'Part Name')
+        p.drawRightString(400, y, 'On Hand')
+        p.drawRightString(470, y, 'Threshold')
+        p.drawRightString(550, y, 'Order Qty')
+        p.setFont('Helvetica', 10)
+        return y - 18
+
+    y = header(800)
+    for part_name, quantity, threshold, order in lines:
+        p.drawString(40, y, part_name[:60])
+        p.drawRightString(400, y, str(quantity))
+        p.drawRightString(470, y, str(threshold))
+        p.drawRightString(550, y, str(order))
+        y -= 16
+        if y < 60:
+            p.showPage()
+            y = header(800)
+    p.setFont('Helvetica-Bold', 10)
+    p.drawString(40, y - 8, f'{len(lines)} line{"s" if len(lines) != 1 else ""}, {units} units')
+    p.save()
+
+    return po_number, supplier_name, len(lines), units, text.getvalue().encode(), buffer.getvalue()
+
+
+def write_purchase_orders_zip(fileobj, workers=None, buffer_ratio=None):
+    """
+    Write every supplier's purchase order into a ZIP archive.
+
+    The archive holds <po>.csv and <po>.pdf per supplier plus summary.csv.
+
+    Args:
+        fileobj: Writable binary file for the archive
+        workers (int): Rendering processes, 1 renders in-process
+            (default PURCHASE_ORDER_WORKERS)
+        buffer_ratio (float): See supplier_orders()
+
+    Returns:
+        dict: orders, lines and units written
+    """
+    workers = workers or settings.PURCHASE_ORDER_WORKERS
+    specs = supplier_orders(buffer_ratio)
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    documents = ordered_imap(pool, render_purchase_order, specs, workers * 2) if pool else map(render_purchase_order, specs)
+
+    summary = StringIO()
+    summary_writer = csv.writer(summary)
+    summary_writer.writerow(['PO Number', 'Supplier', 'Lines', 'Units'])
+    totals = {'orders': 0, 'lines': 0, 'units': 0}
+    try:
+        with zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for po_number, supplier_name, line_count, units, csv_bytes, pdf_bytes in documents:
+                archive.writestr(f'{po_number}.csv', csv_bytes)
+                # PDFs are already compressed
+                archive.writestr(f'{po_number}.pdf', pdf_bytes, compress_type=zipfile.ZIP_STORED)
+                summary_writer.writerow([po_number, supplier_name, line_count, units])
+                totals['orders'] += 1
+                totals['lines'] += line_count
+                totals['units'] += units
+            archive.writestr('summary.csv', summary.getvalue())
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+    return totals
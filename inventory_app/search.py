@@ -0,0 +1,181 @@
+"""
+Full-text search over spare part names and suppliers
+
+On SQLite, part names and supplier names are indexed in an FTS5 table that
+triggers keep in sync with the parts and suppliers tables (migrations 0006
+and 0007). Migrations that rebuild either table would trip over those
+triggers, so migrate runs with legacy_alter_table enabled and
+ensure_search_index() reinstalls any trigger dropped along the way.
+
+Each search term is matched as a prefix and results are ranked with bm25,
+so lookups stay fast as the catalog grows. Other databases fall back to
+icontains filtering.
+"""
+import re
+
+from django.db import connection, connections, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from .models import SparePart
+
+FTS_TABLE = 'inventory_app_sparepart_fts'
+
+# bm25 column weights: a hit in the part name outranks a hit in the supplier
+PART_NAME_WEIGHT = 10.0
+SUPPLIER_WEIGHT = 1.0
+
+# Most results returned by the search endpoint
+MAX_RESULTS = 100
+
+SUPPLIER_NAME_SQL = "COALESCE((SELECT name FROM inventory_app_supplier WHERE id = new.supplier_id), '')"
+
+TRIGGERS = {
+    'inventory_app_sparepart_fts_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS inventory_app_sparepart_fts_insert
+        AFTER INSERT ON inventory_app_sparepart BEGIN
+            INSERT INTO {FTS_TABLE} (rowid, part_name, supplier)
+            VALUES (new.id, new.part_name, {SUPPLIER_NAME_SQL});
+        END
+    """,
+    'inventory_app_sparepart_fts_update': f"""
+        CREATE TRIGGER IF NOT EXISTS inventory_app_sparepart_fts_update
+        AFTER UPDATE OF part_name, supplier_id ON inventory_app_sparepart BEGIN
+            UPDATE {FTS_TABLE} SET part_name = new.part_name, supplier = {SUPPLIER_NAME_SQL}
+            WHERE rowid = old.id;
+        END
+    """,
+    'inventory_app_sparepart_fts_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS inventory_app_sparepart_fts_delete
+        AFTER DELETE ON inventory_app_sparepart BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        END
+    """,
+    'inventory_app_supplier_fts_rename': f"""
+        CREATE TRIGGER IF NOT EXISTS inventory_app_supplier_fts_rename
+        AFTER UPDATE OF name ON inventory_app_supplier BEGIN
+            UPDATE {FTS_TABLE} SET supplier = new.name
+            WHERE rowid IN (SELECT id FROM inventory_app_sparepart WHERE supplier_id = new.id);
+        END
+    """,
+}
+
+REBUILD_SQL = [
+    f'DELETE FROM {FTS_TABLE}',
+    f"""
+    INSERT INTO {FTS_TABLE} (rowid, part_name, supplier)
+    SELECT p.id, p.part_name, COALESCE(s.name, '')
+    FROM inventory_app_sparepart p LEFT JOIN inventory_app_supplier s ON s.id = p.supplier_id
+    """,
+]
+
+
+def fts_enabled():
+    """True when the default database has the FTS5 index"""
+    return connection.vendor == 'sqlite'
+
+
+def prepare_migrate(using='default', **kwargs):
+    """
+    Connected to pre_migrate.
+
+    SQLite rebuilds a table for most schema changes (create new table, copy,
+    drop, rename). With legacy_alter_table off, the final rename re-checks
+    every trigger and fails while a trigger body names the dropped table.
+    """
+    conn = connections[using]
+    if conn.vendor == 'sqlite':
+        with conn.cursor() as cursor:
+            cursor.execute('PRAGMA legacy_alter_table = ON')
+
+
+def ensure_search_index(using='default', **kwargs):
+    """
+    Reinstall missing index triggers and rebuild the index if any were missing.
+
+    Connected to post_migrate. Does nothing until the migrations creating the
+    index and the supplier table have run.
+    """
+    conn = connections[using]
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        cursor.execute('PRAGMA legacy_alter_table = OFF')
+        tables = set(conn.introspection.table_names(cursor))
+        if not {FTS_TABLE, 'inventory_app_supplier', 'inventory_app_sparepart'} <= tables:
+            return
+        columns = {c.name for c in conn.introspection.get_table_description(cursor, 'inventory_app_sparepart')}
+        if 'supplier_id' not in columns:
+            return
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        missing = set(TRIGGERS) - {row[0] for row in cursor.fetchall()}
+        if not missing:
+            return
+        with transaction.atomic(using=using):
+            for name in missing:
+                cursor.execute(TRIGGERS[name])
+            for sql in REBUILD_SQL:
+                cursor.execute(sql)
+
+
+def build_match_query(text):
+    """
+    Turn free text into an FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term and all terms must match, so
+    "hydr bear" finds "Hydraulic Bearing". Punctuation is dropped the same
+    way the unicode61 tokenizer drops it when indexing.
+
+    Returns:
+        str: MATCH expression, or '' if the text has no searchable words
+    """
+    terms = re.findall(r'\w+', text.lower())
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def filter_parts(queryset, text):
+    """
+    Restrict a SparePart queryset to parts matching the search text.
+
+    The match runs as an id subquery against the index, so it composes with
+    other filters, ordering and pagination without loading ids into Python.
+    """
+    match = build_match_query(text)
+    if not match:
+        return queryset
+    if not fts_enabled():
+        q = Q()
+        for term in text.split():
+            q &= Q(part_name__icontains=term) | Q(supplier__name__icontains=term)
+        return queryset.filter(q)
+    return queryset.filter(
+        id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+    )
+
+
+def search_parts(text, limit=20):
+    """
+    Ranked search for parts by name and supplier.
+
+    Args:
+        text (str): Free text, each word is matched as a prefix
+        limit (int): Maximum number of results
+
+    Returns:
+        list: SparePart instances, best match first
+    """
+    match = build_match_query(text)
+    if not match or limit <= 0:
+        return []
+    if not fts_enabled():
+        return list(filter_parts(SparePart.objects.all(), text).order_by('part_name')[:limit])
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY bm25({FTS_TABLE}, %s, %s) LIMIT %s',
+            [match, PART_NAME_WEIGHT, SUPPLIER_WEIGHT, limit],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+
+    parts = SparePart.objects.select_related('supplier').in_bulk(ids)
+    return [parts[pk] for pk in ids if pk in parts]
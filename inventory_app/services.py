@@ -42,13 +42,44 @@ class AlertService:
             logger.info(f"Skipping duplicate alert for {spare_part.part_name}")
             return False
         
+        return AlertService._raise_alert(spare_part)
+
+    @staticmethod
+    def check_and_send_alerts(spare_parts):
+        """
+        check_and_send_alert() for many parts with one query per step.
+
+        Args:
+            spare_parts (iterable): SparePart instances with current values
+
+        Returns:
+            int: Number of alerts sent
+        """
+        low = []
+        restocked = []
+        for part in spare_parts:
+            (low if part.is_low() else restocked).append(part)
+
+        for alert in AlertLog.objects.filter(spare_part__in=restocked, status__in=['PENDING', 'SENT']):
+            alert.mark_resolved()
+            logger.info(f"Resolved alert {alert.id} for {alert.part_name}")
+
+        alerted = set(
+            AlertLog.objects.filter(spare_part__in=low, status__in=['PENDING', 'SENT'])
+            .values_list('spare_part_id', flat=True)
+        )
+        return sum(AlertService._raise_alert(part) for part in low if part.pk not in alerted)
+
+    @staticmethod
+    def _raise_alert(spare_part):
+        """Log and email a new low stock alert, returns True if the email was sent"""
         # Create alert log entry
         alert_log = AlertLog.objects.create(
             spare_part=spare_part,
             part_name=spare_part.part_name,
             quantity_at_alert=spare_part.quantity,
             threshold_at_alert=spare_part.threshold,
-            supplier=spare_part.supplier,
+            supplier=spare_part.supplier_name,
         )
         
         # Send the email alert
@@ -127,7 +158,7 @@ Part Details:
 Part Name: {spare_part.part_name}
 Current Quantity: {spare_part.quantity}
 Minimum Threshold: {spare_part.threshold}
-Supplier Name: {spare_part.supplier or 'Not specified'}
+Supplier Name: {spare_part.supplier_name or 'Not specified'}
 Last Updated: {spare_part.updated_at.strftime('%Y-%m-%d %H:%M:%S')}
 
 SUGGESTED ACTION:
@@ -0,0 +1,165 @@
+"""
+Monte Carlo reorder point simulation
+
+For every part with a forecast usage rate (see forecasting.py), thousands of
+demand scenarios over the supplier lead time are drawn as one NumPy array of
+shape (parts, scenarios, days):
+
+- each scenario scales the forecast rate by a gamma factor with mean 1, so
+  the rate itself is uncertain (SIMULATION_DEMAND_SHAPE)
+- daily demand is Poisson around that rate
+
+The lead-time demand distribution gives the probability that the current
+threshold (the reorder point) is exceeded before a reorder arrives, and the
+threshold that meets SIMULATION_SERVICE_LEVEL.
+
+Parts are grouped by lead time and simulated in chunks of at most
+SIMULATION_MAX_CELLS cells, optionally across a process pool. Chunks are
+seeded from (seed, chunk index), so results do not depend on the number of
+workers.
+"""
+from multiprocessing import Pool
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .forecasting import fetch_columns
+from .models import ReorderSuggestion, StockForecast, Supplier
+
+
+def simulate_chunk(spec):
+    """
+    Simulate lead-time demand for one chunk of parts sharing a lead time.
+
+    Args:
+        spec (tuple): (seed, chunk_index, lead_time, rates, thresholds,
+            quantities, scenarios, shape, service_level)
+
+    Returns:
+        tuple: (suggested, stockout_probability, stockout_probability_now)
+            arrays aligned with the chunk's parts
+    """
+    seed, chunk_index, lead_time, rates, thresholds, quantities, scenarios, shape, service_level = spec
+    rng = np.random.default_rng([seed, chunk_index])
+
+    rate_scale = rng.gamma(shape, 1.0 / shape, size=(len(rates), scenarios, 1))
+    demand = rng.poisson(rates[:, None, None] * rate_scale, size=(len(rates), scenarios, lead_time))
+    lead_demand = demand.sum(axis=2)
+
+    suggested = np.ceil(np.quantile(lead_demand, service_level, axis=1)).astype(np.int64)
+    stockout_probability = (lead_demand > thresholds[:, None]).mean(axis=1)
+    stockout_probability_now = (lead_demand > quantities[:, None]).mean(axis=1)
+    return suggested, stockout_probability, stockout_probability_now
+
+
+def load_candidates():
+    """
+    Parts with a positive forecast usage rate, sorted by lead time.
+
+    Returns:
+        tuple: (part_ids, rates, quantities, thresholds, lead_times) arrays
+    """
+    default_lead_time = Supplier._meta.get_field('lead_time_days').default
+    rows = StockForecast.objects.filter(smoothed_daily_usage__gt=0).order_by().values_list(
+        'part_id', 'smoothed_daily_usage', 'part__quantity', 'part__threshold',
+        Coalesce('part__supplier__lead_time_days', Value(default_lead_time)),
+    )
+    part_ids, rates, quantities, thresholds, lead_times = fetch_columns(
+        rows, [np.int64, np.float64, np.int64, np.int64, np.int64],
+    )
+    lead_times = np.maximum(lead_times, 1)
+    order = np.argsort(lead_times, kind='stable')
+    return part_ids[order], rates[order], quantities[order], thresholds[order], lead_times[order]
+
+
+def build_specs(lead_times, rates, thresholds, quantities, scenarios, shape, service_level, seed, max_cells):
+    """Split parts into chunks of one lead time and at most max_cells cells each"""
+    specs = []
+    slices = []
+    boundaries = np.flatnonzero(np.diff(lead_times)) + 1
+    for group in np.split(np.arange(len(lead_times)), boundaries):
+        if not len(group):
+            continue
+        lead_time = int(lead_times[group[0]])
+        size = max(1, max_cells // (scenarios * lead_time))
+        for start in range(group[0], group[-1] + 1, size):
+            stop = min(start + size, group[-1] + 1)
+            specs.append((
+                seed, len(specs), lead_time, rates[start:stop], thresholds[start:stop],
+                quantities[start:stop], scenarios, shape, service_level,
+            ))
+            slices.append(slice(start, stop))
+    return specs, slices
+
+
+def simulate_reorder_points(scenarios=None, service_level=None, workers=None, seed=42, max_cells=None):
+    """
+    Recompute ReorderSuggestion for every part with forecast usage.
+
+    Args:
+        scenarios (int): Demand scenarios per part (default SIMULATION_SCENARIOS)
+        service_level (float): Target probability of no stock-out during the
+            lead time (default SIMULATION_SERVICE_LEVEL)
+        workers (int): Worker processes, 1 simulates in-process
+            (default SIMULATION_WORKERS)
+        seed (int): Random seed
+        max_cells (int): Most parts x scenarios x days cells per chunk
+            (default SIMULATION_MAX_CELLS)
+
+    Returns:
+        dict: parts, raise_threshold, lower_threshold, at_risk, chunks and seconds
+    """
+    scenarios = scenarios or settings.SIMULATION_SCENARIOS
+    service_level = service_level or settings.SIMULATION_SERVICE_LEVEL
+    workers = workers or settings.SIMULATION_WORKERS
+    max_cells = max_cells or settings.SIMULATION_MAX_CELLS
+    started = time.perf_counter()
+
+    part_ids, rates, quantities, thresholds, lead_times = load_candidates()
+    specs, slices = build_specs(
+        lead_times, rates, thresholds, quantities, scenarios,
+        settings.SIMULATION_DEMAND_SHAPE, service_level, seed, max_cells,
+    )
+
+    suggested = np.zeros(len(part_ids), dtype=np.int64)
+    probability = np.zeros(len(part_ids))
+    probability_now = np.zeros(len(part_ids))
+    if workers > 1 and len(specs) > 1:
+        with Pool(processes=workers) as pool:
+            results = pool.imap(simulate_chunk, specs)
+            for part_slice, result in zip(slices, results):
+                suggested[part_slice], probability[part_slice], probability_now[part_slice] = result
+    else:
+        for part_slice, spec in zip(slices, specs):
+            suggested[part_slice], probability[part_slice], probability_now[part_slice] = simulate_chunk(spec)
+
+    now = timezone.now()
+    with transaction.atomic():
+        ReorderSuggestion.objects.all().delete()
+        ReorderSuggestion.objects.bulk_create(
+            (
+                ReorderSuggestion(
+                    part_id=part_id, current_threshold=threshold, suggested_threshold=suggestion,
+                    lead_time_days=lead_time, daily_usage=rate, stockout_probability=p,
+                    stockout_probability_now=p_now, scenarios=scenarios, computed_at=now,
+                )
+                for part_id, threshold, suggestion, lead_time, rate, p, p_now in zip(
+                    part_ids.tolist(), thresholds.tolist(), suggested.tolist(), lead_times.tolist(),
+                    rates.tolist(), probability.tolist(), probability_now.tolist(),
+                )
+            ),
+            batch_size=5000,
+        )
+
+    return {
+        'parts': len(part_ids),
+        'raise_threshold': int((suggested > thresholds).sum()),
+        'lower_threshold': int((suggested < thresholds).sum()),
+        'at_risk': int((probability > 1 - service_level).sum()),
+        'chunks': len(specs),
+        'seconds': time.perf_counter() - started,
+    }
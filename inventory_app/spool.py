@@ -0,0 +1,191 @@
+"""
+Write-behind spool for technician stock changes
+
+With USAGE_SPOOL_PATH set, use/restock from the technician dashboard are not
+written to the inventory database during the request. Each change is
+appended as one row to a separate SQLite file (WAL, synchronous=FULL, so an
+appended change survives a crash), and run_usage_flusher applies the spooled
+changes in batches: the changes of a batch are summed per part and applied
+with movements.apply_movements(), so a burst of changes becomes one write
+transaction on the inventory database, and low stock alerts are evaluated on
+the summed result.
+
+A set, a movement batch set, a part edit or an import writes an absolute
+quantity; it replaces the changes spooled for the part before it, which are
+discarded when the writing transaction commits (a rolled back write keeps
+them).
+
+The id of the last change applied is stored in the inventory database in
+the same transaction as the batch (SpoolCheckpoint); spooled changes up to
+it are deleted afterwards. If the flusher dies in between, the next flush
+deletes them instead of applying them twice, and changes that were never
+applied are flushed on the next run.
+"""
+import logging
+import sqlite3
+import threading
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from .models import SparePart, SpoolCheckpoint
+from .movements import apply_movements
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS spool_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS usage_event (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    part_id INTEGER NOT NULL,
+    delta INTEGER NOT NULL,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS usage_event_part ON usage_event (part_id);
+"""
+
+
+def enabled():
+    return bool(settings.USAGE_SPOOL_PATH)
+
+
+def _connect():
+    """This thread's connection to the spool file, created with its schema on first use"""
+    path = settings.USAGE_SPOOL_PATH
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.path == path:
+        return conn
+    # Autocommit: every append is its own durable transaction
+    conn = sqlite3.connect(path, timeout=20, isolation_level=None)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = FULL')
+    conn.executescript(SCHEMA)
+    # The id tells spool files apart, event ids restart in a new file
+    conn.execute("INSERT OR IGNORE INTO spool_meta (key, value) VALUES ('spool_id', ?)", (str(uuid.uuid4()),))
+    _local.conn, _local.path = conn, path
+    _local.spool_id = conn.execute("SELECT value FROM spool_meta WHERE key = 'spool_id'").fetchone()[0]
+    return conn
+
+
+def append(part_id, delta):
+    """
+    Spool one stock change.
+
+    Args:
+        part_id (int): Part changed
+        delta (int): Quantity added (restock) or, when negative, used
+    """
+    _connect().execute('INSERT INTO usage_event (part_id, delta) VALUES (?, ?)', (part_id, delta))
+
+
+def pending(part_ids):
+    """
+    Spooled changes not yet applied.
+
+    Args:
+        part_ids (iterable): Part ids
+
+    Returns:
+        dict: part id -> sum of the spooled deltas, for parts with spooled changes
+    """
+    part_ids = list(part_ids)
+    if not part_ids:
+        return {}
+    rows = _connect().execute(
+        f'SELECT part_id, SUM(delta) FROM usage_event WHERE part_id IN ({", ".join("?" * len(part_ids))}) '
+        f'GROUP BY part_id', part_ids,
+    )
+    return {part_id: delta for part_id, delta in rows if delta}
+
+
+def apply_spooled(parts):
+    """
+    Add the spooled changes to the quantity of the parts, for display.
+
+    The instances must not be saved afterwards.
+
+    Args:
+        parts (list): SparePart instances
+
+    Returns:
+        list: The same parts
+    """
+    spooled = pending(part.pk for part in parts)
+    for part in parts:
+        part.quantity = max(part.quantity + spooled.get(part.pk, 0), 0)
+    return parts
+
+
+def discard(part_ids):
+    """
+    Drop the spooled changes of parts whose quantity is being written.
+
+    Call it inside the writing transaction, after the write. The spool file
+    commits on its own, so the changes spooled up to now are only deleted
+    once the inventory transaction commits; if it rolls back they are kept.
+    Changes spooled after this call still apply on top of the written
+    quantity. Only this server's spool file is seen.
+
+    Args:
+        part_ids (iterable): Part ids
+    """
+    part_ids = list(part_ids)
+    if not enabled() or not part_ids:
+        return
+    watermark = _connect().execute('SELECT MAX(id) FROM usage_event').fetchone()[0]
+    if watermark is None:
+        return
+    transaction.on_commit(lambda: _discard_through(part_ids, watermark))
+
+
+def _discard_through(part_ids, watermark):
+    dropped = _connect().execute(
+        f'DELETE FROM usage_event WHERE id <= ? AND part_id IN ({", ".join("?" * len(part_ids))})',
+        [watermark, *part_ids],
+    ).rowcount
+    if dropped:
+        logger.info(f'Discarded {dropped} spooled change(s) replaced by a quantity write')
+
+
+def flush(limit=None):
+    """
+    Apply the next batch of spooled changes to the inventory.
+
+    Args:
+        limit (int): Most changes applied, defaults to USAGE_SPOOL_BATCH_SIZE
+
+    Returns:
+        tuple: (changes applied, parts changed)
+    """
+    conn = _connect()
+    limit = limit or settings.USAGE_SPOOL_BATCH_SIZE
+    with transaction.atomic():
+        # The row lock keeps concurrent flushers from applying the same changes
+        checkpoint, _ = SpoolCheckpoint.objects.select_for_update().get_or_create(spool_id=_local.spool_id)
+        # Left behind if a flusher died between committing a batch and deleting it
+        conn.execute('DELETE FROM usage_event WHERE id <= ?', (checkpoint.last_event_id,))
+        events = conn.execute(
+            'SELECT id, part_id, delta FROM usage_event WHERE id > ? ORDER BY id LIMIT ?',
+            (checkpoint.last_event_id, limit),
+        ).fetchall()
+        if not events:
+            return 0, 0
+
+        totals = {}
+        for _, part_id, delta in events:
+            totals[part_id] = totals.get(part_id, 0) + delta
+        existing = set(SparePart.objects.filter(pk__in=totals).values_list('id', flat=True))
+        if len(existing) < len(totals):
+            logger.warning(f'Dropping spooled changes of deleted parts: {sorted(totals.keys() - existing)}')
+        movements = [
+            (part_id, 'restock' if total > 0 else 'use', abs(total))
+            for part_id, total in sorted(totals.items()) if total and part_id in existing
+        ]
+        if movements:
+            apply_movements(movements)
+        checkpoint.last_event_id = events[-1][0]
+        checkpoint.save()
+    conn.execute('DELETE FROM usage_event WHERE id <= ?', (checkpoint.last_event_id,))
+    return len(events), len(movements)
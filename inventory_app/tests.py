@@ -0,0 +1,820 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from . import jsonstream, outbox, spool
+from .admin import SparePartAdminForm
+from .analytics import compute_insights
+from .counters import apply_pending, fold_counters, pending_quantities, record_movement
+from .forecasting import compute_forecasts
+from .importer import run_import, upsert_batch
+from .jsonstream import JSONStreamReader, NoRecordArray
+from .models import (
+    AlertLog, ConsumerCheckpoint, CounterShard, InventorySummary, PartChange, SparePart, StockForecast,
+    StockMovement, Supplier, VersionConflict, rebuild_rollups,
+)
+from .movements import apply_movements
+from .sync import CursorExpired, InvalidCursor, changes_since, decode_cursor, encode_cursor, parse_since
+
+
+class SpooledChangesReplacedByQuantityWritesTests(TestCase):
+    """An absolute quantity write replaces the use/restock still in the usage spool"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        spool_settings = override_settings(USAGE_SPOOL_PATH=os.path.join(tmp.name, 'spool.sqlite3'))
+        spool_settings.enable()
+        self.addCleanup(spool_settings.disable)
+
+        self.part = SparePart.objects.create(part_name='Hydraulic Filter', quantity=10, threshold=2)
+        self.client.force_login(User.objects.create_user('tech', password='tech'))
+
+    def _post(self, action, quantity):
+        # The spool is only cleared once the write commits
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse('spare_update_quantity', args=[self.part.pk]),
+                {'action': action, 'quantity': quantity, 'version': SparePart.objects.get(pk=self.part.pk).version},
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+            )
+
+    def _flushed_quantity(self):
+        while spool.flush()[0]:
+            pass
+        return SparePart.objects.get(pk=self.part.pk).quantity
+
+    def test_set_after_spooled_use(self):
+        self.assertEqual(self._post('use', 4).status_code, 200)
+        self.assertEqual(spool.pending([self.part.pk]), {self.part.pk: -4})
+
+        self.assertEqual(self._post('set', 20).status_code, 200)
+
+        self.assertEqual(spool.pending([self.part.pk]), {})
+        self.assertEqual(self._flushed_quantity(), 20)
+
+    def test_set_to_stored_quantity_after_spooled_use(self):
+        self._post('use', 4)
+        self._post('set', 10)
+        self.assertEqual(self._flushed_quantity(), 10)
+
+    def test_use_spooled_after_set_is_applied(self):
+        self._post('set', 20)
+        self._post('use', 4)
+        self.assertEqual(self._flushed_quantity(), 16)
+
+    def test_movement_batch_set_after_spooled_use(self):
+        self._post('use', 4)
+        with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+            apply_movements([(self.part.pk, 'set', 20)])
+        self.assertEqual(self._flushed_quantity(), 20)
+
+    def test_edit_after_spooled_use(self):
+        self._post('use', 4)
+        part = SparePart.objects.get(pk=self.part.pk)
+        part.quantity = 20
+        with self.captureOnCommitCallbacks(execute=True):
+            part.save()
+        self.assertEqual(self._flushed_quantity(), 20)
+
+    def test_rolled_back_edit_keeps_spooled_use(self):
+        self._post('use', 4)
+        part = SparePart.objects.get(pk=self.part.pk)
+        part.quantity = 20
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                part.save()
+                # e.g. a later write of the same request failing
+                SparePart.objects.create(part_name=None)
+        self.assertEqual(spool.pending([self.part.pk]), {self.part.pk: -4})
+        self.assertEqual(self._flushed_quantity(), 6)
+
+    def test_import_replaces_spooled_use_of_written_parts_only(self):
+        other = SparePart.objects.create(part_name='Drive Belt', quantity=5, threshold=1)
+        self._post('use', 4)
+        spool.append(other.pk, -2)
+        with self.captureOnCommitCallbacks(execute=True):
+            # The belt row matches the stored part and is not written
+            created, updated, unchanged, _ = upsert_batch([('Hydraulic Filter', 20, 2, ''), ('Drive Belt', 5, 1, '')])
+        self.assertEqual((created, updated, unchanged), (0, 1, 1))
+        self.assertEqual(spool.pending([self.part.pk, other.pk]), {other.pk: -2})
+
+
+class JSONStreamReaderTests(SimpleTestCase):
+    """Records come out the same whatever the chunk size; malformed input fails fast"""
+
+    def _records(self, document, chunk_size=64 * 1024):
+        return list(JSONStreamReader(io.BytesIO(document.encode()), chunk_size=chunk_size).iter_records())
+
+    def test_numbers_split_across_chunks(self):
+        document = '[{"q": 12.5}, {"q": -3e2}, {"q": 1E+3}, {"q": 1234567}, {"q": -0.0}]'
+        expected = json.loads(document)
+        for chunk_size in range(1, 12):
+            self.assertEqual(self._records(document, chunk_size), expected, chunk_size)
+
+    def test_strings_and_literals_split_across_chunks(self):
+        document = json.dumps([{'name': 'Filtre à huile \U0001F527 "XL"', 'hot': True, 'supplier': None}], ensure_ascii=True)
+        for chunk_size in range(1, 8):
+            self.assertEqual(self._records(document, chunk_size), json.loads(document), chunk_size)
+
+    def test_record_array_of_wrapper_object(self):
+        document = '{"exported": {"by": "erp"}, "parts": [{"part_name": "Belt"}], "data": [1]}'
+        self.assertEqual(self._records(document, chunk_size=4), [{'part_name': 'Belt'}])
+        self.assertEqual(self._records('{"data": []}'), [])
+
+    def test_no_record_array(self):
+        for document in ('{"count": 3}', '"parts"', '{}'):
+            with self.assertRaises(NoRecordArray):
+                self._records(document)
+
+    def test_malformed_value_raises_without_reading_the_rest(self):
+        rows = ', '.join(f'{{"part_name": "Part {i}"}}' for i in range(20000))
+        reader = JSONStreamReader(io.BytesIO(f'[{{"part_name": "Belt"}}, {{"quantity": tru}}, {rows}]'.encode()))
+        records = reader.iter_records()
+        self.assertEqual(next(records), {'part_name': 'Belt'})
+        with self.assertRaises(json.JSONDecodeError):
+            next(records)
+        self.assertEqual(reader.bytes_read(), reader.chunk_size)
+
+    def test_truncated_document(self):
+        for document in ('[{"part_name": "Belt"', '[{"part_name": "Be', '[1, 2'):
+            with self.assertRaises(json.JSONDecodeError):
+                self._records(document, chunk_size=3)
+
+    def test_value_longer_than_the_limit(self):
+        with mock.patch.object(jsonstream, 'MAX_VALUE_CHARS', 100):
+            self.assertEqual(len(self._records(json.dumps(['x' * 90]), chunk_size=16)), 1)
+            with self.assertRaisesMessage(json.JSONDecodeError, 'Value longer than 100 characters'):
+                self._records(json.dumps(['x' * 1000]), chunk_size=16)
+
+
+class RunImportTests(TestCase):
+    """Row numbers and totals do not depend on how the file is split for parsing"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+
+    def _write(self, name, text):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def _csv(self, rows=60, bad_every=7):
+        lines = ['Part Name,Quantity,Threshold,Supplier']
+        for i in range(rows):
+            quantity = 'lots' if bad_every and i % bad_every == bad_every // 2 else str(i)
+            lines.append(f'Part {i:03d},{quantity},5,Acme')
+        # Line numbers of the bad rows, the header is line 1
+        bad = [i + 2 for i in range(rows) if bad_every and i % bad_every == bad_every // 2]
+        return self._write('parts.csv', '\n'.join(lines) + '\n'), bad
+
+    def test_csv_row_numbers_across_chunks(self):
+        path, bad = self._csv()
+        for chunk_bytes in (64, 200, 1024 * 1024):
+            with self.subTest(chunk_bytes=chunk_bytes), self.settings(IMPORT_CHUNK_BYTES=chunk_bytes):
+                SparePart.objects.all().delete()
+                result = run_import(path, '.csv', batch_size=7, workers=1)
+                self.assertEqual([int(error.split(':')[0][4:]) for error in result['errors']], bad)
+                self.assertEqual(result['error_count'], len(bad))
+                self.assertEqual((result['total_rows'], result['created']), (60, 60 - len(bad)))
+                self.assertEqual(SparePart.objects.count(), 60 - len(bad))
+
+    def test_ndjson_row_numbers_are_line_numbers(self):
+        path = self._write(
+            'parts.ndjson',
+            '{"Part Name": "Belt", "Quantity": 2}\n\n{"Part Name": "Pump", "Quantity": "x"}\n{"Part Name": "Fan"\n',
+        )
+        with self.settings(IMPORT_CHUNK_BYTES=16):
+            result = run_import(path, '.ndjson', workers=1)
+        # Line 2 is blank and skipped
+        self.assertEqual([error[:7] for error in result['errors']], ['Row 3: ', 'Row 4: '])
+        self.assertEqual((result['created'], result['skipped'], result['error_count']), (1, 1, 2))
+
+    def test_only_the_first_errors_are_kept(self):
+        path, bad = self._csv(rows=300, bad_every=2)
+        result = run_import(path, '.csv', workers=1, max_errors=10)
+        self.assertEqual(len(result['errors']), 10)
+        self.assertEqual(result['error_count'], 150)
+        self.assertTrue(result['errors'][0].startswith(f'Row {bad[0]}: '))
+
+    def test_reimport_counts_unchanged_rows(self):
+        path, _ = self._csv(rows=20, bad_every=None)
+        run_import(path, '.csv', batch_size=3, workers=1)
+        result = run_import(path, '.csv', batch_size=3, workers=1)
+        self.assertEqual((result['created'], result['updated'], result['unchanged']), (0, 0, 20))
+
+
+class RollupTests(TestCase):
+    """Every write path keeps the supplier and inventory rollups equal to an aggregate of the parts"""
+
+    def setUp(self):
+        self.acme, self.bolt = Supplier.objects.create(name='Acme'), Supplier.objects.create(name='Bolt Co')
+        self.parts = [
+            SparePart.objects.create(part_name=f'Part {i}', quantity=i * 3, threshold=5, supplier=self.acme)
+            for i in range(6)
+        ]
+
+    def assertNoDrift(self):
+        self.assertEqual(rebuild_rollups(dry_run=True), [])
+
+    def test_create_and_save(self):
+        self.acme.refresh_from_db()
+        # Quantities 0, 3, 6, ...: two at or below the threshold of 5
+        self.assertEqual((self.acme.part_count, self.acme.total_quantity, self.acme.low_stock_count), (6, 45, 2))
+        part = SparePart.objects.get(pk=self.parts[5].pk)
+        part.quantity, part.supplier = 1, self.bolt
+        part.save()
+        self.bolt.refresh_from_db()
+        self.assertEqual((self.bolt.part_count, self.bolt.total_quantity, self.bolt.low_stock_count), (1, 1, 1))
+        self.assertNoDrift()
+
+    def test_queryset_update_and_bulk_update(self):
+        SparePart.objects.filter(quantity__lt=10).update(quantity=F('quantity') + 4, fingerprint=None)
+        SparePart.objects.filter(part_name='Part 5').update(supplier=self.bolt, threshold=100)
+        parts = list(SparePart.objects.filter(supplier=self.acme))
+        for part in parts:
+            part.threshold = 0
+        SparePart.objects.bulk_update(parts, ['threshold'])
+        self.assertNoDrift()
+        self.assertEqual(InventorySummary.load().low_stock_count, 1)
+
+    def test_deletes(self):
+        SparePart.objects.get(pk=self.parts[0].pk).delete()
+        SparePart.objects.filter(quantity__gte=12).delete()
+        self.assertNoDrift()
+        self.acme.refresh_from_db()
+        self.assertEqual(self.acme.part_count, 3)
+
+    def test_movement_batch(self):
+        with transaction.atomic():
+            apply_movements([
+                (self.parts[1].pk, 'use', 10), (self.parts[2].pk, 'restock', 4), (self.parts[3].pk, 'set', 0),
+            ])
+        self.assertNoDrift()
+
+    def test_reconcile_reports_and_repairs_drift(self):
+        Supplier.objects.filter(pk=self.acme.pk).update(part_count=99)
+        InventorySummary.objects.filter(pk=1).update(low_stock_count=F('low_stock_count') + 3)
+
+        drift = rebuild_rollups(dry_run=True)
+        self.assertEqual(
+            {(label, field, actual - stored) for label, field, stored, actual in drift},
+            {('Acme', 'part_count', -93), ('inventory', 'low_stock_count', -3)},
+        )
+        with self.assertRaises(CommandError):
+            call_command('reconcile_rollups', '--check', stdout=io.StringIO())
+
+        call_command('reconcile_rollups', stdout=io.StringIO())
+        self.assertNoDrift()
+        self.acme.refresh_from_db()
+        self.assertEqual(self.acme.part_count, 6)
+
+
+class VersionConflictTests(TestCase):
+    """A write based on a stale version is refused instead of overwriting the other writer"""
+
+    def setUp(self):
+        self.part = SparePart.objects.create(part_name='Gear Box', quantity=10, threshold=3)
+        self.client.force_login(User.objects.create_user('admin', password='admin', is_staff=True))
+
+    def _changed_by_someone_else(self, **values):
+        other = SparePart.objects.get(pk=self.part.pk)
+        for field, value in values.items():
+            setattr(other, field, value)
+        other.save()
+
+    def test_stale_save_raises(self):
+        stale = SparePart.objects.get(pk=self.part.pk)
+        self._changed_by_someone_else(quantity=4)
+        stale.threshold = 8
+        with self.assertRaises(VersionConflict):
+            stale.save()
+        self.assertEqual(stale.version, 0)
+        current = SparePart.objects.get(pk=self.part.pk)
+        self.assertEqual((current.quantity, current.threshold, current.version), (4, 3, 1))
+
+    def test_edit_view_returns_409_with_the_current_version(self):
+        self._changed_by_someone_else(quantity=4)
+        response = self.client.post(reverse('spare_edit', args=[self.part.pk]), {
+            'part_name': 'Gear Box', 'quantity': 12, 'threshold': 3, 'supplier': '', 'version': 0,
+        })
+        self.assertEqual(response.status_code, 409)
+        self.assertContains(response, 'was changed by someone else', status_code=409)
+        self.assertEqual(response.context['form']['version'].value(), 1)
+        self.assertEqual(SparePart.objects.get(pk=self.part.pk).quantity, 4)
+
+        # Saving again from the refreshed form goes through
+        response = self.client.post(reverse('spare_edit', args=[self.part.pk]), {
+            'part_name': 'Gear Box', 'quantity': 12, 'threshold': 3, 'supplier': '', 'version': 1,
+        })
+        self.assertRedirects(response, reverse('admin_dashboard'), fetch_redirect_response=False)
+        self.assertEqual(SparePart.objects.get(pk=self.part.pk).quantity, 12)
+
+    def _post_quantity(self, action, quantity, version):
+        return self.client.post(
+            reverse('spare_update_quantity', args=[self.part.pk]),
+            {'action': action, 'quantity': quantity, 'version': version},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+
+    def test_stale_set_returns_409(self):
+        self._changed_by_someone_else(quantity=4)
+        response = self._post_quantity('set', 20, version=0)
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('quantity is now 4', response.json()['error'])
+        self.assertEqual(SparePart.objects.get(pk=self.part.pk).quantity, 4)
+
+    def test_stale_use_applies_to_the_current_quantity(self):
+        self._changed_by_someone_else(quantity=4)
+        response = self._post_quantity('use', 1, version=0)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(SparePart.objects.get(pk=self.part.pk).quantity, 3)
+
+    def test_admin_form_rejects_a_stale_version(self):
+        self._changed_by_someone_else(threshold=5)
+        form = SparePartAdminForm(
+            {'part_name': 'Gear Box', 'quantity': 10, 'threshold': 3, 'version': 0},
+            instance=SparePart.objects.get(pk=self.part.pk),
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn('changed by someone else', str(form.non_field_errors()))
+
+
+class HotPartCounterTests(TestCase):
+    """Use/restock of hot parts go to counter shards and reach the row when folded"""
+
+    def setUp(self):
+        self.part = SparePart.objects.create(part_name='Cable Ties', quantity=10, threshold=2, hot=True)
+        self.other = SparePart.objects.create(part_name='Fuses', quantity=50, threshold=5, hot=True)
+
+    def test_add_and_take(self):
+        for slot, delta in ((0, -2), (3, -1), (0, 5)):
+            with mock.patch('random.randrange', return_value=slot):
+                CounterShard.add(self.part.pk, delta)
+        CounterShard.add(self.other.pk, -7)
+        self.assertEqual(CounterShard.objects.filter(part=self.part).count(), 2)
+        self.assertEqual(pending_quantities([self.part.pk, self.other.pk]), {self.part.pk: 2, self.other.pk: -7})
+
+        with transaction.atomic():
+            self.assertEqual(CounterShard.take([self.part.pk]), {self.part.pk: 2})
+        self.assertEqual(pending_quantities([self.part.pk, self.other.pk]), {self.other.pk: -7})
+        with transaction.atomic():
+            self.assertEqual(CounterShard.take(), {self.other.pk: -7})
+            self.assertEqual(CounterShard.take(), {})
+
+    def test_record_movement_counts_on_shards(self):
+        part = SparePart.objects.get(pk=self.part.pk)
+        self.assertEqual(record_movement(part, 'use', 3), 10)
+        self.assertEqual(record_movement(part, 'restock', 5), 7)
+        # Use floors at the current stock
+        self.assertEqual(record_movement(part, 'use', 50), 12)
+        self.assertEqual(part.quantity, 0)
+
+        stored = SparePart.objects.get(pk=self.part.pk)
+        self.assertEqual((stored.quantity, stored.version), (10, 0))
+        self.assertEqual(apply_pending([stored])[0].quantity, 0)
+        self.assertEqual(
+            list(StockMovement.objects.filter(part=self.part).order_by('id').values_list('delta', 'quantity_after')),
+            [(-3, 7), (5, 12), (-12, 0)],
+        )
+
+    def test_fold_moves_counts_into_the_row_and_rollups(self):
+        CounterShard.add(self.part.pk, -4)
+        CounterShard.add(self.part.pk, -1)
+        self.assertEqual(fold_counters(), 1)
+
+        part = SparePart.objects.get(pk=self.part.pk)
+        self.assertEqual((part.quantity, part.version, part.fingerprint), (5, 1, None))
+        self.assertEqual(pending_quantities([self.part.pk]), {})
+        self.assertEqual(rebuild_rollups(dry_run=True), [])
+        self.assertEqual(fold_counters(), 0)
+
+    def test_fold_clamps_overshoot_at_zero(self):
+        # Two uses that each read a stock of 10
+        CounterShard.add(self.part.pk, -8)
+        CounterShard.add(self.part.pk, -7)
+        fold_counters([self.part.pk])
+        self.assertEqual(SparePart.objects.get(pk=self.part.pk).quantity, 0)
+        correction = StockMovement.objects.filter(part=self.part).latest('id')
+        self.assertEqual((correction.delta, correction.quantity_after), (5, 0))
+        self.assertEqual(rebuild_rollups(dry_run=True), [])
+
+    def test_edit_replaces_pending_counts(self):
+        CounterShard.add(self.part.pk, -4)
+        part = SparePart.objects.get(pk=self.part.pk)
+        part.quantity = 30
+        part.save()
+        self.assertEqual(pending_quantities([self.part.pk]), {})
+        fold_counters()
+        self.assertEqual(SparePart.objects.get(pk=self.part.pk).quantity, 30)
+
+
+class RecordingConsumer(outbox.Consumer):
+    name = 'recording'
+    batch_size = 2
+
+    def __init__(self, fail_on=None):
+        self.batches = []
+        self.fail_on = fail_on
+
+    def handle(self, changes):
+        if self.fail_on in {change.part_id for change in changes}:
+            raise RuntimeError('consumer failed')
+        self.batches.append([(change.part_id, change.kind) for change in changes])
+
+
+class OutboxTests(TestCase):
+    """Changes are handed to consumers in order, after their checkpoint, under a lease"""
+
+    def setUp(self):
+        self.part = SparePart.objects.create(part_name='Valve', quantity=5, threshold=1)
+
+    def _start(self, consumer):
+        # A new consumer starts after the changes made before its first run
+        self.assertEqual(outbox.run_consumer(consumer), 0)
+
+    def _checkpoint(self):
+        return ConsumerCheckpoint.objects.get(name=RecordingConsumer.name)
+
+    def test_every_write_path_records_changes(self):
+        consumer = RecordingConsumer()
+        self._start(consumer)
+        part = SparePart.objects.get(pk=self.part.pk)
+        part.quantity = 3
+        part.save()
+        SparePart.objects.filter(pk=self.part.pk).update(threshold=2)
+        [created] = SparePart.objects.bulk_create([SparePart(part_name='Seal', quantity=1, threshold=1)])
+        SparePart.objects.filter(pk=created.pk).delete()
+        part.delete()
+
+        self.assertEqual(outbox.run_consumer(consumer), 5)
+        self.assertEqual(sum(consumer.batches, []), [
+            (self.part.pk, 'updated'), (self.part.pk, 'updated'), (created.pk, 'created'),
+            (created.pk, 'deleted'), (self.part.pk, 'deleted'),
+        ])
+        self.assertEqual([len(batch) for batch in consumer.batches], [2, 2, 1])
+        self.assertEqual(self._checkpoint().last_change_id, PartChange.objects.latest('id').id)
+        self.assertIsNone(self._checkpoint().locked_until)
+
+    def test_failed_batch_is_handed_over_again(self):
+        self._start(RecordingConsumer())
+        other = SparePart.objects.create(part_name='Gasket', quantity=1, threshold=1)
+        SparePart.objects.filter(pk=self.part.pk).update(quantity=4)
+        SparePart.objects.filter(pk=other.pk).update(quantity=2)
+
+        failing = RecordingConsumer(fail_on=self.part.pk)
+        with self.assertLogs('inventory_app.outbox', 'ERROR'):
+            self.assertEqual(outbox.run_consumer(failing), 0)
+        self.assertEqual(failing.batches, [])
+        self.assertIsNone(self._checkpoint().locked_until)
+
+        retry = RecordingConsumer()
+        self.assertEqual(outbox.run_consumer(retry), 3)
+        self.assertEqual(retry.batches[0], [(other.pk, 'created'), (self.part.pk, 'updated')])
+
+    def test_lease_held_by_another_runner(self):
+        consumer = RecordingConsumer()
+        self._start(consumer)
+        SparePart.objects.filter(pk=self.part.pk).update(quantity=4)
+        ConsumerCheckpoint.objects.filter(name=consumer.name).update(
+            locked_until=timezone.now() + timedelta(minutes=1),
+        )
+        self.assertEqual(outbox.run_consumer(consumer), 0)
+
+        # A runner that died leaves the lease to expire
+        ConsumerCheckpoint.objects.filter(name=consumer.name).update(
+            locked_until=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertEqual(outbox.run_consumer(consumer), 1)
+
+    def test_prune_keeps_changes_a_consumer_has_not_processed(self):
+        behind = RecordingConsumer()
+        self._start(behind)
+        SparePart.objects.filter(pk=self.part.pk).update(quantity=4)
+        ConsumerCheckpoint.objects.create(name='ahead', last_change_id=PartChange.objects.latest('id').id)
+        ahead = RecordingConsumer()
+        ahead.name = 'ahead'
+
+        outbox.prune_changes([behind, ahead])
+        self.assertEqual(PartChange.objects.filter(id__gt=self._checkpoint().last_change_id).count(), 1)
+        outbox.run_consumer(behind)
+        outbox.prune_changes([behind, ahead])
+        self.assertFalse(PartChange.objects.exists())
+
+
+class DeltaSyncTests(TestCase):
+    """Clients holding a cursor get the parts changed after it and the ids deleted since"""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('tech', password='tech'))
+        self.hour_ago = timezone.now() - timedelta(hours=1)
+        self.parts = [SparePart.objects.create(part_name=f'Part {i}', quantity=i, threshold=1) for i in range(5)]
+        # Same timestamp for all: the id breaks the tie
+        SparePart.objects.update(updated_at=self.hour_ago)
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(self.hour_ago, 42)), (self.hour_ago, 42))
+        for text in ('', 'abc', '12', '1-2-3', 'x-1'):
+            with self.assertRaises(InvalidCursor):
+                decode_cursor(text)
+        self.assertEqual(parse_since(encode_cursor(self.hour_ago, 3)), (self.hour_ago, 3))
+        self.assertEqual(parse_since('2026-01-02T03:04:05+00:00')[0].isoformat(), '2026-01-02T03:04:05+00:00')
+        self.assertEqual(parse_since('2026-01-02')[1], 0)
+
+    def test_pages_through_every_part_in_change_order(self):
+        seen, cursor = [], None
+        while True:
+            changes = changes_since(cursor, limit=2)
+            seen += [part.pk for part in changes['parts']]
+            cursor = changes['cursor']
+            if not changes['has_more']:
+                break
+        self.assertEqual(seen, [part.pk for part in self.parts])
+
+        # Caught up: untouched parts are not sent again
+        self.assertEqual(changes_since(cursor)['parts'], [])
+
+    def test_changes_and_tombstones_after_a_cursor(self):
+        cursor = changes_since(limit=10)['cursor']
+        changed = SparePart.objects.get(pk=self.parts[1].pk)
+        changed.quantity = 40
+        changed.save()
+        SparePart.objects.get(pk=self.parts[2].pk).delete()
+        SparePart.objects.filter(pk=self.parts[3].pk).delete()
+
+        response = self.client.get(reverse('parts_changes_api'), {'since': cursor})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([(part['id'], part['quantity']) for part in data['parts']], [(self.parts[1].pk, 40)])
+        self.assertEqual(data['deleted'], [self.parts[2].pk, self.parts[3].pk])
+        self.assertFalse(data['has_more'])
+
+    def test_cursor_stays_behind_recent_changes(self):
+        changed = SparePart.objects.get(pk=self.parts[0].pk)
+        changed.quantity = 9
+        changed.save()
+        cursor = changes_since(limit=10)['cursor']
+        # A transaction committing late could still show up with a timestamp before now
+        self.assertEqual([part.pk for part in changes_since(cursor)['parts']], [changed.pk])
+
+    def test_expired_and_invalid_cursors(self):
+        expired = encode_cursor(timezone.now() - timedelta(days=8), 0)
+        with self.assertRaises(CursorExpired):
+            changes_since(expired)
+        url = reverse('parts_changes_api')
+        self.assertEqual(self.client.get(url, {'since': expired}).status_code, 410)
+        self.assertEqual(self.client.get(url, {'since': 'nope'}).status_code, 400)
+
+
+class IncrementalExportTests(TestCase):
+    """?since= exports only the parts changed after a cursor or timestamp, plus tombstones"""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('admin', password='admin', is_staff=True))
+        self.parts = [SparePart.objects.create(part_name=f'Part {i}', quantity=i, threshold=1) for i in range(4)]
+        SparePart.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        self.since = timezone.now() - timedelta(minutes=30)
+        changed = SparePart.objects.get(pk=self.parts[0].pk)
+        changed.quantity = 7
+        changed.save()
+        SparePart.objects.get(pk=self.parts[1].pk).delete()
+
+    def _get(self, url, since):
+        response = self.client.get(url, {'since': since})
+        return response, b''.join(response.streaming_content).decode() if response.streaming else None
+
+    def test_csv_since_a_cursor(self):
+        response, body = self._get(reverse('export_csv'), encode_cursor(self.since, 0))
+        self.assertEqual(response.status_code, 200)
+        rows = [(row['Id'], row['Quantity'], row['Deleted']) for row in csv.DictReader(io.StringIO(body))]
+        self.assertEqual(rows, [(str(self.parts[0].pk), '7', ''), (str(self.parts[1].pk), '', 'true')])
+
+        # The next cursor only brings back the recent changes, not the older parts
+        _, body = self._get(reverse('export_csv'), response['X-Next-Cursor'])
+        self.assertNotIn('Part 3', body)
+
+    def test_json_since_a_timestamp(self):
+        response, body = self._get(reverse('export_json'), self.since.isoformat())
+        data = json.loads(body)
+        self.assertEqual([part['id'] for part in data['parts']], [self.parts[0].pk])
+        self.assertEqual(data['deleted'], [self.parts[1].pk])
+        self.assertEqual(data['cursor'], response['X-Next-Cursor'])
+
+    def test_empty_since_exports_every_part(self):
+        _, body = self._get(reverse('export_json'), '')
+        self.assertEqual(len(json.loads(body)['parts']), 3)
+
+    def test_invalid_and_expired_since(self):
+        self.assertEqual(self._get(reverse('export_csv'), 'yesterday')[0].status_code, 400)
+        self.assertEqual(self._get(reverse('export_csv'), '2000-01-01')[0].status_code, 410)
+
+
+class MovementBatchTests(TestCase):
+    """A batch is applied all or nothing, once per idempotency key"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('scanner', password='scanner')
+        self.client.force_login(self.user)
+        self.belt = SparePart.objects.create(part_name='Belt', quantity=10, threshold=2)
+        self.pump = SparePart.objects.create(part_name='Pump', quantity=3, threshold=1)
+
+    def _post(self, movements, key='batch-1', client=None):
+        return (client or self.client).post(
+            reverse('movements_api'), json.dumps({'movements': movements}),
+            content_type='application/json', HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def _quantities(self):
+        return dict(SparePart.objects.values_list('part_name', 'quantity'))
+
+    def test_retry_replays_the_first_response(self):
+        movements = [{'part_id': self.belt.pk, 'action': 'use', 'qty': 4}]
+        first = self._post(movements)
+        self.assertEqual(first.status_code, 200)
+        self.assertNotIn('Idempotent-Replayed', first)
+
+        retry = self._post(movements)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(self._quantities()['Belt'], 6)
+        self.assertEqual(StockMovement.objects.filter(part=self.belt).count(), 1)
+
+    def test_reused_key_with_another_body_is_refused(self):
+        self._post([{'part_id': self.belt.pk, 'action': 'use', 'qty': 4}])
+        response = self._post([{'part_id': self.belt.pk, 'action': 'use', 'qty': 5}])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self._quantities()['Belt'], 6)
+
+    def test_keys_are_scoped_per_user(self):
+        movements = [{'part_id': self.belt.pk, 'action': 'restock', 'qty': 1}]
+        self._post(movements)
+        other = self.client_class()
+        other.force_login(User.objects.create_user('other', password='other'))
+        self.assertNotIn('Idempotent-Replayed', self._post(movements, client=other))
+        self.assertEqual(self._quantities()['Belt'], 12)
+
+    def test_invalid_batch_applies_nothing(self):
+        movements = [
+            {'part_id': self.belt.pk, 'action': 'use', 'qty': 4},
+            {'part_id': self.pump.pk + 100, 'action': 'use', 'qty': 1},
+        ]
+        response = self._post(movements)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Unknown part ids', response.json()['error'])
+        self.assertEqual(self._quantities(), {'Belt': 10, 'Pump': 3})
+
+        # The key was not used up
+        self.assertEqual(self._post(movements[:1]).status_code, 200)
+        # A request without a key is refused before the batch is read
+        response = self.client.post(reverse('movements_api'), '{}', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_movements_of_a_part_apply_in_order(self):
+        response = self._post([
+            {'part_id': self.pump.pk, 'action': 'use', 'qty': 5},
+            {'part_id': self.belt.pk, 'action': 'set', 'qty': 1},
+            {'part_id': self.pump.pk, 'action': 'restock', 'qty': 2},
+            {'part_id': self.belt.pk, 'action': 'restock', 'qty': 4},
+            {'part_id': self.pump.pk, 'action': 'use', 'qty': 1},
+        ])
+        # Pump: 3 -> 0 (floored) -> 2 -> 1; Belt: 10 -> 1 -> 5
+        returned = {part['part_name']: part['quantity'] for part in response.json()['parts']}
+        self.assertEqual(returned, {'Belt': 5, 'Pump': 1})
+        self.assertEqual(self._quantities(), {'Belt': 5, 'Pump': 1})
+        history = StockMovement.objects.filter(part=self.pump).order_by('id').values_list('delta', flat=True)
+        self.assertEqual(list(history), [-3, 2, -1])
+        self.assertEqual(rebuild_rollups(dry_run=True), [])
+
+    def test_hot_part_counts_are_folded_first(self):
+        SparePart.objects.filter(pk=self.belt.pk).update(hot=True)
+        CounterShard.add(self.belt.pk, -6)
+        self._post([{'part_id': self.belt.pk, 'action': 'use', 'qty': 3}])
+        self.assertEqual(self._quantities()['Belt'], 1)
+        self.assertEqual(pending_quantities([self.belt.pk]), {})
+
+
+class InsightsTests(TestCase):
+    """The insights payload is bounded and the rollup-based KPIs match an aggregate over the parts"""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('admin', password='admin', is_staff=True))
+        self.suppliers = [Supplier.objects.create(name=f'Supplier {i:02d}') for i in range(14)]
+        for i in range(60):
+            SparePart.objects.create(
+                part_name=f'Part {i:02d}', quantity=i % 9, threshold=4,
+                supplier=self.suppliers[i % 14] if i % 10 else None,
+            )
+
+    def test_rollups_match_the_aggregate(self):
+        aggregated = compute_insights(SparePart.objects.all(), top_n=5, table_rows=8)
+        from_rollups = compute_insights(SparePart.objects.all(), top_n=5, table_rows=8, use_rollups=True)
+        self.assertEqual(from_rollups, aggregated)
+        # Quantities 0..8 against a threshold of 4: 0-4 are low, 0-1 critical, none above 12 (overstocked)
+        low = sum(1 for i in range(60) if i % 9 <= 4)
+        self.assertEqual(aggregated['kpis']['low_stock'], low)
+        self.assertEqual(aggregated['critical']['count'], sum(1 for i in range(60) if i % 9 <= 1))
+        self.assertEqual(aggregated['overstocked']['count'], 0)
+
+    def test_lists_are_capped(self):
+        insights = self.client.get(reverse('insights_api')).json()
+        self.assertEqual(insights['kpis']['total_parts'], 60)
+        self.assertEqual(insights['kpis']['suppliers_count'], 14)
+        self.assertEqual(len(insights['suppliers']['top']), 10)
+        self.assertLessEqual(len(insights['critical']['top']), 10)
+        self.assertEqual(len(insights['table']['rows']), 50)
+        self.assertEqual(insights['table']['total'], 60)
+
+        # The suppliers outside the top 10 and the parts without one add up to the totals
+        other = insights['suppliers']['other']
+        self.assertEqual(other['supplier_count'], 4)
+        self.assertEqual(other['part_count'] + sum(s['part_count'] for s in insights['suppliers']['top']), 60)
+        total_quantity = sum(i % 9 for i in range(60))
+        self.assertEqual(other['total_quantity'] + sum(s['total_quantity'] for s in insights['suppliers']['top']),
+                         total_quantity)
+
+        # Most urgent first: largest shortfall below the threshold
+        self.assertEqual([row['quantity'] for row in insights['stock_chart'][:3]], [0, 0, 0])
+
+    def test_filters(self):
+        supplier = self.suppliers[3]
+        insights = self.client.get(reverse('insights_api'), {'supplier': supplier.pk, 'status': 'low'}).json()
+        expected = SparePart.objects.filter(supplier=supplier, quantity__lte=F('threshold')).count()
+        self.assertEqual(insights['kpis']['total_parts'], expected)
+        self.assertEqual(insights['kpis']['low_stock'], expected)
+        self.assertEqual({row['supplier'] for row in insights['table']['rows']}, {supplier.name})
+
+
+class ForecastTests(TestCase):
+    """Daily usage and days of cover come from stock movements, else from quantity observations"""
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.steady = SparePart.objects.create(part_name='Steady', quantity=20, threshold=5)
+        self.observed = SparePart.objects.create(part_name='Observed', quantity=10, threshold=5)
+        self.idle = SparePart.objects.create(part_name='Idle', quantity=8, threshold=5)
+        # Two used every day of the window
+        history = [self._movement(-2, days=day, hours=1) for day in range(28)]
+        # Restocks are not usage, movements before the window are ignored
+        history += [self._movement(40, days=3), self._movement(-99, days=40)]
+        StockMovement.objects.bulk_create(history)
+        AlertLog.objects.create(
+            spare_part=self.observed, part_name='Observed', quantity_at_alert=30, threshold_at_alert=5,
+            alert_date=self.now - timedelta(days=10),
+        )
+
+    def _movement(self, delta, **ago):
+        return StockMovement(part=self.steady, delta=delta, quantity_after=20, created_at=self.now - timedelta(**ago))
+
+    def test_forecasts(self):
+        result = compute_forecasts(window_days=28, alpha=0.3)
+        self.assertEqual(
+            {key: result[key] for key in ('parts', 'from_movements', 'from_observations', 'running_out')},
+            {'parts': 3, 'from_movements': 1, 'from_observations': 1, 'running_out': 1},
+        )
+        forecasts = {forecast.part_id: forecast for forecast in StockForecast.objects.all()}
+        today = timezone.localdate(self.now)
+
+        steady = forecasts[self.steady.pk]
+        # Constant daily usage comes out unchanged from both averages
+        self.assertEqual(steady.method, 'MOVEMENTS')
+        self.assertAlmostEqual(steady.avg_daily_usage, 2.0)
+        self.assertAlmostEqual(steady.smoothed_daily_usage, 2.0)
+        self.assertAlmostEqual(steady.days_of_cover, 10.0)
+        self.assertEqual(steady.stockout_date, today + timedelta(days=10))
+
+        # 30 at the alert ten days ago, 10 now: 2 a day, 5 days left
+        observed = forecasts[self.observed.pk]
+        self.assertEqual(observed.method, 'OBSERVATIONS')
+        self.assertAlmostEqual(observed.smoothed_daily_usage, 2.0, places=3)
+        self.assertAlmostEqual(observed.days_of_cover, 5.0, places=2)
+
+        idle = forecasts[self.idle.pk]
+        self.assertEqual((idle.method, idle.days_of_cover, idle.stockout_date), ('NONE', None, None))
+
+    def test_recent_usage_weighs_more_when_smoothed(self):
+        StockMovement.objects.filter(part=self.steady).delete()
+        self._movement(-28, hours=1).save()
+        compute_forecasts(window_days=28, alpha=0.3)
+        forecast = StockForecast.objects.get(part=self.steady)
+        self.assertAlmostEqual(forecast.avg_daily_usage, 1.0)
+        self.assertGreater(forecast.smoothed_daily_usage, forecast.avg_daily_usage)
+
+    def test_deleted_parts_are_dropped(self):
+        self.steady.delete()
+        self.assertEqual(compute_forecasts()['parts'], 2)
+        self.assertFalse(StockForecast.objects.filter(part_id=self.steady.pk).exists())
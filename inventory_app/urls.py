@@ -11,12 +11,23 @@ urlpatterns = [
     path('spare/<int:pk>/delete/', views.sparepart_delete, name='spare_delete'),
     path('spare/<int:pk>/update_quantity/', views.sparepart_update_quantity, name='spare_update_quantity'),
     path('export/csv/', views.export_csv, name='export_csv'),
+    path('export/json/', views.export_json, name='export_json'),
     path('export/pdf/', views.export_pdf, name='export_pdf'),
     path('export/low-stock-csv/', views.export_low_stock_csv, name='export_low_stock_csv'),
+    path('export/xlsx/', views.export_xlsx, name='export_xlsx'),
+    path('export/low-stock-xlsx/', views.export_low_stock_xlsx, name='export_low_stock_xlsx'),
+    path('export/parquet/', views.export_parquet, name='export_parquet'),
+    path('export/purchase-orders/', views.export_purchase_orders, name='export_purchase_orders'),
     path('import/spare-parts/', views.import_spare_parts, name='import_spare_parts'),
+    path('import/jobs/<int:pk>/progress/', views.import_job_progress, name='import_job_progress'),
     path('test-email/', views.test_email, name='test_email'),
     path('admin-profile/', views.admin_profile, name='admin_profile'),
     path('gmail-setup-guide/', views.gmail_setup_guide, name='gmail_setup_guide'),
     path('send-low-stock-email/', views.send_low_stock_email, name='send_low_stock_email'),
     path('api/chart-data/', views.chart_data_api, name='chart_data_api'),
+    path('api/insights/', views.insights_api, name='insights_api'),
+    path('api/parts/search/', views.search_parts_api, name='search_parts_api'),
+    path('api/parts/changes/', views.parts_changes_api, name='parts_changes_api'),
+    path('api/movements/', views.movements_api, name='movements_api'),
+    path('api/events/', views.dashboard_events, name='dashboard_events'),
 ]
@@ -1,21 +1,39 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import Group, User
-from django.db.models import F
-from django.http import HttpResponse
+from django.db.models import Count, F, Sum
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 from django.contrib import messages
 from django.conf import settings
-from .models import SparePart
+from django.utils import timezone
+from .models import InventorySummary, SparePart, StockForecast, Supplier, ImportJob, VersionConflict
 from .forms import SparePartForm, LoginRoleForm, ImportSparePartsForm, AdminProfileForm
 from .services import AlertService
-import csv
+from .analytics import compute_insights, with_supplier_names
+from .jobs import enqueue_import, job_progress
+from .search import MAX_RESULTS, filter_parts, search_parts
+from .purchasing import write_purchase_orders_zip
+from .exporters import (
+    PARQUET_CONTENT_TYPE, XLSX_CONTENT_TYPE, iter_part_changes_csv, iter_part_changes_json, write_low_stock_csv,
+    write_parts_csv, write_parts_parquet, write_parts_pdf, write_parts_xlsx,
+)
+from .events import bus
+from .sync import CursorExpired, InvalidCursor, changes_since, export_changes, settled_cursor
+from .movements import IdempotencyConflict, parse_movements, run_batch
+from .counters import apply_pending, fold_counters, record_movement
+from . import spool
+from .spool import apply_spooled
+import asyncio
 import json
-from io import BytesIO, StringIO
-from reportlab.pdfgen import canvas
-import os
-import pandas as pd
-from django.db import transaction
+import tempfile
+from io import BytesIO
+
+# Saves of a relative quantity change (use/restock) tried before giving up on a busy part
+QUICK_UPDATE_ATTEMPTS = 3
 
 
 def is_admin(user):
@@ -59,17 +77,26 @@ def logout_view(request):
 @login_required
 @user_passes_test(is_admin)
 def admin_dashboard(request):
-    parts = SparePart.objects.all().order_by('part_name')
-    total_parts = parts.count()
-    low_stock = parts.filter(quantity__lte=F('threshold')).count()
+    # Taken before the parts are read so the table can delta-sync from here
+    sync_cursor = settled_cursor()
+    parts = SparePart.objects.select_related('supplier').order_by('part_name')
+    summary = InventorySummary.load()
+    total_parts = summary.total_parts
+    low_stock = summary.low_stock_count
     well_stocked = total_parts - low_stock
     
     # Get alert information
     active_alerts = AlertService.get_active_alerts()
     recent_alerts = AlertService.get_recent_alerts(days=3)
     
-    # Get unique suppliers for filter
-    suppliers = SparePart.objects.values_list('supplier', flat=True).distinct().exclude(supplier='')
+    # Suppliers for the filter dropdown
+    suppliers = Supplier.objects.filter(part_count__gt=0).only('id', 'name')
+
+    # Parts closest to a stock-out, from the latest forecast run
+    running_out = (
+        StockForecast.objects.filter(days_of_cover__lte=settings.FORECAST_ALERT_DAYS)
+        .select_related('part').order_by('days_of_cover')[:10]
+    )
     
     return render(request, 'admin_dashboard.html', {
         'parts': parts, 
@@ -80,26 +107,25 @@ def admin_dashboard(request):
         'recent_alerts': recent_alerts,
         'alert_count': active_alerts.count(),
         'suppliers': suppliers,
+        'running_out': running_out,
+        'forecast_alert_days': settings.FORECAST_ALERT_DAYS,
+        'sync_cursor': sync_cursor,
     })
 
 
 @login_required
 def technician_dashboard(request):
-    parts = SparePart.objects.all().order_by('part_name')
-    total_parts = parts.count()
-    low = [p for p in parts if p.is_low()]
-    low_stock_count = len(low)
-    well_stocked = total_parts - low_stock_count
+    parts = apply_pending(list(SparePart.objects.select_related('supplier').order_by('part_name')))
+    kpis = _kpi_snapshot()
     
     # Get recent alert information (technicians can see recent alerts but not manage them)
     recent_alerts = AlertService.get_recent_alerts(days=1)
     
     return render(request, 'technician_dashboard.html', {
         'parts': parts, 
-        'total_parts': total_parts,
-        'low_parts': low, 
-        'low_stock_count': low_stock_count,
-        'well_stocked': well_stocked,
+        'total_parts': kpis['total_parts'],
+        'low_stock_count': kpis['low_stock'],
+        'well_stocked': kpis['well_stocked'],
         'recent_alerts': recent_alerts
     })
 
@@ -130,7 +156,20 @@ def sparepart_edit(request, pk):
     if request.method == 'POST':
         form = SparePartForm(request.POST, instance=part)
         if form.is_valid():
-            updated_part = form.save()
+            try:
+                updated_part = form.save()
+            except VersionConflict:
+                # Show what the other writer saved; the posted values stay in the form
+                current = get_object_or_404(SparePart.objects.select_related('supplier'), pk=pk)
+                data = request.POST.copy()
+                data['version'] = current.version
+                form = SparePartForm(data, instance=current)
+                form.add_error(None, (
+                    f'{current.part_name} was changed by someone else while you were editing it. '
+                    f'It now has quantity {current.quantity}, threshold {current.threshold} and supplier '
+                    f'{current.supplier_name or "not specified"}. Check your changes and save again.'
+                ))
+                return render(request, 'sparepart_form.html', {'form': form, 'action': 'Edit'}, status=409)
             messages.success(request, 'Spare part updated')
             
             # Check and send low stock alert if needed
@@ -156,43 +195,164 @@ def sparepart_delete(request, pk):
 
 @login_required
 def sparepart_update_quantity(request, pk):
-    part = get_object_or_404(SparePart, pk=pk)
+    """
+    Use, restock or set a part's quantity.
+
+    Background posts from the technician table (X-Requested-With:
+    XMLHttpRequest) get JSON with the re-rendered table row and the KPI
+    counts instead of a redirect to the dashboard.
+
+    The form posts the version it was rendered from. Use and restock are
+    relative and are applied to the current quantity, retried if another
+    write gets in between; a set based on a stale version gets 409. Use and
+    restock of hot parts are counted on counter shards (see counters.py), or
+    spooled for all parts when USAGE_SPOOL_PATH is set (see spool.py).
+    """
+    part = get_object_or_404(SparePart.objects.select_related('supplier'), pk=pk)
     if request.method == 'POST':
+        background = request.headers.get('x-requested-with') == 'XMLHttpRequest'
         action = request.POST.get('action')
-        qty = int(request.POST.get('quantity', part.quantity))
-        old_quantity = part.quantity
-        
+        try:
+            qty = int(request.POST.get('quantity', part.quantity))
+            version = int(request.POST.get('version', part.version))
+        except ValueError:
+            qty = version = -1
+        error = None
+        if action not in ('use', 'restock', 'set'):
+            error = 'Choose use, restock or set'
+        elif qty < 0:
+            error = 'Enter a quantity of 0 or more'
+        elif version < 0:
+            error = 'Invalid version, reload the page'
+        if error:
+            if background:
+                return JsonResponse({'error': error}, status=400)
+            messages.error(request, error)
+            return redirect('spare_update_quantity', pk=pk)
+
         if action == 'use':
-            part.quantity = max(0, part.quantity - qty)
-            messages.success(request, f'Marked {qty} as used')
+            notices = [f'Marked {qty} as used']
         elif action == 'restock':
-            part.quantity = part.quantity + qty
-            messages.success(request, f'Added {qty} to stock')
-        elif action == 'set':
-            part.quantity = qty
-            messages.success(request, 'Quantity updated')
-        
-        part.save()
-        
+            notices = [f'Added {qty} to stock']
+        else:
+            notices = ['Quantity updated']
+
+        if action != 'set' and spool.enabled():
+            # Written behind: the flusher applies it and checks for low stock (see spool.py)
+            if qty:
+                spool.append(part.pk, qty if action == 'restock' else -qty)
+            apply_spooled(apply_pending([part]))
+            old_quantity = part.quantity
+        elif part.hot and action != 'set':
+            # Counted on one of the part's counter shards instead of its row (see counters.py)
+            old_quantity = record_movement(part, action, qty)
+        else:
+            if part.hot:
+                # The set replaces the pending counts; folding bumps the version, so the posted one is stale
+                fold_counters([pk])
+                part = get_object_or_404(SparePart.objects.select_related('supplier'), pk=pk)
+            elif action == 'set':
+                part.version = version
+            for _ in range(QUICK_UPDATE_ATTEMPTS):
+                old_quantity = part.quantity
+                if action == 'use':
+                    part.quantity = max(0, part.quantity - qty)
+                elif action == 'restock':
+                    part.quantity = part.quantity + qty
+                else:
+                    part.quantity = qty
+                try:
+                    # A set writes the quantity even when it equals the stored one, replacing spooled changes
+                    part.save(update_fields=['quantity'] if action == 'set' else None)
+                    break
+                except VersionConflict:
+                    part = get_object_or_404(SparePart.objects.select_related('supplier'), pk=pk)
+                    if action == 'set':
+                        apply_pending([part])
+                        error = (f'{part.part_name} was changed by someone else (quantity is now {part.quantity}). '
+                                 f'Check it and set the quantity again.')
+                        break
+            else:
+                error = f'{part.part_name} is being updated by someone else, please try again'
+        if error:
+            if background:
+                return JsonResponse({
+                    'error': error,
+                    'row': render_to_string('partials/technician_part_row.html', {'p': part}, request=request),
+                    'kpis': _kpi_snapshot(),
+                }, status=409)
+            messages.error(request, error)
+            return redirect('technician_dashboard')
+
         # Check and send low stock alert if needed
-        if part.quantity != old_quantity:
-            if AlertService.check_and_send_alert(part):
-                messages.warning(request, f'Low stock alert sent for {part.part_name}')
-        
+        alert_sent = part.quantity != old_quantity and AlertService.check_and_send_alert(part)
+        if alert_sent:
+            notices.append(f'Low stock alert sent for {part.part_name}')
+
+        if background:
+            return JsonResponse({
+                'row': render_to_string('partials/technician_part_row.html', {'p': part}, request=request),
+                'kpis': _kpi_snapshot(),
+                'messages': notices,
+            })
+        messages.success(request, notices[0])
+        if alert_sent:
+            messages.warning(request, notices[1])
         return redirect('technician_dashboard')
+    apply_pending([part])
     return render(request, 'sparepart_form.html', {'form': None, 'action': 'Update Quantity', 'part': part})
 
 
 @login_required
 @user_passes_test(is_admin)
 def export_csv(request):
-    parts = SparePart.objects.all()
+    """
+    Export every part as CSV.
+
+    With ?since=<cursor or ISO timestamp> only the parts changed after it
+    and the ids of parts deleted since are streamed, with an Id and a
+    Deleted column; X-Next-Cursor holds the since= of the next export.
+    An empty since= exports every part in that format.
+    """
+    if 'since' in request.GET:
+        return _incremental_export(request, 'csv')
+    parts = SparePart.objects.select_related('supplier')
     response = HttpResponse(content_type='text/csv')
     response['Content-Disposition'] = 'attachment; filename="spareparts.csv"'
-    writer = csv.writer(response)
-    writer.writerow(['Part Name', 'Quantity', 'Threshold', 'Supplier', 'Updated At'])
-    for p in parts:
-        writer.writerow([p.part_name, p.quantity, p.threshold, p.supplier, p.updated_at])
+    write_parts_csv(response, parts)
+    return response
+
+
+@login_required
+@user_passes_test(is_admin)
+def export_json(request):
+    """
+    Export parts as JSON: {"cursor": ..., "deleted": [ids], "parts": [...]}
+
+    Without since= every part is exported; with ?since=<cursor or ISO
+    timestamp> only the changes after it, like export_csv.
+    """
+    return _incremental_export(request, 'json')
+
+
+def _incremental_export(request, fmt):
+    """Stream the parts changed since ?since= (every part if empty) as csv or json"""
+    try:
+        changes = export_changes(request.GET.get('since') or None)
+    except InvalidCursor as exc:
+        return HttpResponse(str(exc), status=400, content_type='text/plain')
+    except CursorExpired:
+        return HttpResponse('Cursor expired, export everything again', status=410, content_type='text/plain')
+
+    parts = changes['parts'].iterator(chunk_size=2000)
+    if fmt == 'csv':
+        response = StreamingHttpResponse(iter_part_changes_csv(parts, changes['deleted']), content_type='text/csv')
+    else:
+        response = StreamingHttpResponse(
+            iter_part_changes_json(parts, changes['deleted'], changes['cursor']), content_type='application/json',
+        )
+    response['Content-Disposition'] = f'attachment; filename="spareparts_changes.{fmt}"'
+    response['X-Next-Cursor'] = changes['cursor']
     return response
 
 
@@ -200,257 +360,122 @@ def export_csv(request):
 @user_passes_test(is_admin)
 def export_low_stock_csv(request):
     """
-    Export a CSV with only low stock items (quantity < threshold).
+    Export a CSV with only low stock items (quantity <= threshold).
     File name: low_stock_items.csv
     Columns: Part Name, Quantity, Threshold, Supplier
     """
     # Use F expression to compare quantity and threshold at the DB level
-    low_parts = SparePart.objects.filter(quantity__lt=F('threshold')).order_by('part_name')
+    low_parts = SparePart.objects.filter(quantity__lte=F('threshold')).select_related('supplier').order_by('part_name')
     response = HttpResponse(content_type='text/csv')
     response['Content-Disposition'] = 'attachment; filename="low_stock_items.csv"'
-    writer = csv.writer(response)
-    writer.writerow(['Part Name', 'Quantity', 'Threshold', 'Supplier'])
-    for p in low_parts:
-        writer.writerow([p.part_name, p.quantity, p.threshold, p.supplier])
+    write_low_stock_csv(response, low_parts)
     return response
 
 
+def _xlsx_response(parts, filename, title):
+    rows = parts.order_by('part_name').values_list(
+        'part_name', 'quantity', 'threshold', 'supplier__name', 'updated_at',
+    ).iterator(chunk_size=5000)
+    workbook = tempfile.TemporaryFile()
+    write_parts_xlsx(workbook, rows, title)
+    workbook.seek(0)
+    return FileResponse(workbook, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
+
+
+@login_required
+@user_passes_test(is_admin)
+def export_xlsx(request):
+    """
+    Export every part as an Excel workbook.
+
+    The workbook is written row by row into a temporary file and streamed
+    from there; rows at or below their threshold are highlighted.
+    """
+    return _xlsx_response(SparePart.objects.all(), 'spareparts.xlsx', 'Spare Parts')
+
+
+@login_required
+@user_passes_test(is_admin)
+def export_low_stock_xlsx(request):
+    """Export the parts at or below their threshold as an Excel workbook"""
+    low_parts = SparePart.objects.filter(quantity__lte=F('threshold'))
+    return _xlsx_response(low_parts, 'low_stock_items.xlsx', 'Low Stock')
+
+
+@login_required
+@user_passes_test(is_admin)
+def export_parquet(request):
+    """
+    Export every part as a Parquet file for analytics pipelines.
+
+    Parts are read in row-group sized chunks and written into a temporary
+    file, which is streamed from there.
+    """
+    rows = SparePart.objects.order_by('id').values_list(
+        'part_name', 'quantity', 'threshold', 'supplier__name', 'updated_at',
+    ).iterator(chunk_size=settings.PARQUET_ROW_GROUP_SIZE)
+    exported = tempfile.TemporaryFile()
+    write_parts_parquet(exported, rows)
+    exported.seek(0)
+    return FileResponse(exported, as_attachment=True, filename='spareparts.parquet', content_type=PARQUET_CONTENT_TYPE)
+
+
+@login_required
+@user_passes_test(is_admin)
+def export_purchase_orders(request):
+    """
+    Download a ZIP with one purchase order (CSV and PDF) per supplier with
+    low stock parts, plus summary.csv.
+
+    The archive is built in a temporary file and streamed from there.
+    Documents are rendered in-process: forking a process pool from a
+    threaded server is unsafe, export_purchase_orders uses one.
+    """
+    archive = tempfile.TemporaryFile()
+    write_purchase_orders_zip(archive, workers=1)
+    archive.seek(0)
+    filename = f'purchase_orders_{timezone.localdate():%Y%m%d}.zip'
+    return FileResponse(archive, as_attachment=True, filename=filename, content_type='application/zip')
+
+
 @login_required
 @user_passes_test(is_admin)
 def import_spare_parts(request):
     """
-    Import spare parts from CSV, Excel, or JSON file.
+    Import spare parts from CSV, Excel, JSON or TXT file.
     Expected columns: Part Name, Quantity, Threshold, Supplier
+
+    The upload is saved to disk and queued for the run_import_worker
+    command; the response carries the job id so the page can poll progress.
     """
     if request.method == 'POST':
         form = ImportSparePartsForm(request.POST, request.FILES)
         if form.is_valid():
-            file = request.FILES['file']
-            
-            try:
-                # Determine file type
-                name, ext = os.path.splitext(file.name.lower())
-                
-                # Parse data based on file type
-                data_rows = []
-                
-                if ext == '.csv':
-                    # Handle CSV files with multiple encodings
-                    try:
-                        file_content = file.read().decode('utf-8')
-                    except UnicodeDecodeError:
-                        file.seek(0)
-                        try:
-                            file_content = file.read().decode('latin-1')
-                        except:
-                            file.seek(0)
-                            file_content = file.read().decode('cp1252')
-                    
-                    csv_data = StringIO(file_content)
-                    # Try different delimiters
-                    try:
-                        reader = csv.DictReader(csv_data)
-                        data_rows = list(reader)
-                    except:
-                        csv_data.seek(0)
-                        reader = csv.DictReader(csv_data, delimiter=';')
-                        data_rows = list(reader)
-                    
-                elif ext in ['.xlsx', '.xls', '.xlsm']:
-                    # Handle Excel files using pandas
-                    try:
-                        df = pd.read_excel(file, engine='openpyxl' if ext in ['.xlsx', '.xlsm'] else 'xlrd')
-                    except:
-                        # Try without specifying engine
-                        file.seek(0)
-                        df = pd.read_excel(file)
-                    
-                    # Convert DataFrame to list of dictionaries
-                    data_rows = df.to_dict('records')
-                    
-                elif ext == '.json':
-                    # Handle JSON files
-                    file_content = file.read().decode('utf-8')
-                    json_data = json.loads(file_content)
-                    
-                    # Support both array of objects and single object with array
-                    if isinstance(json_data, dict) and 'parts' in json_data:
-                        data_rows = json_data['parts']
-                    elif isinstance(json_data, dict) and 'data' in json_data:
-                        data_rows = json_data['data']
-                    elif isinstance(json_data, list):
-                        data_rows = json_data
-                    else:
-                        messages.error(request, 'JSON format not recognized. Expected array of objects or object with "parts"/"data" array.')
-                        return render(request, 'import_spare_parts.html', {'form': form})
-                
-                elif ext == '.txt':
-                    # Handle tab-separated or pipe-separated text files
-                    file_content = file.read().decode('utf-8')
-                    txt_data = StringIO(file_content)
-                    
-                    # Try tab-separated first, then pipe-separated
-                    try:
-                        reader = csv.DictReader(txt_data, delimiter='\t')
-                        data_rows = list(reader)
-                    except:
-                        txt_data.seek(0)
-                        reader = csv.DictReader(txt_data, delimiter='|')
-                        data_rows = list(reader)
-                        
-                else:
-                    messages.error(request, f'Unsupported file format: {ext}. Supported formats: CSV, Excel (.xlsx, .xls), JSON, TXT')
-                    return render(request, 'import_spare_parts.html', {'form': form})
-                
-                if not data_rows:
-                    messages.warning(request, 'No data found in the uploaded file.')
-                    return render(request, 'import_spare_parts.html', {'form': form})
-                
-                # Normalize column names (case-insensitive matching with multiple variations)
-                expected_columns = {
-                    'part name': ['part name', 'partname', 'part', 'name', 'item', 'product'],
-                    'quantity': ['quantity', 'qty', 'stock', 'amount', 'count'],
-                    'threshold': ['threshold', 'min', 'minimum', 'reorder', 'reorder point', 'min stock'],
-                    'supplier': ['supplier', 'vendor', 'manufacturer', 'source']
-                }
-                
-                # Get column names from first row
-                if data_rows:
-                    first_row = data_rows[0]
-                    actual_columns = {str(col).lower().strip(): col for col in first_row.keys()}
-                    
-                    # Check for required columns and create mapping
-                    column_mapping = {}
-                    missing_columns = []
-                    
-                    for field, variations in expected_columns.items():
-                        found = False
-                        for variation in variations:
-                            if variation in actual_columns:
-                                column_mapping[field] = actual_columns[variation]
-                                found = True
-                                break
-                        if not found:
-                            # Only mark as missing if it's truly required (part name and quantity are essential)
-                            if field in ['part name', 'quantity']:
-                                missing_columns.append(field)
-                    
-                    if missing_columns:
-                        available_cols = list(first_row.keys())
-                        messages.error(request, 
-                            f'Missing required columns: {", ".join(missing_columns)}. '
-                            f'Available columns: {", ".join(available_cols)}. '
-                            f'Required: Part Name, Quantity. Optional: Threshold, Supplier.')
-                        return render(request, 'import_spare_parts.html', {'form': form})
-                
-                # Process and import data
-                imported_count = 0
-                updated_count = 0
-                skipped_count = 0
-                errors = []
-                
-                with transaction.atomic():  # Use database transaction for consistency
-                    for index, row in enumerate(data_rows):
-                        row_number = index + 2  # Account for header row
-                        try:
-                            # Extract data using column mapping with fallbacks
-                            part_name = str(row.get(column_mapping.get('part name', 'part name'), '')).strip()
-                            quantity_raw = row.get(column_mapping.get('quantity', 'quantity'), 0)
-                            threshold_raw = row.get(column_mapping.get('threshold', 'threshold'), 10)  # Default threshold
-                            supplier_raw = row.get(column_mapping.get('supplier', 'supplier'), '')
-                            
-                            # Skip empty rows
-                            if not part_name or part_name.lower() in ['', 'nan', 'none', 'null']:
-                                skipped_count += 1
-                                continue
-                            
-                            # Convert to integers, handling pandas NaN and various formats
-                            try:
-                                if pd.isna(quantity_raw) or quantity_raw == '':
-                                    quantity = 0
-                                else:
-                                    # Remove commas and convert
-                                    quantity_str = str(quantity_raw).replace(',', '').strip()
-                                    quantity = int(float(quantity_str))
-                                    
-                                if pd.isna(threshold_raw) or threshold_raw == '':
-                                    threshold = 10  # Default threshold
-                                else:
-                                    threshold_str = str(threshold_raw).replace(',', '').strip()
-                                    threshold = int(float(threshold_str))
-                                    
-                            except (ValueError, TypeError) as e:
-                                errors.append(f'Row {row_number}: Invalid number format - {str(e)}')
-                                continue
-                            
-                            # Validate data
-                            if quantity < 0 or threshold < 0:
-                                errors.append(f'Row {row_number}: Quantity and threshold must be non-negative')
-                                continue
-                            
-                            # Handle supplier field
-                            supplier = str(supplier_raw).strip() if supplier_raw and not pd.isna(supplier_raw) else ''
-                            if supplier.lower() in ['nan', 'none', 'null']:
-                                supplier = ''
-                            
-                            # Create or update spare part
-                            spare_part, created = SparePart.objects.get_or_create(
-                                part_name=part_name,
-                                defaults={
-                                    'quantity': quantity,
-                                    'threshold': threshold,
-                                    'supplier': supplier
-                                }
-                            )
-                            
-                            if created:
-                                imported_count += 1
-                            else:
-                                # Update existing part
-                                spare_part.quantity = quantity
-                                spare_part.threshold = threshold
-                                if supplier:  # Only update supplier if provided
-                                    spare_part.supplier = supplier
-                                spare_part.save()
-                                updated_count += 1
-                            
-                            # Check and send low stock alert if needed
-                            AlertService.check_and_send_alert(spare_part)
-                        
-                        except Exception as e:
-                            errors.append(f'Row {row_number}: Error - {str(e)}')
-                            continue
-                
-                # Display results
-                if imported_count > 0 or updated_count > 0:
-                    success_msg = f'✅ Import completed! {imported_count} new parts added, {updated_count} parts updated'
-                    if skipped_count > 0:
-                        success_msg += f', {skipped_count} rows skipped (empty)'
-                    messages.success(request, success_msg)
-                else:
-                    messages.warning(request, '⚠️ No parts were imported. Please check your file format and data.')
-                
-                if errors:
-                    error_msg = f'⚠️ {len(errors)} errors: ' + '; '.join(errors[:3])
-                    if len(errors) > 3:
-                        error_msg += f' ... and {len(errors) - 3} more.'
-                    messages.warning(request, error_msg)
-                
-                return redirect('admin_dashboard')
-                
-            except json.JSONDecodeError as e:
-                messages.error(request, f'❌ Invalid JSON format: {str(e)}')
-                return render(request, 'import_spare_parts.html', {'form': form})
-            except pd.errors.ParserError as e:
-                messages.error(request, f'❌ Error parsing file: {str(e)}')
-                return render(request, 'import_spare_parts.html', {'form': form})
-            except Exception as e:
-                messages.error(request, f'❌ Error processing file: {str(e)}. Please ensure the file contains "Part Name" and "Quantity" columns.')
-                return render(request, 'import_spare_parts.html', {'form': form})
+            job = enqueue_import(request.FILES['file'], request.user)
+            progress_url = reverse('import_job_progress', args=[job.pk])
+
+            if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+                return JsonResponse({'job_id': job.pk, 'progress_url': progress_url}, status=202)
+
+            messages.info(request, f'📥 Import of {job.original_name} queued (job #{job.pk}).')
+            return redirect(f"{reverse('import_spare_parts')}?job={job.pk}")
     else:
         form = ImportSparePartsForm()
-    
-    return render(request, 'import_spare_parts.html', {'form': form})
+
+    job = None
+    job_id = request.GET.get('job')
+    if job_id and job_id.isdigit():
+        job = ImportJob.objects.filter(pk=job_id).first()
+
+    return render(request, 'import_spare_parts.html', {'form': form, 'job': job})
+
+
+@login_required
+@user_passes_test(is_admin)
+def import_job_progress(request, pk):
+    """JSON progress of a background import job: rows processed, throughput and errors"""
+    job = get_object_or_404(ImportJob, pk=pk)
+    return JsonResponse(job_progress(job))
 
 
 @login_required
@@ -498,21 +523,9 @@ def admin_profile(request):
 @login_required
 @user_passes_test(is_admin)
 def export_pdf(request):
-    parts = SparePart.objects.all()
+    parts = SparePart.objects.select_related('supplier')
     buffer = BytesIO()
-    p = canvas.Canvas(buffer)
-    p.setFont('Helvetica', 12)
-    y = 800
-    p.drawString(40, y, 'Spare Parts Report')
-    y -= 30
-    for part in parts:
-        line = f"{part.part_name} - Qty: {part.quantity} - Threshold: {part.threshold} - Supplier: {part.supplier}"
-        p.drawString(40, y, line)
-        y -= 20
-        if y < 50:
-            p.showPage()
-            y = 800
-    p.save()
+    write_parts_pdf(buffer, parts)
     buffer.seek(0)
     return HttpResponse(buffer, content_type='application/pdf')
 
@@ -750,45 +763,62 @@ If you receive this email, your Gmail SMTP configuration is working correctly! 
         """)
 
 
-@login_required
-@user_passes_test(is_admin)
-def chart_data_api(request):
-    """API endpoint to get chart data in JSON format for dynamic filtering"""
-    from django.http import JsonResponse
-    
+def _filtered_parts(request):
+    """Apply the dashboard's search text and supplier/status filters from the query string"""
     supplier_filter = request.GET.get('supplier', 'all')
     status_filter = request.GET.get('status', 'all')
+    search_text = request.GET.get('q', '').strip()
     
     # Base queryset
     parts = SparePart.objects.all()
+    if search_text:
+        parts = filter_parts(parts, search_text)
     
     # Apply filters
     if supplier_filter and supplier_filter != 'all':
-        parts = parts.filter(supplier=supplier_filter)
+        # The dashboard sends supplier ids; names are still accepted
+        if supplier_filter.isdigit():
+            parts = parts.filter(supplier_id=int(supplier_filter))
+        else:
+            parts = parts.filter(supplier__name=supplier_filter)
     
     if status_filter == 'low':
-        parts = parts.filter(quantity__lt=F('threshold'))
+        parts = parts.filter(quantity__lte=F('threshold'))
     elif status_filter == 'normal':
-        parts = parts.filter(quantity__gte=F('threshold'))
+        parts = parts.filter(quantity__gt=F('threshold'))
+    
+    return parts
+
+
+@login_required
+@user_passes_test(is_admin)
+def chart_data_api(request):
+    """API endpoint to get chart data in JSON format for dynamic filtering"""
+    parts = _filtered_parts(request)
     
     # Prepare data for charts
-    parts_list = list(parts.values('part_name', 'quantity', 'threshold', 'supplier'))
+    parts_list = [
+        {'part_name': name, 'quantity': quantity, 'threshold': threshold, 'supplier': supplier or ''}
+        for name, quantity, threshold, supplier
+        in parts.values_list('part_name', 'quantity', 'threshold', 'supplier__name')
+    ]
     
     # Calculate supplier stats
-    from django.db.models import Sum, Count
-    supplier_stats = parts.values('supplier').annotate(
-        total_quantity=Sum('quantity'),
-        part_count=Count('id')
-    ).order_by('-total_quantity')
+    supplier_stats = with_supplier_names(
+        parts.values('supplier').annotate(
+            total_quantity=Sum('quantity'),
+            part_count=Count('id')
+        ).order_by('-total_quantity')
+    )
     
     # Calculate KPIs
     total_parts = parts.count()
-    low_stock_count = parts.filter(quantity__lt=F('threshold')).count()
-    suppliers_count = parts.values('supplier').distinct().count()
+    low_stock_count = parts.filter(quantity__lte=F('threshold')).count()
+    suppliers_count = parts.filter(supplier__isnull=False).values('supplier').distinct().count()
     
     data = {
         'parts': parts_list,
-        'supplier_stats': list(supplier_stats),
+        'supplier_stats': supplier_stats,
         'kpis': {
             'total_parts': total_parts,
             'low_stock': low_stock_count,
@@ -799,3 +829,165 @@ def chart_data_api(request):
     }
     
     return JsonResponse(data)
+
+
+@login_required
+@user_passes_test(is_admin)
+def insights_api(request):
+    """
+    Dashboard analytics computed in the database: KPIs, critical and
+    overstocked counts and bounded top-N lists instead of every part.
+    """
+    unfiltered = (
+        request.GET.get('supplier', 'all') in ('', 'all')
+        and request.GET.get('status', 'all') == 'all'
+        and not request.GET.get('q', '').strip()
+    )
+    # The whole inventory's KPIs come straight from the rollup tables
+    return JsonResponse(compute_insights(_filtered_parts(request), use_rollups=unfiltered))
+
+
+@login_required
+def search_parts_api(request):
+    """Ranked prefix search over part names and suppliers: ?q=hydr+bear&limit=20"""
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(int(request.GET.get('limit', 20)), MAX_RESULTS)
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=400)
+
+    results = [_part_json(part) for part in search_parts(query, limit)]
+    return JsonResponse({'query': query, 'results': results})
+
+
+@login_required
+def parts_changes_api(request):
+    """
+    Parts changed since a cursor: ?since=<cursor>&limit=500
+
+    Returns changed parts, ids of deleted parts and the cursor for the next
+    call. Without `since`, pages through every part. Keep calling while
+    has_more is true. 410 means the cursor is too old and the client must
+    reload the full list.
+    """
+    try:
+        limit = min(int(request.GET.get('limit', settings.SYNC_PAGE_SIZE)), 5000)
+        changes = changes_since(request.GET.get('since') or None, max(limit, 1))
+    except (ValueError, InvalidCursor) as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    except CursorExpired:
+        return JsonResponse({'error': 'Cursor expired, reload the full list'}, status=410)
+
+    return JsonResponse({
+        'parts': [_part_json(part) for part in changes['parts']],
+        'deleted': changes['deleted'],
+        'cursor': changes['cursor'],
+        'has_more': changes['has_more'],
+    })
+
+
+@login_required
+def movements_api(request):
+    """
+    Apply a batch of stock movements: POST {"movements": [{"part_id": 1, "action": "use", "qty": 2}, ...]}
+
+    action is use, restock or set. The Idempotency-Key header is required;
+    retrying with the same key and body returns the first response without
+    applying the batch again (Idempotent-Replayed: true). Nothing is applied
+    when any movement is invalid.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=405)
+    key = request.headers.get('Idempotency-Key', '').strip()
+    if not key or len(key) > 100:
+        return JsonResponse({'error': 'Idempotency-Key header required (at most 100 characters)'}, status=400)
+    try:
+        movements = parse_movements(json.loads(request.body))
+        data, replayed = run_batch(
+            request.user, key, request.body, movements,
+            lambda parts: {'applied': len(movements), 'parts': [_part_json(part) for part in parts]},
+        )
+    except ValueError as exc:
+        # Malformed JSON or a MovementError
+        return JsonResponse({'error': str(exc)}, status=400)
+    except IdempotencyConflict:
+        return JsonResponse({'error': 'Idempotency-Key was already used for a different request'}, status=409)
+
+    response = JsonResponse(data)
+    if replayed:
+        response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _part_json(part):
+    return {
+        'id': part.pk,
+        'part_name': part.part_name,
+        'quantity': part.quantity,
+        'threshold': part.threshold,
+        'supplier': part.supplier_name,
+        'is_low': part.is_low(),
+        'updated_at': part.updated_at.isoformat(),
+        'version': part.version,
+    }
+
+
+def _sse(event, data):
+    """Format one Server-Sent Events message"""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+def _kpi_snapshot():
+    summary = InventorySummary.load()
+    return {
+        'total_parts': summary.total_parts,
+        'low_stock': summary.low_stock_count,
+        'well_stocked': summary.total_parts - summary.low_stock_count,
+    }
+
+
+async def _event_stream():
+    """
+    Yield a KPI snapshot, then KPI deltas and alert events from the bus.
+
+    The stream ends after EVENTS_MAX_STREAM_SECONDS and the browser
+    reconnects, which bounds streams whose client went away unnoticed.
+    """
+    subscription = bus.subscribe()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.EVENTS_MAX_STREAM_SECONDS
+    try:
+        yield 'retry: 2000\n\n'
+        yield _sse('snapshot', await sync_to_async(_kpi_snapshot)())
+        while loop.time() < deadline:
+            timeout = min(settings.EVENTS_HEARTBEAT_SECONDS, deadline - loop.time())
+            try:
+                event, data = await asyncio.wait_for(subscription.get(), timeout=max(timeout, 0))
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            if event == 'resync':
+                yield _sse('snapshot', await sync_to_async(_kpi_snapshot)())
+            else:
+                yield _sse(event, data)
+    finally:
+        bus.unsubscribe(subscription)
+
+
+async def dashboard_events(request):
+    """
+    Server-Sent Events stream for the dashboards: `snapshot` (KPI totals),
+    `kpi` (deltas to apply: parts, quantity, low_stock) and `alert` events.
+
+    Needs an ASGI server (daphne's runserver, uvicorn, ...).
+    """
+    if not await sync_to_async(lambda: request.user.is_authenticated)():
+        return HttpResponse(status=401)
+    if not hasattr(request, 'scope'):
+        # WSGI would buffer the endless stream instead of sending it
+        return HttpResponse('Live updates need an ASGI server', status=501, content_type='text/plain')
+
+    response = StreamingHttpResponse(_event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,4 +1,5 @@
 from pathlib import Path
+import importlib.util
 import os
 from dotenv import load_dotenv
 
@@ -24,6 +25,11 @@ INSTALLED_APPS = [
     'django_crontab',
 ]
 
+# daphne (in requirements.txt) makes runserver serve ASGI, which the live
+# dashboard stream (/api/events/) needs; without it the stream returns 501
+if importlib.util.find_spec('daphne'):
+    INSTALLED_APPS.insert(0, 'daphne')
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -53,14 +59,38 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'inventory_monitor.wsgi.application'
+ASGI_APPLICATION = 'inventory_monitor.asgi.application'
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
     }
 }
 
+# Database profile: 'default' keeps SQLite's stock settings, 'production' enables
+# WAL mode, tuned pragmas, IMMEDIATE write transactions and persistent connections.
+DB_PROFILE = os.environ.get('DB_PROFILE', 'default')
+
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'ENGINE': 'inventory_app.db_backends.sqlite3',
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'cache_size': -64000,  # 64MB page cache (negative = KiB)
+                'mmap_size': 268435456,  # 256MB memory-mapped I/O
+                'busy_timeout': 20000,  # wait up to 20s for the write lock
+                'temp_store': 'MEMORY',
+            },
+        },
+    })
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -87,6 +117,89 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Background imports: uploads are saved here and processed by run_import_worker
+IMPORT_UPLOAD_DIR = MEDIA_ROOT / 'imports'
+IMPORT_BATCH_SIZE = 1000
+# RUNNING jobs without a progress report for this long are failed by the
+# next worker poll (the worker running them died)
+IMPORT_JOB_STALE_SECONDS = 600
+
+# Upload limit for streamed text formats (CSV, JSON, NDJSON); Excel stays at 10MB
+IMPORT_MAX_TEXT_FILE_MB = 250
+
+# Parallel parsing: files larger than IMPORT_PARALLEL_MIN_BYTES are split into
+# IMPORT_CHUNK_BYTES ranges and parsed by IMPORT_PARSE_WORKERS processes
+IMPORT_PARSE_WORKERS = int(os.environ.get('IMPORT_PARSE_WORKERS', os.cpu_count() or 1))
+IMPORT_CHUNK_BYTES = 4 * 1024 * 1024
+IMPORT_PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+
+# Stock-out forecasting (python manage.py compute_forecasts): days of usage
+# history, exponential smoothing factor, and the days of cover below which a
+# part is reported as running out
+FORECAST_WINDOW_DAYS = 28
+FORECAST_SMOOTHING = 0.3
+FORECAST_ALERT_DAYS = 7
+
+# Reorder point simulation (python manage.py simulate_reorder_points): demand
+# scenarios per part, target probability of not stocking out during the lead
+# time, gamma shape of the demand-rate uncertainty (lower is more volatile),
+# and the most parts x scenarios x days cells held in memory per chunk
+SIMULATION_SCENARIOS = 2000
+SIMULATION_SERVICE_LEVEL = 0.95
+SIMULATION_DEMAND_SHAPE = 4.0
+SIMULATION_MAX_CELLS = 4_000_000
+SIMULATION_WORKERS = int(os.environ.get('SIMULATION_WORKERS', 1))
+
+# Purchase orders (export/purchase-orders/): parts are restocked to threshold
+# plus PURCHASE_ORDER_BUFFER x threshold. The download renders in-process,
+# export_purchase_orders with PURCHASE_ORDER_WORKERS processes
+PURCHASE_ORDER_BUFFER = 0.25
+PURCHASE_ORDER_WORKERS = int(os.environ.get('PURCHASE_ORDER_WORKERS', os.cpu_count() or 1))
+
+# Live dashboard stream (/api/events/): events buffered per client before it
+# is told to resync, keep-alive interval, and how long one stream stays open
+# before the browser reconnects
+EVENTS_QUEUE_SIZE = 100
+EVENTS_HEARTBEAT_SECONDS = 15
+EVENTS_MAX_STREAM_SECONDS = 300
+
+# Delta sync (/api/parts/changes/): rows per page, how long a write may take
+# to commit (recent changes are re-sent for this long), and how long
+# deletion tombstones are kept before clients must reload
+SYNC_PAGE_SIZE = 500
+SYNC_SETTLE_SECONDS = 5
+SYNC_TOMBSTONE_DAYS = 7
+
+# Parquet export (export/parquet/): rows per row group, which is also how many
+# rows are read from the database at a time
+PARQUET_ROW_GROUP_SIZE = 100_000
+
+# Batched stock movements (/api/movements/): most movements per request, and
+# how long a batch's response is kept for retries with the same Idempotency-Key
+MOVEMENT_BATCH_MAX = 500
+IDEMPOTENCY_KEY_HOURS = 24
+
+# Counter slots per hot part (SparePart.hot): concurrent stock changes are
+# spread over this many rows and folded into the part by fold_counters
+HOT_PART_COUNTER_SLOTS = 8
+
+# Write-behind usage spool (off when empty): technician use/restock are appended
+# to this SQLite file and applied in batches of up to USAGE_SPOOL_BATCH_SIZE
+# changes every USAGE_SPOOL_FLUSH_SECONDS by run_usage_flusher
+USAGE_SPOOL_PATH = os.environ.get('USAGE_SPOOL_PATH', '')
+USAGE_SPOOL_FLUSH_SECONDS = 2.0
+USAGE_SPOOL_BATCH_SIZE = 10000
+
+# Outbox consumers (outbox.Consumer subclasses) run by run_outbox_consumers on
+# the PartChange rows every part write adds. A runner holds a consumer for
+# OUTBOX_LEASE_SECONDS, renewed after every batch.
+OUTBOX_CONSUMERS = [
+    'inventory_app.outbox.LowStockAlertConsumer',
+]
+OUTBOX_LEASE_SECONDS = 300
+
 # Login URL Configuration
 LOGIN_URL = 'login'  # Redirect to the login view when @login_required is triggered
 LOGIN_REDIRECT_URL = 'admin_dashboard'  # Default redirect after login
@@ -113,5 +226,10 @@ ALERT_RECIPIENTS = [
 # Cron Jobs Configuration
 # Run daily stock alert every day at 9:00 AM
 CRONJOBS = [
+    ('30 8 * * *', 'django.core.management.call_command', ['compute_forecasts']),
     ('0 9 * * *', 'django.core.management.call_command', ['send_daily_stock_alert']),
+    ('0 3 * * *', 'django.core.management.call_command', ['prune_sync_log']),
+    ('15 3 * * *', 'django.core.management.call_command', ['prune_idempotency_keys']),
+    ('* * * * *', 'django.core.management.call_command', ['fold_counters']),
+    ('* * * * *', 'django.core.management.call_command', ['run_outbox_consumers', '--once']),
 ]
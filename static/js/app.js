@@ -56,6 +56,21 @@ document.addEventListener('DOMContentLoaded', function() {
         firstInput.focus();
     }
 
+    // Quantity changes from the technician table are posted in the background
+    document.addEventListener('submit', function(e) {
+        const form = e.target;
+        if (form.matches('form[data-quick-update]') && window.fetch) {
+            e.preventDefault();
+            submitQuickUpdate(form, e.submitter);
+        }
+    });
+
+    // Live KPI and alert updates pushed by the server (/api/events/)
+    const liveContainer = document.querySelector('[data-live-events]');
+    if (liveContainer && window.EventSource) {
+        startLiveUpdates(liveContainer.dataset.liveEvents);
+    }
+
     // Add tooltips to buttons
     const tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"], [title]'));
     tooltipTriggerList.map(function (tooltipTriggerEl) {
@@ -63,9 +78,121 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 });
 
+// Show KPI values in the matching [data-kpi] elements, flashing the ones that changed
+function showKpis(values) {
+    document.querySelectorAll('[data-kpi]').forEach(el => {
+        const value = values[el.dataset.kpi];
+        if (value !== undefined && el.textContent !== String(value)) {
+            el.textContent = value;
+            el.classList.add('kpi-updated');
+            setTimeout(() => el.classList.remove('kpi-updated'), 1000);
+        }
+    });
+}
+
+function showToast(text) {
+    let container = document.getElementById('liveAlertToasts');
+    if (!container) {
+        container = document.createElement('div');
+        container.id = 'liveAlertToasts';
+        container.className = 'toast-container position-fixed bottom-0 end-0 p-3';
+        document.body.appendChild(container);
+    }
+    const toast = document.createElement('div');
+    toast.className = 'toast';
+    toast.setAttribute('role', 'alert');
+    const body = document.createElement('div');
+    body.className = 'toast-body';
+    body.textContent = text;
+    toast.appendChild(body);
+    container.appendChild(toast);
+    toast.addEventListener('hidden.bs.toast', () => toast.remove());
+    new bootstrap.Toast(toast, { delay: 6000 }).show();
+}
+
+// Post a quantity form and swap in the row the server renders back
+function submitQuickUpdate(form, submitter) {
+    const data = new FormData(form);
+    if (submitter && submitter.name) {
+        data.append(submitter.name, submitter.value);
+    }
+    const buttons = form.querySelectorAll('button');
+    buttons.forEach(button => { button.disabled = true; });
+    fetch(form.action, {
+        method: 'POST',
+        body: data,
+        headers: { 'X-Requested-With': 'XMLHttpRequest' },
+    })
+        .then(response => response.json().then(result => ({ ok: response.ok, result })))
+        .then(({ ok, result }) => {
+            // A conflict (409) also sends the current row, so the next post uses its version
+            if (result.row) {
+                const template = document.createElement('template');
+                template.innerHTML = result.row.trim();
+                const row = template.content.firstElementChild;
+                if (row.classList.contains('low-stock-indicator')) {
+                    row.style.animation = 'subtle-pulse 3s ease-in-out infinite';
+                }
+                form.closest('tr').replaceWith(row);
+                showKpis(result.kpis);
+            }
+            if (!ok) {
+                showToast(result.error || 'Update failed');
+                return;
+            }
+            result.messages.forEach(showToast);
+        })
+        .catch(error => {
+            console.error('Error updating quantity:', error);
+            showToast('Update failed, please try again');
+        })
+        .finally(() => buttons.forEach(button => { button.disabled = false; }));
+}
+
+// Keep the dashboard stats cards current from the server-sent event stream
+function startLiveUpdates(url) {
+    const kpis = {};
+
+    function render() {
+        showKpis(kpis);
+    }
+
+    function showAlert(alert) {
+        showToast(`Low stock alert (${alert.status.toLowerCase()}): ${alert.part_name} - ` +
+            `quantity ${alert.quantity}, threshold ${alert.threshold}`);
+    }
+
+    const source = new EventSource(url);
+    source.addEventListener('snapshot', e => {
+        Object.assign(kpis, JSON.parse(e.data));
+        render();
+    });
+    source.addEventListener('kpi', e => {
+        if (kpis.total_parts === undefined) {
+            return;
+        }
+        const delta = JSON.parse(e.data);
+        kpis.total_parts += delta.parts;
+        kpis.low_stock += delta.low_stock;
+        kpis.well_stocked = kpis.total_parts - kpis.low_stock;
+        render();
+        document.dispatchEvent(new CustomEvent('inventory:changed'));
+    });
+    source.addEventListener('alert', e => {
+        const alert = JSON.parse(e.data);
+        if (alert.created) {
+            showAlert(alert);
+        }
+    });
+}
+
 // Add CSS animation keyframes via JavaScript
 const style = document.createElement('style');
 style.textContent = `
+    .kpi-updated {
+        transition: color 0.3s;
+        color: #0d6efd !important;
+    }
     @keyframes subtle-pulse {
         0%, 100% { 
             background-color: rgba(255, 193, 7, 0.1); 